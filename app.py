@@ -4,6 +4,7 @@ import numpy as np
 import sys
 import os
 import io
+import tempfile
 import zipfile
 import matplotlib.pyplot as plt
 from PIL import ImageDraw
@@ -13,7 +14,11 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'src'))
 
 from segmentation import LandCoverSegmenter
 from cost_map import CostMapGenerator
-from pathfinding import AStarPathfinder
+from pathfinding import (AStarPathfinder, PixelPath, alternative_routes, cost_map_fingerprint,
+                         path_statistics, polygon_mask, rasterize_path, route_mask,
+                         simplify_path)
+from incremental import IncrementalPathfinder
+from route_cache import shared_route_cache
 from visualization import RouteVisualizer
 from image_collection import SatelliteImageCollector
 
@@ -80,6 +85,34 @@ def generate_synthetic_image(seed: int, size: int = 256) -> Image.Image:
 
 SAMPLE_IMAGE_PATHS = ensure_sample_images(n=10, size=256)
 
+# Disk tier of the route cache shared by all sessions
+ROUTE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'route_cache')
+
+def alternative_table(routes: list) -> list:
+    """Rows of the route comparison table."""
+    return [{
+        'Route': 'Best' if i == 0 else f'Alternative {i}',
+        'Cost': f"{route['cost']:,.0f}",
+        'vs. Best': f"+{(route['stretch'] - 1) * 100:.1f}%",
+        'Length (px)': f"{route['length']:,.0f}",
+        'Shared with Best': f"{route['overlap'] * 100:.0f}%",
+    } for i, route in enumerate(routes)]
+
+def parse_points(text: str, shape: tuple) -> list:
+    """(row, col) points from 'x, y' lines; raises ValueError on bad input."""
+    points = []
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        parts = line.replace(';', ',').split(',')
+        if len(parts) != 2:
+            raise ValueError(f"Expected 'x, y' but got: {line.strip()}")
+        x, y = int(parts[0]), int(parts[1])
+        if not (0 <= x < shape[1] and 0 <= y < shape[0]):
+            raise ValueError(f"Point ({x}, {y}) is outside the image")
+        points.append((y, x))
+    return points
+
 # Custom CSS
 st.markdown("""
 <style>
@@ -637,31 +670,288 @@ elif st.session_state.page == 'route':
             end_x = st.number_input("X Coordinate", value=st.session_state.cost_map.shape[1]-50, min_value=0, max_value=st.session_state.cost_map.shape[1]-1, key="end_x")
             end_y = st.number_input("Y Coordinate", value=st.session_state.cost_map.shape[0]-50, min_value=0, max_value=st.session_state.cost_map.shape[0]-1, key="end_y")
         
+        via_text = st.text_area("📍 Via points (one 'x, y' per line, visited between start and end)", "",
+                                help="Each leg is solved separately and the legs run in parallel")
+        try:
+            via_points = parse_points(via_text, st.session_state.cost_map.shape)
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            via_points = []
+        optimize_order = False
+        if len(via_points) > 1:
+            optimize_order = st.checkbox("🔀 Optimize via point order (start and end stay fixed)")
+        
+        with st.expander("🚫 Restricted areas"):
+            col1, col2 = st.columns(2)
+            with col1:
+                corridor_text = st.text_area("Planning corridor polygon (one 'x, y' corner per line)", "",
+                                             help="The route must stay inside this polygon")
+            with col2:
+                no_go_text = st.text_area("No-go zone polygon (one 'x, y' corner per line)", "",
+                                          help="The route must avoid this polygon, e.g. a protected area")
+            water_obstacle = st.checkbox("💧 Make costly pixels impassable (e.g. water)")
+            obstacle_cost = None
+            if water_obstacle:
+                obstacle_cost = st.number_input("Impassable from cost", min_value=1, step=50,
+                                                value=int(st.session_state.get('terrain_costs', {}).get(0, 1000)))
+        try:
+            corridor_polygon = parse_points(corridor_text, st.session_state.cost_map.shape)
+            no_go_polygon = parse_points(no_go_text, st.session_state.cost_map.shape)
+            if 0 < len(corridor_polygon) < 3 or 0 < len(no_go_polygon) < 3:
+                raise ValueError("A polygon needs at least 3 corners")
+        except ValueError as e:
+            st.error(f"❌ {e}")
+            corridor_polygon = no_go_polygon = []
+        allowed = route_mask(
+            st.session_state.cost_map,
+            no_go=polygon_mask(st.session_state.cost_map.shape, no_go_polygon) if no_go_polygon else None,
+            corridor=corridor_polygon or None,
+            obstacle_cost=obstacle_cost
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            heuristic = st.selectbox("Heuristic", ['euclidean', 'scaled', 'alt'], index=1,
+                                     help="'scaled' and 'alt' give tighter lower bounds on the remaining cost")
+        with col2:
+            weight = st.slider("Speed vs. Optimality (heuristic weight)", 1.0, 3.0, 1.0, 0.1,
+                               help="Weights above 1 search faster; the route costs at most weight × optimal")
+        
+        movement = st.radio("Move cost model", ['cell', 'metric'], horizontal=True,
+                            format_func=lambda m: {'metric': "Distance-correct (diagonals × √2)",
+                                                   'cell': "Per pixel entered"}[m],
+                            help="Routes are repaired incrementally after cost changes "
+                                 "only with the per-pixel model")
+        anytime = st.checkbox("⏱ Anytime mode (show a quick route first, then refine it)")
+        if anytime:
+            time_budget = st.slider("Time budget (seconds)", 1, 60, 10)
+        any_angle = st.checkbox("📐 Any-angle route (straight segments instead of 8 grid directions)")
+        curvature = st.checkbox("🛣️ Curvature-aware route (limit the heading change per step)")
+        if curvature:
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                headings = st.selectbox("Headings", [8, 16], index=1)
+            with col2:
+                max_turn_degrees = st.select_slider("Max turn per step",
+                                                    [360 // headings * k for k in range(1, headings // 4 + 1)],
+                                                    format_func=lambda d: f"{d}°")
+            with col3:
+                turn_penalty = st.number_input("Turn penalty (per heading step)", value=100, min_value=0, step=50)
+        show_explored = st.checkbox("🔬 Record the explored region (search metrics)")
+        coarse_to_fine = st.checkbox("🔭 Coarse-to-fine mode (fast approximate route for large images)")
+        with st.expander("🛡️ Search limits"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                max_expansions = st.number_input("Max expanded pixels (0 = no limit)", value=0, min_value=0, step=100000)
+            with col2:
+                max_seconds = st.number_input("Max search time in seconds (0 = no limit)", value=0, min_value=0, step=10)
+            with col3:
+                max_memory_mb = st.number_input("Max search memory in MB (0 = no limit)", value=0, min_value=0, step=64)
+        limits = {
+            'max_expansions': max_expansions or None,
+            'max_seconds': max_seconds or None,
+            'max_memory': max_memory_mb * 2**20 or None,
+        }
+        
         st.markdown("</div>", unsafe_allow_html=True)
         
         st.markdown('<div class="card">', unsafe_allow_html=True)
         if st.button("🚀 Calculate Optimal Route", use_container_width=True):
-            pathfinder = AStarPathfinder()
-            path = pathfinder.find_path(
-                st.session_state.cost_map,
-                (start_y, start_x),
-                (end_y, end_x)
-            )
+            # Anytime, any-angle and incremental search use the cell model
+            if (anytime or any_angle) and not via_points:
+                movement = 'cell'
+            if coarse_to_fine and allowed is not None:
+                st.info("🚫 Coarse-to-fine mode ignores restricted areas, so the exact search is used")
+            if curvature:
+                pathfinder = AStarPathfinder(engine='lattice', movement=movement, headings=headings,
+                                             max_turn=max_turn_degrees // (360 // headings),
+                                             turn_penalty=turn_penalty)
+            else:
+                pathfinder = AStarPathfinder(movement=movement)
+            if via_points:
+                path = pathfinder.find_path_via(
+                    st.session_state.cost_map,
+                    [(start_y, start_x), *via_points, (end_y, end_x)],
+                    allowed=allowed,
+                    heuristic=heuristic,
+                    weight=weight,
+                    optimize_order=optimize_order,
+                    processes=None
+                )
+                if path and optimize_order:
+                    order = pathfinder.waypoint_report['order'][1:-1]
+                    st.info("🔀 Via point order: " + " → ".join(
+                        f"({via_points[i - 1][1]}, {via_points[i - 1][0]})" for i in order))
+            elif anytime:
+                # Show each improved route as soon as the search yields it
+                progress_status = st.empty()
+                progress_image = st.empty()
+                visualizer = RouteVisualizer()
+                path = None
+                for path, route_cost, bound in pathfinder.find_path_anytime(
+                    st.session_state.cost_map,
+                    (start_y, start_x),
+                    (end_y, end_x),
+                    allowed=allowed,
+                    heuristic=heuristic,
+                    initial_weight=max(weight, 2.0),
+                    time_budget=time_budget
+                ):
+                    progress_status.info(f"🔄 Route cost {route_cost:,.0f} "
+                                         f"(within {bound:.2f}× of optimal), refining...")
+                    progress_image.image(visualizer.visualize_route(
+                        np.array(st.session_state.original_image),
+                        path,
+                        (start_y, start_x),
+                        (end_y, end_x)
+                    ), use_container_width=True)
+                progress_status.empty()
+                progress_image.empty()
+            elif any_angle:
+                vertices = pathfinder.find_path_any_angle(
+                    st.session_state.cost_map,
+                    (start_y, start_x),
+                    (end_y, end_x),
+                    allowed=allowed,
+                    heuristic=heuristic,
+                    compare_grid=True
+                )
+                path = rasterize_path(vertices) if vertices else None
+                if vertices:
+                    report = pathfinder.any_angle_report
+                    col1, col2 = st.columns(2)
+                    col1.metric("Any-angle Length", f"{report['length']:,.0f} px",
+                                f"{report['length'] - report['grid_length']:,.0f} px vs grid")
+                    col2.metric("Any-angle Cost", f"{report['cost']:,.0f}",
+                                f"{report['cost'] - report['grid_cost']:,.0f} vs grid", delta_color="inverse")
+            elif coarse_to_fine and allowed is None:
+                path = pathfinder.find_path_multiresolution(
+                    st.session_state.cost_map,
+                    (start_y, start_x),
+                    (end_y, end_x)
+                )
+            elif (weight == 1.0 and movement == 'cell' and not curvature and not show_explored
+                  and not any(limits.values()) and allowed is None):
+                # Exact routes are answered from the shared route cache, or
+                # else reuse the previous search when only terrain costs
+                # changed since the last query; update_costs diffs the new
+                # cost map against the one it searched
+                route_cache = shared_route_cache(disk_dir=ROUTE_CACHE_DIR)
+                cache_key = route_cache.key(pathfinder, st.session_state.cost_map,
+                                            (start_y, start_x), (end_y, end_x), heuristic=heuristic)
+                incremental = st.session_state.get('incremental_pathfinder')
+                query = ((start_y, start_x), (end_y, end_x), st.session_state.cost_map.shape,
+                         cost_map_fingerprint(st.session_state.segmentation_mask))
+                same_query = (incremental is not None
+                              and st.session_state.get('incremental_query') == query
+                              and incremental.path is not None)
+                if route_cache.load(pathfinder, cache_key):
+                    path = pathfinder.path
+                    st.caption("⚡ Served from the route cache.")
+                else:
+                    if same_query:
+                        path = incremental.update_costs(st.session_state.cost_map)
+                        if incremental.last_update['changed'] and not incremental.last_update['replanned']:
+                            st.info(f"♻️ Route repaired incrementally "
+                                    f"({incremental.last_update['expansions']:,} pixels re-searched)")
+                    else:
+                        incremental = IncrementalPathfinder()
+                        path = incremental.plan(st.session_state.cost_map, (start_y, start_x), (end_y, end_x))
+                    st.session_state.incremental_pathfinder = incremental
+                    st.session_state.incremental_query = query
+                    route_cache.put(cache_key, {
+                        'path': None if path is None else PixelPath(path).points,
+                        'cost': None if path is None else float(incremental.cost),
+                        'suboptimality': 1.0,
+                    })
+            elif show_explored:
+                path = pathfinder.find_path(
+                    st.session_state.cost_map,
+                    (start_y, start_x),
+                    (end_y, end_x),
+                    allowed=allowed,
+                    heuristic=heuristic,
+                    weight=weight,
+                    record_expanded=True,
+                    **limits
+                )
+            else:
+                # Repeated queries on the same cost map, from any session,
+                # are answered from the shared route cache
+                route_cache = shared_route_cache(disk_dir=ROUTE_CACHE_DIR)
+                path = route_cache.find_path(
+                    pathfinder,
+                    st.session_state.cost_map,
+                    (start_y, start_x),
+                    (end_y, end_x),
+                    allowed=allowed,
+                    heuristic=heuristic,
+                    weight=weight,
+                    **limits
+                )
+                cache_stats = route_cache.stats()
+                st.caption(f"{'⚡ Served from the route cache. ' if pathfinder.search_stats is None else ''}"
+                           f"🗄️ Route cache: {cache_stats['hits'] + cache_stats['disk_hits']:,} hits "
+                           f"({cache_stats['disk_hits']:,} from disk), {cache_stats['misses']:,} misses, "
+                           f"{cache_stats['entries']:,} routes in memory")
+            # Only single find_path queries record search metrics
+            st.session_state.search_stats = pathfinder.search_stats if not (
+                via_points or anytime or any_angle or coarse_to_fine) else None
             
             if path:
+                # Session state keeps the route as a compact int32 array
+                path = PixelPath(path)
                 st.session_state.path = path
+                # Corner vertices draw the same route without its pixel stairs;
+                # shortcuts ignore turn limits, so curvature-aware routes stay as found,
+                # and via points stay vertices so every leg is simplified on its own
+                if pathfinder.engine == 'lattice':
+                    st.session_state.route_vertices = list(path)
+                else:
+                    keep = pathfinder.waypoint_report['waypoint_indices'] if via_points else None
+                    st.session_state.route_vertices = simplify_path(st.session_state.cost_map, path,
+                                                                    allowed, movement, keep)
+                st.session_state.movement = movement
                 st.session_state.start_point = (start_y, start_x)
                 st.session_state.end_point = (end_y, end_x)
+                st.session_state.via_points = via_points
+                st.session_state.restricted_polygons = (corridor_polygon, no_go_polygon)
                 
                 visualizer = RouteVisualizer()
                 route_img = visualizer.visualize_route(
                     np.array(st.session_state.original_image),
-                    path,
+                    st.session_state.route_vertices,
                     (start_y, start_x),
                     (end_y, end_x)
                 )
                 st.session_state.route_image = Image.fromarray(route_img)
-                st.success(f"✅ Optimal route found! Path length: {len(path)} pixels")
+                suboptimality = pathfinder.suboptimality or 1.0
+                if suboptimality > 1.0:
+                    st.success(f"✅ Route found! Path length: {len(path)} pixels, "
+                               f"cost within {suboptimality:.2f}× of optimal")
+                else:
+                    st.success(f"✅ Optimal route found! Path length: {len(path)} pixels")
+            elif pathfinder.budget_report:
+                report = pathfinder.budget_report
+                limit_names = {'expansions': f"{report['limit']:,} expanded pixels",
+                               'seconds': f"{report['limit']:,} s",
+                               'memory': f"{report['limit'] / 2**20:,.0f} MB of search memory"}
+                bound = (f" The optimal route costs at least {report['lower_bound']:,.0f}."
+                         if report['lower_bound'] is not None else "")
+                st.warning(f"⏳ Search stopped at its limit of {limit_names[report['exceeded']]} after "
+                           f"{report['expansions']:,} expanded pixels ({report['seconds']:.1f} s). "
+                           f"The partial route below covers {len(report['partial_path']):,} pixels "
+                           f"toward the end (cost {report['partial_cost']:,.0f}).{bound} "
+                           f"Try 🔭 Coarse-to-fine mode for a fast approximate route on large images.")
+                st.image(RouteVisualizer().visualize_route(
+                    np.array(st.session_state.original_image),
+                    report['partial_path'],
+                    (start_y, start_x),
+                    (end_y, end_x)
+                ), use_container_width=True)
+            elif allowed is not None:
+                st.error("❌ No valid path found inside the allowed area. "
+                         "Check that start and end lie in the corridor and outside no-go zones.")
             else:
                 st.error("❌ No valid path found. Try different start/end points.")
         st.markdown("</div>", unsafe_allow_html=True)
@@ -675,10 +965,19 @@ elif st.session_state.page == 'route':
                 st.markdown("**💰 Cost Map with Route**")
                 fig, ax = plt.subplots(figsize=(10, 10))
                 ax.imshow(st.session_state.cost_map, cmap='hot', alpha=0.7)
-                path_array = np.array(st.session_state.path)
+                path_array = np.array(st.session_state.route_vertices)
                 ax.plot(path_array[:, 1], path_array[:, 0], 'cyan', linewidth=3, label='Optimal Route')
                 ax.plot(st.session_state.start_point[1], st.session_state.start_point[0], 'go', markersize=15, label='Start')
                 ax.plot(st.session_state.end_point[1], st.session_state.end_point[0], 'ro', markersize=15, label='End')
+                if st.session_state.get('via_points'):
+                    via_array = np.array(st.session_state.via_points)
+                    ax.plot(via_array[:, 1], via_array[:, 0], 'yo', markersize=10, label='Via')
+                shown_corridor, shown_no_go = st.session_state.get('restricted_polygons', ([], []))
+                for polygon, color, label in ((shown_corridor, 'lime', 'Corridor'),
+                                              (shown_no_go, 'magenta', 'No-go zone')):
+                    if polygon:
+                        outline = np.array(polygon + polygon[:1])
+                        ax.plot(outline[:, 1], outline[:, 0], color=color, linestyle='--', label=label)
                 ax.legend()
                 ax.axis('off')
                 fig.patch.set_facecolor('#0E1117')
@@ -694,14 +993,80 @@ elif st.session_state.page == 'route':
             st.markdown('<p class="section-header">📊 Route Statistics</p>', unsafe_allow_html=True)
             
             col1, col2, col3, col4 = st.columns(4)
-            path_length = len(st.session_state.path)
-            total_cost = sum(st.session_state.cost_map[p[0], p[1]] for p in st.session_state.path)
-            avg_cost = total_cost / path_length if path_length > 0 else 0
+            stats = path_statistics(st.session_state.cost_map, st.session_state.path,
+                                    st.session_state.segmentation_mask,
+                                    st.session_state.get('movement', 'cell'))
+            avg_cost = stats['average_cost']
             
-            col1.metric("Path Length", f"{path_length} px")
-            col2.metric("Total Cost", f"{total_cost:,.0f}")
+            col1.metric("Path Length", f"{stats['length']:,.0f} px")
+            col2.metric("Total Cost", f"{stats['total_cost']:,.0f}")
             col3.metric("Average Cost/px", f"{avg_cost:.0f}")
-            col4.metric("Efficiency", f"{(1000/avg_cost)*100:.1f}%")
+            col4.metric("Efficiency", f"{(1000/avg_cost)*100:.1f}%" if avg_cost else "—")
+            
+            terrain_names = {0: '💧 Water', 1: '🌲 Forest', 2: '🏙️ Urban', 3: '🏜️ Barren', 4: '🛣️ Road'}
+            class_columns = st.columns(max(len(stats['cost_by_class']), 1))
+            for column, (class_id, class_cost) in zip(class_columns, stats['cost_by_class'].items()):
+                column.metric(terrain_names.get(class_id, f"Class {class_id}"), f"{class_cost:,.0f}",
+                              f"{stats['length_by_class'][class_id]:,.0f} px", delta_color="off")
+            
+            st.markdown("</div>", unsafe_allow_html=True)
+            
+            search_stats = st.session_state.get('search_stats')
+            if search_stats:
+                st.markdown('<div class="card">', unsafe_allow_html=True)
+                st.markdown('<p class="section-header">🔬 Search Metrics</p>', unsafe_allow_html=True)
+                
+                col1, col2, col3, col4, col5 = st.columns(5)
+                col1.metric("Pixels Expanded", f"{search_stats['expansions']:,}")
+                col2.metric("Heap Pushes", f"{search_stats['pushes']:,}")
+                col3.metric("Peak Open Set", f"{search_stats['peak_open']:,}")
+                col4.metric("Search Memory", f"{search_stats['memory_bytes'] / 2**20:,.1f} MB")
+                col5.metric("Search Time", f"{search_stats['seconds']:.2f} s")
+                
+                if search_stats['expanded'] is not None:
+                    fig, ax = plt.subplots(figsize=(10, 10))
+                    ax.imshow(st.session_state.cost_map, cmap='gray', alpha=0.6)
+                    ax.imshow(np.ma.masked_where(~search_stats['expanded'], search_stats['expanded']),
+                              cmap='cool', alpha=0.5)
+                    path_array = st.session_state.path.points
+                    ax.plot(path_array[:, 1], path_array[:, 0], 'yellow', linewidth=2)
+                    explored = search_stats['expanded'].mean() * 100
+                    ax.set_title(f"Explored region ({explored:.1f}% of the image)", color='white')
+                    ax.axis('off')
+                    fig.patch.set_facecolor('#0E1117')
+                    st.pyplot(fig)
+                
+                st.markdown("</div>", unsafe_allow_html=True)
+            
+            st.markdown('<div class="card">', unsafe_allow_html=True)
+            st.markdown('<p class="section-header">🔀 Alternative Routes</p>', unsafe_allow_html=True)
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                route_count = st.slider("Number of routes", 2, 6, 3)
+            with col2:
+                max_overlap = st.slider("Max shared route (%)", 10, 90, 60)
+            if st.button("🔀 Find Alternative Routes", use_container_width=True):
+                st.session_state.alternatives = alternative_routes(
+                    st.session_state.cost_map,
+                    st.session_state.start_point,
+                    st.session_state.end_point,
+                    k=route_count,
+                    max_overlap=max_overlap / 100
+                )
+            
+            if st.session_state.get('alternatives'):
+                fig, ax = plt.subplots(figsize=(10, 10))
+                ax.imshow(st.session_state.cost_map, cmap='hot', alpha=0.7)
+                for i, route in enumerate(st.session_state.alternatives):
+                    route_array = np.array(route['path'])
+                    ax.plot(route_array[:, 1], route_array[:, 0], linewidth=3 if i == 0 else 2,
+                            label='Best' if i == 0 else f'Alternative {i}')
+                ax.legend()
+                ax.axis('off')
+                fig.patch.set_facecolor('#0E1117')
+                st.pyplot(fig)
+                st.table(alternative_table(st.session_state.alternatives))
             
             st.markdown("</div>", unsafe_allow_html=True)
             
@@ -753,18 +1118,24 @@ elif st.session_state.page == 'results':
         
         col1, col2, col3, col4, col5 = st.columns(5)
         
-        path_length = len(st.session_state.path)
-        total_cost = sum(st.session_state.cost_map[p[0], p[1]] for p in st.session_state.path)
-        avg_cost = total_cost / path_length if path_length > 0 else 0
+        stats = path_statistics(st.session_state.cost_map, st.session_state.path,
+                                movement=st.session_state.get('movement', 'cell'))
+        avg_cost = stats['average_cost']
         
         col1.metric("🗺️ Image Size", f"{st.session_state.original_image.size[0]}×{st.session_state.original_image.size[1]}")
-        col2.metric("🛣️ Route Length", f"{path_length} px")
-        col3.metric("💰 Total Cost", f"{total_cost:,.0f}")
+        col2.metric("🛣️ Route Length", f"{stats['length']:,.0f} px")
+        col3.metric("💰 Total Cost", f"{stats['total_cost']:,.0f}")
         col4.metric("📊 Avg Cost", f"{avg_cost:.0f}")
-        col5.metric("✅ Efficiency", f"{(1000/avg_cost)*100:.1f}%")
+        col5.metric("✅ Efficiency", f"{(1000/avg_cost)*100:.1f}%" if avg_cost else "—")
         
         st.markdown("</div>", unsafe_allow_html=True)
         
+        if st.session_state.get('alternatives'):
+            st.markdown('<div class="card">', unsafe_allow_html=True)
+            st.markdown('<p class="section-header">🔀 Route Comparison</p>', unsafe_allow_html=True)
+            st.table(alternative_table(st.session_state.alternatives))
+            st.markdown("</div>", unsafe_allow_html=True)
+        
         st.markdown('<div class="card">', unsafe_allow_html=True)
         st.markdown('<p class="section-header">💾 Download Results</p>', unsafe_allow_html=True)
         
@@ -824,6 +1195,13 @@ elif st.session_state.page == 'results':
                 
                 # Route
                 zip_file.writestr('route.png', buf3.getvalue())
+                
+                # Route pixels as a run-length chain code (PixelPath.decode)
+                zip_file.writestr('route_chain.bin', st.session_state.path.encode())
+                
+                # Simplified route vertices
+                zip_file.writestr('route_vertices.csv', 'row,col\n' + ''.join(
+                    f"{row},{col}\n" for row, col in st.session_state.route_vertices))
             
             st.download_button(
                 "📦 All Files (ZIP)",
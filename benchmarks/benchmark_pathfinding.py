@@ -0,0 +1,491 @@
+"""
+Pathfinding Benchmark
+Times the A* engines on synthetic terrain cost maps
+
+Usage:
+    python benchmarks/benchmark_pathfinding.py --sizes 2048 4096 8192
+    python benchmarks/benchmark_pathfinding.py --sizes 1024 --heuristic alt
+    python benchmarks/benchmark_pathfinding.py --sizes 2048 --heuristic scaled --weight 1.5
+    python benchmarks/benchmark_pathfinding.py --suite cost-distance --queries 20
+    python benchmarks/benchmark_pathfinding.py --suite matrix --queries 8 --processes 4
+    python benchmarks/benchmark_pathfinding.py --suite hierarchical --queries 10
+    python benchmarks/benchmark_pathfinding.py --suite multiresolution --levels 3 --corridor 8
+    python benchmarks/benchmark_pathfinding.py --suite anytime --heuristic scaled --time-budget 5
+    python benchmarks/benchmark_pathfinding.py --suite incremental --sizes 1024 2048
+    python benchmarks/benchmark_pathfinding.py --suite any-angle --sizes 512 1024 --heuristic scaled
+    python benchmarks/benchmark_pathfinding.py --suite lattice --sizes 256 512 --heuristic scaled
+    python benchmarks/benchmark_pathfinding.py --suite alternatives --sizes 512 1024 --routes 5
+    python benchmarks/benchmark_pathfinding.py --suite waypoints --sizes 1024 --queries 4 --processes 4
+    python benchmarks/benchmark_pathfinding.py --suite cache --sizes 1024 2048 --queries 5
+    python benchmarks/benchmark_pathfinding.py --suite corridor --sizes 1024 2048 --corridor 64
+    python benchmarks/benchmark_pathfinding.py --suite sweep --sizes 1024 2048 4096
+    python benchmarks/benchmark_pathfinding.py --suite tiled --sizes 4096 8192 --processes 8
+    python benchmarks/benchmark_pathfinding.py --suite simplify --sizes 1024 2048
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from cost_map import CostMapGenerator
+from hierarchical import HierarchicalPathfinder
+from incremental import IncrementalPathfinder
+from pathfinding import (AStarPathfinder, alternative_routes, cost_distance, cost_map_fingerprint,
+                         cost_matrix, landmark_table, path_length, path_statistics, rasterize_path,
+                         simplify_path, trace_path)
+from route_cache import RouteCache
+from sweep import sweep_cost_distance, tiled_cost_distance
+
+
+def synthetic_cost_map(size: int, block: int = 32, seed: int = 0) -> np.ndarray:
+    """
+    Build a blocky land cover mask and convert it to a cost map
+    
+    Args:
+        size: Width and height of the map in pixels
+        block: Edge length of the terrain patches
+        seed: Random seed
+        
+    Returns:
+        Cost map as numpy array (size x size)
+    """
+    rng = np.random.default_rng(seed)
+    patches = -(-size // block)
+    mask = rng.integers(0, 5, (patches, patches), dtype=np.uint8)
+    mask = np.kron(mask, np.ones((block, block), dtype=np.uint8))[:size, :size]
+    return CostMapGenerator().generate_cost_map(mask)
+
+
+def corner_points(size: int) -> tuple:
+    """Start and end points near opposite corners of the map"""
+    margin = max(1, size // 20)
+    return (margin, margin), (size - 1 - margin, size - 1 - margin)
+
+
+def time_engine(engine: str, cost_map: np.ndarray, start: tuple, end: tuple,
+                heuristic: str = 'euclidean', weight: float = 1.0) -> tuple:
+    """Run one query and return (seconds, path cost, path length, expansions)"""
+    pathfinder = AStarPathfinder(engine=engine)
+    t0 = time.perf_counter()
+    path = pathfinder.find_path(cost_map, start, end, heuristic=heuristic, weight=weight)
+    elapsed = time.perf_counter() - t0
+    return elapsed, pathfinder.cost, len(path) if path else 0, pathfinder.expansions
+
+
+def random_points(size: int, count: int, seed: int = 1) -> list:
+    """Random (row, col) query points"""
+    rng = np.random.default_rng(seed)
+    return [(int(r), int(c)) for r, c in rng.integers(0, size, (count, 2))]
+
+
+def run_engines(args):
+    """Compare the A* engines on one corner-to-corner query per size"""
+    print(f"{'size':>6} {'engine':>13} {'seconds':>10} {'cost':>14} {'length':>8} {'expanded':>10}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = corner_points(size)
+        if args.heuristic == 'alt':
+            # Build the cached landmark table outside the timed queries
+            t0 = time.perf_counter()
+            landmark_table(cost_map)
+            print(f"{size:>6} {'landmarks':>13} {time.perf_counter() - t0:>10.2f}")
+        for engine in args.engines:
+            weighted = args.weight != 1.0
+            if (engine == 'dict' and (size > args.dict_max_size or args.heuristic != 'euclidean')
+                    or weighted and engine in ('dict', 'bidirectional')):
+                print(f"{size:>6} {engine:>13} {'skipped':>10}")
+                continue
+            elapsed, cost, length, expansions = time_engine(engine, cost_map, start, end,
+                                                            args.heuristic, args.weight)
+            print(f"{size:>6} {engine:>13} {elapsed:>10.2f} {cost:>14,.0f} {length:>8} "
+                  f"{expansions:>10,}")
+
+
+def run_cost_distance(args):
+    """Compare one cost-distance field plus traces against repeated find_path calls"""
+    print(f"{'size':>6} {'queries':>8} {'field+trace s':>14} {'find_path s':>12} {'speedup':>8}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        source = corner_points(size)[0]
+        targets = random_points(size, args.queries)
+        
+        t0 = time.perf_counter()
+        _, backlink = cost_distance(cost_map, source)
+        for target in targets:
+            trace_path(backlink, target)
+        field_time = time.perf_counter() - t0
+        
+        pathfinder = AStarPathfinder()
+        t0 = time.perf_counter()
+        for target in targets:
+            pathfinder.find_path(cost_map, source, target)
+        search_time = time.perf_counter() - t0
+        
+        print(f"{size:>6} {args.queries:>8} {field_time:>14.2f} {search_time:>12.2f} "
+              f"{search_time / field_time:>7.1f}x")
+
+
+def run_matrix(args):
+    """Compare cost_matrix against one find_path call per source/target pair"""
+    print(f"{'size':>6} {'pairs':>6} {'matrix s':>9} {'pairwise s':>11} {'speedup':>8}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        sources = random_points(size, args.queries, seed=1)
+        targets = random_points(size, args.queries, seed=2)
+        
+        t0 = time.perf_counter()
+        cost_matrix(cost_map, sources, targets, processes=args.processes)
+        matrix_time = time.perf_counter() - t0
+        
+        pathfinder = AStarPathfinder()
+        t0 = time.perf_counter()
+        for source in sources:
+            for target in targets:
+                pathfinder.find_path(cost_map, source, target)
+        pair_time = time.perf_counter() - t0
+        
+        pairs = len(sources) * len(targets)
+        print(f"{size:>6} {pairs:>6} {matrix_time:>9.2f} {pair_time:>11.2f} "
+              f"{pair_time / matrix_time:>7.1f}x")
+
+
+def run_hierarchical(args):
+    """Compare HPA* queries (after a one-off abstraction build) with exact A*"""
+    print(f"{'size':>6} {'build s':>8} {'hpa* s/q':>9} {'a* s/q':>8} {'cost ratio':>11}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        pairs = list(zip(random_points(size, args.queries, seed=1),
+                         random_points(size, args.queries, seed=2)))
+        hierarchical = HierarchicalPathfinder(processes=args.processes)
+        
+        t0 = time.perf_counter()
+        hierarchical.build_abstraction(cost_map)
+        build_time = time.perf_counter() - t0
+        
+        pathfinder = AStarPathfinder()
+        hpa_time = astar_time = 0.0
+        ratios = []
+        for start, end in pairs:
+            t0 = time.perf_counter()
+            hierarchical.find_path(cost_map, start, end)
+            hpa_time += time.perf_counter() - t0
+            
+            t0 = time.perf_counter()
+            pathfinder.find_path(cost_map, start, end)
+            astar_time += time.perf_counter() - t0
+            if pathfinder.cost:
+                ratios.append(hierarchical.cost / pathfinder.cost)
+        
+        ratio = np.mean(ratios) if ratios else 1.0
+        print(f"{size:>6} {build_time:>8.2f} {hpa_time / len(pairs):>9.3f} "
+              f"{astar_time / len(pairs):>8.3f} {ratio:>11.3f}")
+
+
+def run_multiresolution(args):
+    """Coarse-to-fine routing against the exact search on a corner-to-corner query"""
+    print(f"{'size':>6} {'c2f s':>7} {'exact s':>8} {'deviation':>10} {'overlap':>8} {'searched':>9}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = corner_points(size)
+        pathfinder = AStarPathfinder()
+        
+        t0 = time.perf_counter()
+        pathfinder.find_path_multiresolution(cost_map, start, end, levels=args.levels,
+                                             corridor_width=args.corridor)
+        c2f_time = time.perf_counter() - t0
+        c2f_path = pathfinder.path
+        
+        exact = AStarPathfinder()
+        t0 = time.perf_counter()
+        exact_path = exact.find_path(cost_map, start, end)
+        exact_time = time.perf_counter() - t0
+        
+        report = pathfinder.multiresolution_report
+        deviation = pathfinder.cost / exact.cost - 1.0
+        overlap = len(set(c2f_path) & set(exact_path)) / len(exact_path)
+        print(f"{size:>6} {c2f_time:>7.2f} {exact_time:>8.2f} {deviation:>9.2%} "
+              f"{overlap:>7.0%} {report['searched_fraction']:>8.1%}")
+
+
+def run_anytime(args):
+    """Successive ARA* routes on a corner-to-corner query"""
+    print(f"{'size':>6} {'seconds':>8} {'cost':>14} {'bound':>6}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = corner_points(size)
+        t0 = time.perf_counter()
+        for _, cost, bound in AStarPathfinder().find_path_anytime(
+                cost_map, start, end, heuristic=args.heuristic, time_budget=args.time_budget):
+            print(f"{size:>6} {time.perf_counter() - t0:>8.2f} {cost:>14,.0f} {bound:>6.2f}")
+
+
+def run_incremental(args):
+    """D* Lite repairs after local and class-wide cost changes against planning from scratch"""
+    print(f"{'size':>6} {'change':>8} {'changed':>9} {'repair s':>9} {'scratch s':>10} {'replanned':>10}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size).astype(np.float64)
+        start, end = corner_points(size)
+        pathfinder = IncrementalPathfinder()
+        pathfinder.plan(cost_map, start, end)
+        
+        block = slice(size // 2 - size // 64, size // 2 + size // 64)
+        local = np.zeros(cost_map.shape, dtype=bool)
+        local[block, block] = True
+        classes = np.unique(cost_map)
+        for name, changed, factor in (('local', local, 3),
+                                      ('class', cost_map == classes[1], 3),
+                                      ('cheaper', cost_map == classes[0], 1 / 3)):
+            cost_map = np.where(changed, cost_map * factor, cost_map)
+            t0 = time.perf_counter()
+            pathfinder.update_costs(cost_map)
+            repair_time = time.perf_counter() - t0
+            
+            t0 = time.perf_counter()
+            AStarPathfinder().find_path(cost_map, start, end, heuristic='scaled')
+            scratch_time = time.perf_counter() - t0
+            print(f"{size:>6} {name:>8} {np.count_nonzero(changed):>9,} {repair_time:>9.2f} "
+                  f"{scratch_time:>10.2f} {str(pathfinder.last_update['replanned']):>10}")
+
+
+def run_any_angle(args):
+    """Theta* against the 8-connected grid route on a corner-to-corner query"""
+    print(f"{'size':>6} {'mode':>9} {'seconds':>8} {'cost':>14} {'length':>9} {'vertices':>9}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = corner_points(size)
+        pathfinder = AStarPathfinder()
+        t0 = time.perf_counter()
+        vertices = pathfinder.find_path_any_angle(cost_map, start, end, heuristic=args.heuristic)
+        elapsed = time.perf_counter() - t0
+        print(f"{size:>6} {'any-angle':>9} {elapsed:>8.2f} {pathfinder.cost:>14,.0f} "
+              f"{path_length(vertices):>9,.0f} {len(vertices):>9,}")
+        
+        t0 = time.perf_counter()
+        path = pathfinder.find_path(cost_map, start, end, heuristic=args.heuristic)
+        elapsed = time.perf_counter() - t0
+        print(f"{size:>6} {'grid':>9} {elapsed:>8.2f} {pathfinder.cost:>14,.0f} "
+              f"{path_length(path):>9,.0f} {len(path):>9,}")
+
+
+def run_lattice(args):
+    """Heading-lattice routes against the unconstrained grid route on a corner-to-corner query"""
+    print(f"{'size':>6} {'headings':>9} {'seconds':>8} {'cost':>14} {'turns':>6} {'expanded':>11}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = corner_points(size)
+        elapsed, cost, _, expansions = time_engine('array', cost_map, start, end, args.heuristic)
+        print(f"{size:>6} {'grid':>9} {elapsed:>8.2f} {cost:>14,.0f} {'':>6} {expansions:>11,}")
+        for headings in (8, 16):
+            pathfinder = AStarPathfinder(engine='lattice', headings=headings, max_turn=1,
+                                         turn_penalty=args.turn_penalty)
+            t0 = time.perf_counter()
+            pathfinder.find_path(cost_map, start, end, heuristic=args.heuristic)
+            elapsed = time.perf_counter() - t0
+            print(f"{size:>6} {headings:>9} {elapsed:>8.2f} {pathfinder.cost:>14,.0f} "
+                  f"{pathfinder.lattice_report['turns']:>6} {pathfinder.expansions:>11,}")
+
+
+def run_alternatives(args):
+    """K alternative routes from two cost-distance fields against one find_path call"""
+    print(f"{'size':>6} {'routes':>7} {'seconds':>8} {'find_path s':>12} {'max stretch':>12} {'max overlap':>12}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = corner_points(size)
+        t0 = time.perf_counter()
+        routes = alternative_routes(cost_map, start, end, k=args.routes)
+        elapsed = time.perf_counter() - t0
+        
+        t0 = time.perf_counter()
+        AStarPathfinder().find_path(cost_map, start, end)
+        single_time = time.perf_counter() - t0
+        print(f"{size:>6} {len(routes):>7} {elapsed:>8.2f} {single_time:>12.2f} "
+              f"{max(r['stretch'] for r in routes):>12.3f} {max(r['overlap'] for r in routes[1:] or routes):>12.0%}")
+
+
+def run_waypoints(args):
+    """Via-point routing: legs solved in one process vs a process pool, and order optimization"""
+    print(f"{'size':>6} {'via':>4} {'processes':>10} {'optimize':>9} {'seconds':>8} {'cost':>14}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = corner_points(size)
+        waypoints = [start, *random_points(size, args.queries), end]
+        for processes, optimize in ((1, False), (args.processes, False), (args.processes, True)):
+            pathfinder = AStarPathfinder()
+            t0 = time.perf_counter()
+            pathfinder.find_path_via(cost_map, waypoints, heuristic=args.heuristic,
+                                     optimize_order=optimize, processes=processes)
+            elapsed = time.perf_counter() - t0
+            print(f"{size:>6} {args.queries:>4} {processes:>10} {str(optimize):>9} {elapsed:>8.2f} "
+                  f"{pathfinder.cost or float('inf'):>14,.0f}")
+
+
+def run_cache(args):
+    """Route cache: search on a miss, then memory and disk hits for the same queries"""
+    print(f"{'size':>6} {'queries':>8} {'miss s':>8} {'hit s':>8} {'disk hit s':>11} {'fingerprint s':>14}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        points = random_points(size, 2 * args.queries)
+        queries = list(zip(points[::2], points[1::2]))
+        
+        def run_queries(cache):
+            t0 = time.perf_counter()
+            for start, end in queries:
+                cache.find_path(AStarPathfinder(), cost_map, start, end, heuristic=args.heuristic)
+            return time.perf_counter() - t0
+        
+        with tempfile.TemporaryDirectory() as disk_dir:
+            cache = RouteCache(disk_dir=disk_dir)
+            miss_time = run_queries(cache)
+            hit_time = run_queries(cache)
+            disk_time = run_queries(RouteCache(disk_dir=disk_dir))
+        
+        t0 = time.perf_counter()
+        cost_map_fingerprint(cost_map)
+        fingerprint_time = time.perf_counter() - t0
+        print(f"{size:>6} {len(queries):>8} {miss_time:>8.2f} {hit_time:>8.4f} {disk_time:>11.4f} "
+              f"{fingerprint_time:>14.4f}")
+
+
+def run_corridor(args):
+    """Routing inside a planning corridor polygon against the unrestricted route"""
+    print(f"{'size':>6} {'mode':>10} {'seconds':>8} {'cost':>14} {'expanded':>10}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = (size // 2, size // 20), (size // 2, size - size // 20)
+        half = args.corridor
+        corridor = [(size // 2 - half, 0), (size // 2 - half, size - 1),
+                    (size // 2 + half, size - 1), (size // 2 + half, 0)]
+        for mode, options in (('full', {}), ('corridor', {'corridor': corridor})):
+            pathfinder = AStarPathfinder()
+            t0 = time.perf_counter()
+            pathfinder.find_path(cost_map, start, end, heuristic=args.heuristic, **options)
+            elapsed = time.perf_counter() - t0
+            print(f"{size:>6} {mode:>10} {elapsed:>8.2f} {pathfinder.cost:>14,.0f} {pathfinder.expansions:>10,}")
+
+
+def run_sweep(args):
+    """Compare the sweep cost-distance engine against the heap Dijkstra field"""
+    print(f"{'size':>6} {'dijkstra s':>11} {'sweep s':>8} {'iterations':>11} {'max error':>10} {'speedup':>8}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        source = corner_points(size)[0]
+        
+        t0 = time.perf_counter()
+        exact, _ = cost_distance(cost_map, source)
+        dijkstra_time = time.perf_counter() - t0
+        
+        distance, _, report = sweep_cost_distance(cost_map, source)
+        error = np.abs(distance - exact).max()
+        print(f"{size:>6} {dijkstra_time:>11.2f} {report['seconds']:>8.2f} {report['iterations']:>11} "
+              f"{error:>10.2g} {dijkstra_time / report['seconds']:>7.1f}x")
+
+
+def run_tiled(args):
+    """Time the tiled cost-distance field with 1, 2, 4, ... worker processes"""
+    counts = [1]
+    while counts[-1] * 2 <= args.processes:
+        counts.append(counts[-1] * 2)
+    print(f"{'size':>6} {'processes':>10} {'seconds':>8} {'rounds':>7} {'tile solves':>12} {'speedup':>8}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        source = corner_points(size)[0]
+        baseline = None
+        for processes in counts:
+            _, _, report = tiled_cost_distance(cost_map, source, tile_size=args.tile_size,
+                                               processes=processes)
+            baseline = baseline or report['seconds']
+            print(f"{size:>6} {processes:>10} {report['seconds']:>8.2f} {report['rounds']:>7} "
+                  f"{report['tile_solves']:>12} {baseline / report['seconds']:>7.1f}x")
+
+
+def run_simplify(args):
+    """Simplify corner-to-corner routes and compare vertex counts and costs"""
+    print(f"{'size':>6} {'movement':>9} {'pixels':>8} {'vertices':>9} {'seconds':>8} {'cost':>14} {'simplified':>14}")
+    for size in args.sizes:
+        cost_map = synthetic_cost_map(size)
+        start, end = corner_points(size)
+        for movement in ('cell', 'metric'):
+            path = AStarPathfinder(movement=movement).find_path(cost_map, start, end)
+            t0 = time.perf_counter()
+            vertices = simplify_path(cost_map, path, movement=movement)
+            elapsed = time.perf_counter() - t0
+            cost = path_statistics(cost_map, path, movement=movement)['total_cost']
+            simplified = path_statistics(cost_map, rasterize_path(vertices), movement=movement)['total_cost']
+            print(f"{size:>6} {movement:>9} {len(path):>8} {len(vertices):>9} {elapsed:>8.3f} "
+                  f"{cost:>14,.0f} {simplified:>14,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--suite', choices=['engines', 'cost-distance', 'matrix', 'hierarchical',
+                                            'multiresolution', 'anytime', 'incremental',
+                                            'any-angle', 'lattice', 'alternatives', 'waypoints',
+                                            'cache', 'corridor', 'sweep', 'tiled', 'simplify'], default='engines')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2048, 4096, 8192])
+    parser.add_argument('--engines', nargs='+', default=['array', 'bucket', 'bidirectional', 'dict'])
+    parser.add_argument('--heuristic', choices=['euclidean', 'scaled', 'alt'], default='euclidean',
+                        help="Heuristic for the engines suite")
+    parser.add_argument('--weight', type=float, default=1.0,
+                        help="Heuristic weight for the engines suite")
+    parser.add_argument('--dict-max-size', type=int, default=512,
+                        help="Skip the quadratic dict engine above this size")
+    parser.add_argument('--queries', type=int, default=20,
+                        help="Number of query points for the multi-query suites")
+    parser.add_argument('--processes', type=int, default=1,
+                        help="Worker processes for the matrix, hierarchical, waypoints and tiled suites")
+    parser.add_argument('--levels', type=int, default=3,
+                        help="Pyramid depth for the multiresolution suite")
+    parser.add_argument('--corridor', type=int, default=8,
+                        help="Corridor half-width for the multiresolution and corridor suites")
+    parser.add_argument('--time-budget', type=float, default=None,
+                        help="Seconds allowed for the anytime suite")
+    parser.add_argument('--turn-penalty', type=float, default=100.0,
+                        help="Cost per heading step turned for the lattice suite")
+    parser.add_argument('--routes', type=int, default=3,
+                        help="Number of routes for the alternatives suite")
+    parser.add_argument('--tile-size', type=int, default=512,
+                        help="Tile edge length for the tiled suite")
+    args = parser.parse_args()
+    
+    if args.suite == 'engines':
+        run_engines(args)
+    elif args.suite == 'cost-distance':
+        run_cost_distance(args)
+    elif args.suite == 'matrix':
+        run_matrix(args)
+    elif args.suite == 'hierarchical':
+        run_hierarchical(args)
+    elif args.suite == 'multiresolution':
+        run_multiresolution(args)
+    elif args.suite == 'anytime':
+        run_anytime(args)
+    elif args.suite == 'incremental':
+        run_incremental(args)
+    elif args.suite == 'any-angle':
+        run_any_angle(args)
+    elif args.suite == 'lattice':
+        run_lattice(args)
+    elif args.suite == 'alternatives':
+        run_alternatives(args)
+    elif args.suite == 'waypoints':
+        run_waypoints(args)
+    elif args.suite == 'cache':
+        run_cache(args)
+    elif args.suite == 'corridor':
+        run_corridor(args)
+    elif args.suite == 'sweep':
+        run_sweep(args)
+    elif args.suite == 'tiled':
+        run_tiled(args)
+    elif args.suite == 'simplify':
+        run_simplify(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -27,22 +27,67 @@ class CostMapGenerator:
         else:
             self.terrain_costs = terrain_costs
     
-    def generate_cost_map(self, segmentation_mask):
+    def generate_cost_map(self, segmentation_mask, dtype=np.float32, out=None):
         """
         Generate cost map from segmentation
         
+        The costs are looked up in one pass through a table indexed by
+        class ID (lut[mask]). Classes without a cost get 0.
+        
         Args:
-            segmentation_mask: Land cover segmentation mask
+            segmentation_mask: Land cover segmentation mask of class IDs
+            dtype: Output dtype, e.g. np.uint16 for integer costs up to 65535
+                (ignored when out is given)
+            out: Optional preallocated array of the mask's shape to fill
             
         Returns:
             Cost map as numpy array (same size as mask)
         """
-        cost_map = np.zeros_like(segmentation_mask, dtype=np.float32)
+        mask = np.asarray(segmentation_mask)
+        if out is None:
+            out = np.empty(mask.shape, dtype=dtype)
+        elif out.shape != mask.shape:
+            raise ValueError("Output buffer must have the shape of the mask")
         
-        for class_id, cost in self.terrain_costs.items():
-            cost_map[segmentation_mask == class_id] = cost
+        if not np.issubdtype(mask.dtype, np.integer) and mask.dtype != bool:
+            # Non-integer masks fall back to one comparison per class
+            out[:] = 0
+            for class_id, cost in self.terrain_costs.items():
+                out[mask == class_id] = cost
+            return out
+        
+        size = 256
+        if mask.dtype not in (np.uint8, bool) and mask.size:
+            if mask.min() < 0:
+                raise ValueError("Class IDs must not be negative")
+            size = max(size, int(mask.max()) + 1)
+        lut = self.cost_lut(out.dtype, size)
+        # Every ID is in range, so 'clip' skips the bounds-checking buffer of 'raise'
+        return np.take(lut, mask, out=out, mode='clip')
+    
+    def cost_lut(self, dtype=np.float32, size: int = 256) -> np.ndarray:
+        """
+        Lookup table from class ID to cost
         
-        return cost_map
+        Args:
+            dtype: Table dtype
+            size: Number of class IDs covered
+            
+        Returns:
+            Array of the given size with the cost of each class ID (0 for
+            classes without a cost)
+        """
+        dtype = np.dtype(dtype)
+        lut = np.zeros(size, dtype=dtype)
+        for class_id, cost in self.terrain_costs.items():
+            if not 0 <= class_id < size:
+                continue
+            if np.issubdtype(dtype, np.integer):
+                limits = np.iinfo(dtype)
+                if cost != int(cost) or not limits.min <= cost <= limits.max:
+                    raise ValueError(f"Cost {cost} does not fit {dtype.name}")
+            lut[class_id] = cost
+        return lut
     
     def update_costs(self, new_costs):
         """
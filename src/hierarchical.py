@@ -0,0 +1,380 @@
+"""
+Hierarchical Pathfinding Module
+HPA*-style cluster abstraction for routing on large cost maps
+"""
+
+import numpy as np
+import heapq
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple, Optional
+
+from pathfinding import AStarPathfinder, cost_distance, cost_map_fingerprint, cost_matrix
+
+# Abstractions kept in memory, shared by all HierarchicalPathfinder instances
+MAX_CACHED_ABSTRACTIONS = 4
+_abstraction_cache = OrderedDict()
+
+
+def _cluster_costs(task: tuple) -> np.ndarray:
+    """Entrance-to-entrance cost matrix inside one cluster"""
+    sub_map, local_points = task
+    return cost_matrix(sub_map, local_points, local_points)
+
+
+class HierarchicalPathfinder:
+    """
+    Hierarchical (HPA*) pathfinder
+    
+    The cost map is partitioned into square clusters. Each border between
+    two clusters gets one entrance per entrance_width pixels, placed at the
+    cheapest crossing. The costs between entrances of the same cluster are
+    precomputed once per cost map. A query searches this small abstract
+    graph and then runs pixel-level A* only inside the corridor of clusters
+    the abstract route passes through. Routes stay within that corridor, so
+    they can be more expensive than the exact A* route.
+    """
+    
+    def __init__(self, cluster_size=64, entrance_width=16, refine='corridor', processes=1):
+        """
+        Initialize the pathfinder
+        
+        Args:
+            cluster_size: Edge length of the square clusters in pixels
+            entrance_width: Maximum border length served by one entrance
+            refine: Refinement of the abstract route ('corridor' runs one A*
+                over all clusters the route visits, 'legs' runs A* for each
+                abstract edge inside its own cluster and needs the least
+                memory)
+            processes: Worker processes used to precompute cluster costs
+                (1 runs in this process, None uses every core)
+        """
+        self.cluster_size = cluster_size
+        self.entrance_width = entrance_width
+        self.refine = refine
+        self.processes = processes
+        self.path = None
+        self.cost = None
+    
+    def build_abstraction(self, cost_map: np.ndarray) -> dict:
+        """
+        Get the abstract graph for a cost map, building it on first use
+        
+        Abstractions are cached by cost map fingerprint and cluster settings,
+        so repeated queries on the same cost map reuse them.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            
+        Returns:
+            Dictionary describing the abstract graph
+        """
+        key = (cost_map_fingerprint(cost_map), self.cluster_size, self.entrance_width)
+        abstraction = _abstraction_cache.get(key)
+        if abstraction is not None:
+            _abstraction_cache.move_to_end(key)
+            return abstraction
+        
+        abstraction = self._build(cost_map)
+        _abstraction_cache[key] = abstraction
+        while len(_abstraction_cache) > MAX_CACHED_ABSTRACTIONS:
+            _abstraction_cache.popitem(last=False)
+        return abstraction
+    
+    def _build(self, cost_map: np.ndarray) -> dict:
+        """
+        Place entrances and precompute intra-cluster costs
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            
+        Returns:
+            Dictionary with entrance positions, inter-cluster links and one
+            entrance-to-entrance cost matrix per cluster
+        """
+        rows, cols = cost_map.shape
+        size = self.cluster_size
+        
+        node_ids = {}
+        positions = []
+        links = []
+        
+        def add_node(row, col):
+            node = node_ids.get((row, col))
+            if node is None:
+                node = len(positions)
+                node_ids[(row, col)] = node
+                positions.append((row, col))
+                links.append([])
+            return node
+        
+        def add_entrance(a, b):
+            u = add_node(*a)
+            v = add_node(*b)
+            # Each step costs the pixel being entered
+            links[u].append((v, float(cost_map[b])))
+            links[v].append((u, float(cost_map[a])))
+        
+        # Entrances across vertical borders between horizontally adjacent clusters
+        for x in range(size, cols, size):
+            for r0, r1 in self._segments(rows):
+                crossing = cost_map[r0:r1, x - 1] + cost_map[r0:r1, x]
+                if not np.isfinite(crossing).any():
+                    continue
+                r = r0 + int(np.argmin(crossing))
+                add_entrance((r, x - 1), (r, x))
+        
+        # Entrances across horizontal borders between vertically adjacent clusters
+        for y in range(size, rows, size):
+            for c0, c1 in self._segments(cols):
+                crossing = cost_map[y - 1, c0:c1] + cost_map[y, c0:c1]
+                if not np.isfinite(crossing).any():
+                    continue
+                c = c0 + int(np.argmin(crossing))
+                add_entrance((y - 1, c), (y, c))
+        
+        positions = np.array(positions, dtype=np.int64).reshape(-1, 2)
+        clusters = {}
+        for node, (row, col) in enumerate(positions.tolist()):
+            clusters.setdefault((row // size, col // size), []).append(node)
+        
+        keys = list(clusters)
+        tasks = []
+        for key in keys:
+            r0, r1, c0, c1 = self._window(key, rows, cols)
+            local = [(int(positions[node, 0]) - r0, int(positions[node, 1]) - c0)
+                     for node in clusters[key]]
+            tasks.append((cost_map[r0:r1, c0:c1], local))
+        
+        if self.processes == 1:
+            matrices = [_cluster_costs(task) for task in tasks]
+        else:
+            with ProcessPoolExecutor(max_workers=self.processes) as pool:
+                matrices = list(pool.map(_cluster_costs, tasks, chunksize=16))
+        
+        return {
+            'shape': (rows, cols),
+            'positions': positions,
+            'links': links,
+            'cluster_nodes': {key: np.array(clusters[key], dtype=np.int64) for key in keys},
+            'cluster_costs': dict(zip(keys, matrices)),
+        }
+    
+    def _segments(self, length: int) -> List[Tuple[int, int]]:
+        """Split a border of the given length into entrance segments that never span two clusters"""
+        segments = []
+        for cluster_start in range(0, length, self.cluster_size):
+            cluster_end = min(cluster_start + self.cluster_size, length)
+            for s0 in range(cluster_start, cluster_end, self.entrance_width):
+                segments.append((s0, min(s0 + self.entrance_width, cluster_end)))
+        return segments
+    
+    def _window(self, cluster: Tuple[int, int], rows: int, cols: int) -> Tuple[int, int, int, int]:
+        """Pixel bounds (r0, r1, c0, c1) of a cluster"""
+        size = self.cluster_size
+        r0 = cluster[0] * size
+        c0 = cluster[1] * size
+        return r0, min(r0 + size, rows), c0, min(c0 + size, cols)
+    
+    def _cluster_of(self, point: Tuple[int, int]) -> Tuple[int, int]:
+        """Cluster containing a pixel"""
+        return point[0] // self.cluster_size, point[1] // self.cluster_size
+    
+    def find_path(self, cost_map: np.ndarray, start: Tuple[int, int],
+                  end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+        Find a route through the cluster abstraction
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        rows, cols = cost_map.shape
+        
+        if not (0 <= start[0] < rows and 0 <= start[1] < cols):
+            raise ValueError("Start point out of bounds")
+        if not (0 <= end[0] < rows and 0 <= end[1] < cols):
+            raise ValueError("End point out of bounds")
+        if self.refine not in ('corridor', 'legs'):
+            raise ValueError(f"Unknown refine mode: {self.refine}")
+        
+        abstraction = self.build_abstraction(cost_map)
+        positions = abstraction['positions']
+        cluster_nodes = abstraction['cluster_nodes']
+        cluster_costs = abstraction['cluster_costs']
+        links = abstraction['links']
+        
+        start_cluster = self._cluster_of(start)
+        end_cluster = self._cluster_of(end)
+        same_cluster = start_cluster == end_cluster
+        
+        # Connect the start to the entrances of its cluster
+        r0, r1, c0, c1 = self._window(start_cluster, rows, cols)
+        start_nodes = cluster_nodes.get(start_cluster, np.empty(0, dtype=np.int64))
+        targets = [(int(positions[v, 0]) - r0, int(positions[v, 1]) - c0) for v in start_nodes]
+        if same_cluster:
+            targets.append((end[0] - r0, end[1] - c0))
+        start_links = []
+        best_cost = np.inf
+        if targets:
+            distance, _ = cost_distance(cost_map[r0:r1, c0:c1], (start[0] - r0, start[1] - c0),
+                                        targets=targets)
+            start_links = [(int(v), float(distance[p])) for v, p in zip(start_nodes, targets)]
+            if same_cluster:
+                best_cost = float(distance[targets[-1]])
+        
+        # Connect the entrances of the end cluster to the end. The search runs
+        # from the end; a route walked backwards differs only by its end pixels.
+        r0, r1, c0, c1 = self._window(end_cluster, rows, cols)
+        end_nodes = cluster_nodes.get(end_cluster, np.empty(0, dtype=np.int64))
+        targets = [(int(positions[v, 0]) - r0, int(positions[v, 1]) - c0) for v in end_nodes]
+        end_links = {}
+        if targets:
+            distance, _ = cost_distance(cost_map[r0:r1, c0:c1], (end[0] - r0, end[1] - c0),
+                                        targets=targets)
+            end_cost = float(cost_map[end])
+            for v, p in zip(end_nodes, targets):
+                end_links[int(v)] = float(distance[p]) + end_cost - float(cost_map[tuple(positions[v])])
+        
+        # Dijkstra over the abstract graph
+        g_score = {}
+        came_from = {}
+        open_set = []
+        for v, d in start_links:
+            if d < g_score.get(v, np.inf):
+                g_score[v] = d
+                came_from[v] = None
+                heapq.heappush(open_set, (d, v))
+        
+        last = None
+        while open_set:
+            d, u = heapq.heappop(open_set)
+            if d > g_score[u]:
+                continue
+            if d >= best_cost:
+                break
+            
+            if u in end_links and d + end_links[u] < best_cost:
+                best_cost = d + end_links[u]
+                last = u
+            
+            row, col = positions[u]
+            cluster = self._cluster_of((int(row), int(col)))
+            members = cluster_nodes[cluster]
+            slot = int(np.searchsorted(members, u))
+            neighbors = list(zip(members.tolist(), cluster_costs[cluster][slot].tolist()))
+            for v, w in neighbors + links[u]:
+                nd = d + w
+                if nd < g_score.get(v, np.inf):
+                    g_score[v] = nd
+                    came_from[v] = u
+                    heapq.heappush(open_set, (nd, v))
+        
+        if not np.isfinite(best_cost):
+            return None
+        
+        # Waypoints of the abstract route
+        waypoints = [end]
+        node = last
+        while node is not None:
+            waypoints.append((int(positions[node, 0]), int(positions[node, 1])))
+            node = came_from[node]
+        waypoints.append(start)
+        waypoints.reverse()
+        
+        if self.refine == 'corridor':
+            path = self._refine_corridor(cost_map, waypoints)
+        else:
+            path = self._refine_legs(cost_map, waypoints)
+        if path is None:
+            return None
+        
+        self.path = path
+        points = np.array(path[1:], dtype=np.int64).reshape(-1, 2)
+        self.cost = float(cost_map[points[:, 0], points[:, 1]].sum())
+        return path
+    
+    def _refine_corridor(self, cost_map: np.ndarray,
+                         waypoints: List[Tuple[int, int]]) -> Optional[List[Tuple[int, int]]]:
+        """
+        Pixel-level A* restricted to the clusters the abstract route visits
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            waypoints: Start, entrances and end of the abstract route
+            
+        Returns:
+            List of coordinates from start to end
+        """
+        rows, cols = cost_map.shape
+        clusters = {self._cluster_of(p) for p in waypoints}
+        windows = [self._window(cluster, rows, cols) for cluster in clusters]
+        r0 = min(w[0] for w in windows)
+        r1 = max(w[1] for w in windows)
+        c0 = min(w[2] for w in windows)
+        c1 = max(w[3] for w in windows)
+        
+        allowed = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+        for wr0, wr1, wc0, wc1 in windows:
+            allowed[wr0 - r0:wr1 - r0, wc0 - c0:wc1 - c0] = True
+        
+        start, end = waypoints[0], waypoints[-1]
+        path = AStarPathfinder().find_path(cost_map[r0:r1, c0:c1],
+                                           (start[0] - r0, start[1] - c0),
+                                           (end[0] - r0, end[1] - c0), allowed=allowed)
+        if path is None:
+            return None
+        return [(row + r0, col + c0) for row, col in path]
+    
+    def _refine_legs(self, cost_map: np.ndarray,
+                     waypoints: List[Tuple[int, int]]) -> Optional[List[Tuple[int, int]]]:
+        """
+        Pixel-level route built one abstract edge at a time
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            waypoints: Start, entrances and end of the abstract route
+            
+        Returns:
+            List of coordinates from start to end
+        """
+        path = [waypoints[0]]
+        for a, b in zip(waypoints, waypoints[1:]):
+            leg = self._refine_leg(cost_map, a, b)
+            if leg is None:
+                return None
+            path.extend(leg[1:])
+        return path
+    
+    def _refine_leg(self, cost_map: np.ndarray, a: Tuple[int, int],
+                    b: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+        Pixel-level route for one abstract edge
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            a: First point
+            b: Second point, in the same cluster as a or adjacent to it
+            
+        Returns:
+            List of points from a to b
+        """
+        if a == b:
+            return [a]
+        
+        cluster = self._cluster_of(a)
+        if cluster != self._cluster_of(b):
+            # Inter-cluster link between the two sides of an entrance
+            return [a, b]
+        
+        rows, cols = cost_map.shape
+        r0, r1, c0, c1 = self._window(cluster, rows, cols)
+        leg = AStarPathfinder().find_path(cost_map[r0:r1, c0:c1],
+                                          (a[0] - r0, a[1] - c0), (b[0] - r0, b[1] - c0))
+        if leg is None:
+            return None
+        return [(row + r0, col + c0) for row, col in leg]
@@ -0,0 +1,413 @@
+"""
+Incremental Pathfinding Module
+D* Lite replanning when terrain costs change between queries
+"""
+
+import numpy as np
+import heapq
+from typing import List, Tuple, Optional
+
+from pathfinding import DIRECTIONS
+
+
+def _neighbor_min(values: np.ndarray) -> np.ndarray:
+    """Smallest value among the 8 neighbors of every pixel (inf off the map)"""
+    rows, cols = values.shape
+    padded = np.full((rows + 2, cols + 2), np.inf)
+    padded[1:-1, 1:-1] = values
+    result = np.full((rows, cols), np.inf)
+    for dr, dc in DIRECTIONS:
+        np.minimum(result, padded[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc], out=result)
+    return result
+
+
+class IncrementalPathfinder:
+    """
+    D* Lite pathfinder that keeps its search state between calls
+    
+    The search runs backwards from the end point, so g-scores are costs to
+    the end. When terrain costs change, only the pixels whose route to the
+    end is affected are searched again, instead of planning from scratch.
+    The start point may also move along the route (e.g. while following it).
+    Routes and costs match AStarPathfinder.find_path.
+    
+    Repairs touching a large part of the searched area cost more than a new
+    search, so those fall back to planning from scratch.
+    """
+    
+    def __init__(self, max_changed_fraction=0.5):
+        """
+        Initialize the pathfinder
+        
+        Args:
+            max_changed_fraction: Plan from scratch when the route of more
+                than this fraction of the searched pixels enters a pixel whose
+                cost increased
+        """
+        self.max_changed_fraction = max_changed_fraction
+        self.path = None
+        self.cost = None
+        self.expansions = None
+        self.last_update = None
+        self._state = None
+    
+    def plan(self, cost_map: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+             allowed: Optional[np.ndarray] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        Plan a route from scratch and keep the search state for later updates
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use;
+                it stays in effect for later updates
+        
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        rows, cols = cost_map.shape
+        if not (0 <= start[0] < rows and 0 <= start[1] < cols):
+            raise ValueError("Start point out of bounds")
+        if not (0 <= end[0] < rows and 0 <= end[1] < cols):
+            raise ValueError("End point out of bounds")
+        if allowed is not None and allowed.shape != cost_map.shape:
+            raise ValueError("Allowed mask must have the same shape as the cost map")
+        
+        n = rows * cols
+        blocked = np.zeros(n, dtype=bool) if allowed is None else ~np.asarray(allowed, dtype=bool).reshape(n)
+        cost = self._effective_cost(cost_map, blocked)
+        finite = cost[~blocked]
+        
+        g_score = np.full(n, np.inf)
+        rhs = np.full(n, np.inf)
+        target = end[0] * cols + end[1]
+        rhs[target] = 0.0
+        self._state = state = {
+            'shape': (rows, cols),
+            'blocked': blocked,
+            'cost': cost,
+            'g': g_score,
+            'rhs': rhs,
+            'start': start,
+            'end': end,
+            'target': target,
+            # Steps cost at least the cheapest pixel, so scale * Chebyshev
+            # distance is a consistent heuristic
+            'scale': max(float(finite.min()), 0.0) if finite.size else 0.0,
+            'km': 0.0,
+            'open': [],
+            'plan_expansions': 0,
+        }
+        
+        if blocked[start[0] * cols + start[1]] or blocked[target]:
+            self.path = None
+            self.expansions = 0
+            self.last_update = {'changed': n, 'expansions': 0, 'replanned': True}
+            return None
+        
+        self._push(target)
+        expansions = self._compute_shortest_path()
+        state['plan_expansions'] = expansions
+        self.last_update = {'changed': n, 'expansions': expansions, 'replanned': True}
+        return self._extract_path()
+    
+    def update_costs(self, cost_map: np.ndarray) -> Optional[List[Tuple[int, int]]]:
+        """
+        Repair the previous route after terrain costs changed
+        
+        The new cost map is compared with the previous one. Pixels whose
+        route to the end became more expensive are searched again; cheaper
+        pixels only lower costs, and the heuristic follows the new cheapest
+        pixel.
+        
+        Args:
+            cost_map: New 2D array of terrain costs (same shape as before)
+        
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        state = self._require_state()
+        rows, cols = state['shape']
+        if cost_map.shape != (rows, cols):
+            raise ValueError("Cost map shape changed; call plan() instead")
+        
+        blocked = state['blocked']
+        new_cost = self._effective_cost(cost_map, blocked)
+        changed = np.flatnonzero(new_cost != state['cost'])
+        
+        if len(changed) == 0:
+            self.last_update = {'changed': 0, 'expansions': 0, 'replanned': False}
+            return self._extract_path()
+        
+        # Costs to the end only grow for pixels whose route to the end enters
+        # a pixel that became more expensive; those are searched again
+        raised = np.zeros(rows * cols, dtype=bool)
+        raised[changed] = new_cost[changed] > state['cost'][changed]
+        stale = self._routed_through(raised)
+        searched = np.isfinite(state['g'])
+        if np.count_nonzero(stale & searched) > self.max_changed_fraction * np.count_nonzero(searched):
+            return self._replan(cost_map, len(changed))
+        
+        state['g'][stale] = np.inf
+        state['cost'] = new_cost
+        finite = new_cost[~blocked]
+        state['scale'] = max(float(finite.min()), 0.0) if finite.size else 0.0
+        self._rebuild_queue()
+        
+        # A repair that outgrows twice the original search is abandoned
+        expansions = self._compute_shortest_path(limit=2 * state['plan_expansions'] or None)
+        if expansions is None:
+            return self._replan(cost_map, len(changed))
+        self.last_update = {'changed': len(changed), 'expansions': expansions, 'replanned': False}
+        return self._extract_path()
+    
+    def move_start(self, start: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+        """
+        Move the start point (e.g. along the current route) and repair the route
+        
+        Args:
+            start: New starting coordinates (row, col)
+        
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        state = self._require_state()
+        rows, cols = state['shape']
+        if not (0 <= start[0] < rows and 0 <= start[1] < cols):
+            raise ValueError("Start point out of bounds")
+        
+        # Shift all queued keys by the heuristic change instead of re-keying
+        old_row, old_col = state['start']
+        state['km'] += state['scale'] * max(abs(start[0] - old_row), abs(start[1] - old_col))
+        state['start'] = start
+        
+        expansions = self._compute_shortest_path()
+        self.last_update = {'changed': 0, 'expansions': expansions, 'replanned': False}
+        return self._extract_path()
+    
+    def _replan(self, cost_map: np.ndarray, changed: int) -> Optional[List[Tuple[int, int]]]:
+        """Plan from scratch with the current start, end and allowed mask"""
+        state = self._state
+        rows, cols = state['shape']
+        path = self.plan(cost_map, state['start'], state['end'], ~state['blocked'].reshape(rows, cols))
+        self.last_update['changed'] = changed
+        return path
+    
+    def _routed_through(self, raised: np.ndarray) -> np.ndarray:
+        """
+        Pixels whose cheapest known route to the end enters a raised pixel
+        
+        Every pixel points at the neighbor its lookahead comes from; the
+        flags are carried backwards along these pointers by pointer jumping,
+        so routes of length L take log2(L) vectorized rounds.
+        
+        Args:
+            raised: Flat flags of the pixels whose cost increased
+            
+        Returns:
+            Flat flags of the pixels whose cost to the end may have grown
+        """
+        state = self._state
+        rows, cols = state['shape']
+        n = rows * cols
+        through = np.full((rows + 2, cols + 2), np.inf)
+        through[1:-1, 1:-1] = (state['cost'] + state['g']).reshape(rows, cols)
+        index = np.arange(n).reshape(rows, cols)
+        best = np.full((rows, cols), np.inf)
+        # n marks pixels without a successor
+        successor = np.full((rows, cols), n, dtype=np.int64)
+        for dr, dc in DIRECTIONS:
+            candidate = through[1 + dr:rows + 1 + dr, 1 + dc:cols + 1 + dc]
+            better = candidate < best
+            best[better] = candidate[better]
+            successor[better] = index[better] + dr * cols + dc
+        successor = np.append(successor.reshape(n), n)
+        successor[state['target']] = n
+        
+        stale = np.append(raised, False)[successor]
+        for _ in range(max(n, 2).bit_length()):
+            if np.all(successor == n):
+                break
+            stale |= stale[successor]
+            successor = successor[successor]
+        return stale[:n]
+    
+    def _rebuild_queue(self):
+        """Recompute every lookahead and queue the inconsistent pixels with fresh keys"""
+        state = self._state
+        rows, cols = state['shape']
+        rhs = _neighbor_min((state['cost'] + state['g']).reshape(rows, cols)).reshape(-1)
+        rhs[state['blocked']] = np.inf
+        rhs[state['target']] = 0.0
+        state['rhs'] = rhs
+        # Fresh keys already include every move of the start point
+        state['km'] = 0.0
+        indices = np.flatnonzero(rhs != state['g'])
+        state['open'] = open_set = list(zip(*self._keys(indices), indices.tolist()))
+        heapq.heapify(open_set)
+    
+    def _require_state(self) -> dict:
+        if self._state is None:
+            raise ValueError("No route planned yet; call plan() first")
+        return self._state
+    
+    def _effective_cost(self, cost_map: np.ndarray, blocked: np.ndarray) -> np.ndarray:
+        """Flat float64 costs with disallowed pixels made impassable"""
+        cost = np.array(cost_map, dtype=np.float64).reshape(-1)
+        cost[blocked] = np.inf
+        return cost
+    
+    def _keys(self, indices: np.ndarray) -> Tuple[list, list]:
+        """D* Lite priority (k1, k2) of several flat indices at once"""
+        state = self._state
+        cols = state['shape'][1]
+        start_row, start_col = state['start']
+        rows_, cols_ = np.divmod(indices, cols)
+        k2 = np.minimum(state['g'][indices], state['rhs'][indices])
+        distance = np.maximum(np.abs(rows_ - start_row), np.abs(cols_ - start_col))
+        k1 = k2 + state['scale'] * distance + state['km']
+        return k1.tolist(), k2.tolist()
+    
+    def _push(self, index: int):
+        state = self._state
+        row, col = divmod(index, state['shape'][1])
+        start_row, start_col = state['start']
+        k2 = min(state['g'][index], state['rhs'][index])
+        k1 = k2 + state['scale'] * max(abs(row - start_row), abs(col - start_col)) + state['km']
+        heapq.heappush(state['open'], (k1, k2, index))
+    
+    def _compute_shortest_path(self, limit: Optional[int] = None) -> Optional[int]:
+        """
+        Process queued pixels until the start point is consistent
+        
+        Args:
+            limit: Optional maximum number of expansions
+        
+        Returns:
+            Number of pixels expanded, or None if the limit was reached
+        """
+        state = self._state
+        rows, cols = state['shape']
+        open_set = state['open']
+        blocked = state['blocked']
+        cost_v = memoryview(state['cost'])
+        g_v = memoryview(state['g'])
+        rhs_v = memoryview(state['rhs'])
+        scale = state['scale']
+        km = state['km']
+        start_row, start_col = state['start']
+        source = start_row * cols + start_col
+        target = state['target']
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        inf = np.inf
+        expansions = 0
+        
+        def key(index):
+            row, col = divmod(index, cols)
+            k2 = min(g_v[index], rhs_v[index])
+            return k2 + scale * max(abs(row - start_row), abs(col - start_col)) + km, k2
+        
+        while open_set:
+            k1, k2, u = open_set[0]
+            g_u = g_v[u]
+            rhs_u = rhs_v[u]
+            # Consistent pixels and superseded duplicates are stale entries
+            if g_u == rhs_u:
+                heappop(open_set)
+                continue
+            new_key = key(u)
+            if (k1, k2) > new_key:
+                heappop(open_set)
+                continue
+            if (k1, k2) >= key(source) and rhs_v[source] == g_v[source]:
+                break
+            
+            heappop(open_set)
+            if (k1, k2) < new_key:
+                heappush(open_set, (new_key[0], new_key[1], u))
+                continue
+            
+            expansions += 1
+            if expansions == limit:
+                return None
+            row, col = divmod(u, cols)
+            step = cost_v[u]
+            if g_u > rhs_u:
+                # Overconsistent: lower g and relax the pixels that can enter u
+                g_v[u] = rhs_u
+                through = step + rhs_u
+                for dr, dc in DIRECTIONS:
+                    nr = row + dr
+                    nc = col + dc
+                    if not (0 <= nr < rows and 0 <= nc < cols):
+                        continue
+                    p = nr * cols + nc
+                    if p != target and not blocked[p] and through < rhs_v[p]:
+                        rhs_v[p] = through
+                        heappush(open_set, (*key(p), p))
+            else:
+                # Underconsistent: reset g and recompute the lookahead of u
+                # and of every pixel that was routed through it
+                g_v[u] = inf
+                previous = step + g_u
+                for p in (u,) + tuple((row + dr) * cols + col + dc for dr, dc in DIRECTIONS
+                                      if 0 <= row + dr < rows and 0 <= col + dc < cols):
+                    if p == target or blocked[p]:
+                        continue
+                    if p != u and rhs_v[p] != previous:
+                        continue
+                    p_row, p_col = divmod(p, cols)
+                    best = inf
+                    for dr, dc in DIRECTIONS:
+                        nr = p_row + dr
+                        nc = p_col + dc
+                        if 0 <= nr < rows and 0 <= nc < cols:
+                            s = nr * cols + nc
+                            candidate = cost_v[s] + g_v[s]
+                            if candidate < best:
+                                best = candidate
+                    rhs_v[p] = best
+                    if g_v[p] != best:
+                        heappush(open_set, (*key(p), p))
+        
+        return expansions
+    
+    def _extract_path(self) -> Optional[List[Tuple[int, int]]]:
+        """Follow the cheapest successors from the start point to the end point"""
+        state = self._state
+        rows, cols = state['shape']
+        cost = state['cost']
+        g_score = state['g']
+        start_row, start_col = state['start']
+        current = start_row * cols + start_col
+        target = state['target']
+        
+        if state['rhs'][current] == np.inf:
+            self.path = None
+            self.cost = None
+            self.expansions = self.last_update['expansions']
+            return None
+        
+        path = [state['start']]
+        for _ in range(rows * cols):
+            if current == target:
+                break
+            row, col = divmod(current, cols)
+            best = np.inf
+            for dr, dc in DIRECTIONS:
+                nr = row + dr
+                nc = col + dc
+                if 0 <= nr < rows and 0 <= nc < cols:
+                    s = nr * cols + nc
+                    candidate = cost[s] + g_score[s]
+                    if candidate < best:
+                        best = candidate
+                        current = s
+            path.append(divmod(current, cols))
+        
+        self.path = path
+        self.cost = float(state['rhs'][start_row * cols + start_col])
+        self.expansions = self.last_update['expansions']
+        return path
@@ -4,81 +4,1922 @@ Finds optimal routes considering terrain costs
 """
 
 import numpy as np
+import hashlib
 import heapq
-from typing import List, Tuple, Optional
+import sys
+import time
+from collections import OrderedDict
+from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from math import inf, isqrt, sqrt
+from typing import Iterator, List, Tuple, Optional
+
+# 8 directions: N, NE, E, SE, S, SW, W, NW
+DIRECTIONS = (
+    (-1, 0), (-1, 1), (0, 1), (1, 1),
+    (1, 0), (1, -1), (0, -1), (-1, -1)
+)
+
+# 16 headings for the lattice engine, clockwise from N: the 8 directions
+# plus knight moves in between
+HEADINGS_16 = (
+    (-1, 0), (-2, 1), (-1, 1), (-1, 2), (0, 1), (1, 2), (1, 1), (2, 1),
+    (1, 0), (2, -1), (1, -1), (1, -2), (0, -1), (-1, -2), (-1, -1), (-2, -1)
+)
+
+# Direction steps as an array, and the direction index of each (dr + 1, dc + 1)
+_STEPS = np.array(DIRECTIONS, dtype=np.int32)
+_STEP_CODES = np.full((3, 3), 255, dtype=np.uint8)
+_STEP_CODES[_STEPS[:, 0] + 1, _STEPS[:, 1] + 1] = np.arange(8)
+
+# Longest run of one direction stored in a single (code, run) pair of PixelPath.encode
+MAX_CHAIN_RUN = 255
+
+# Step lengths of the 8 directions
+DIRECTION_LENGTHS = tuple(sqrt(dr * dr + dc * dc) for dr, dc in DIRECTIONS)
+
+# Movement models: 'cell' charges the cost of the pixel entered per step,
+# 'metric' charges the step length times the mean cost of both pixels
+MOVEMENTS = ('cell', 'metric')
+
+# Backlink raster codes besides the direction indices 0-7
+SOURCE_BACKLINK = 8
+NO_BACKLINK = 255
+
+# Largest step cost the bucket queue accepts before falling back to the heap;
+# the ring holds about twice this many bucket lists
+MAX_BUCKET_COST = 1 << 16
+
+# Heuristics accepted by AStarPathfinder.find_path
+HEURISTICS = ('euclidean', 'scaled', 'alt')
+
+# Words (8 bytes) per block of cost_map_fingerprint; the per-word weights
+# are built on first use
+FINGERPRINT_BLOCK_WORDS = 1 << 20
+_word_weights = None
+
+# Landmark tables for the 'alt' heuristic, cached by cost map fingerprint
+DEFAULT_LANDMARKS = 8
+MAX_CACHED_LANDMARK_TABLES = 4
+_landmark_cache = OrderedDict()
+
+# Approximate bytes per entry for search_stats: a heap slot with its
+# (f, index) tuple, float and int; a bare int in a bucket; and a dict engine
+# node with its key tuple and scores. BUCKET_SLOT_BYTES is one empty list in
+# the bucket ring with its slot
+HEAP_ENTRY_BYTES = 116
+BUCKET_ENTRY_BYTES = 36
+BUCKET_SLOT_BYTES = 64
+DICT_ENTRY_BYTES = 112
+
+# Engines accepted by cost_distance: the heap search or vectorized sweeps
+COST_DISTANCE_ENGINES = ('dijkstra', 'sweep')
+
+# Expansions between wall clock checks of a find_path time budget
+BUDGET_CHECK_INTERVAL = 1024
+
+# Most via points find_path_via orders exactly (Held-Karp is O(2^n n^2))
+MAX_ORDERED_WAYPOINTS = 10
+
+# Line-of-sight checks walk lines up to this many pixels in Python and
+# gather longer ones with NumPy (even numbers 2t for the rounding formula)
+SHORT_LINE = 40
+_RAMP = np.arange(2, 2 * (1 << 16) + 1, 2, dtype=np.int64)
+
+# Shortcut end points simplify_path evaluates per vectorized batch
+SHORTCUT_BATCH = 256
+
+
+def _initial_closed(allowed: Optional[np.ndarray], n: int) -> np.ndarray:
+    """Flat closed flags with every disallowed pixel closed up front, so searches never enter them"""
+    if allowed is None:
+        return np.zeros(n, dtype=bool)
+    return np.logical_not(np.asarray(allowed, dtype=bool).reshape(n))
+
+
+def _expanded_pixels(closed: np.ndarray, allowed: Optional[np.ndarray]) -> np.ndarray:
+    """Flat mask of the pixels a search expanded, from closed flags that include disallowed pixels"""
+    if allowed is None:
+        return closed
+    return closed & np.asarray(allowed, dtype=bool).reshape(closed.size)
+
+
+def _mask_window(mask: np.ndarray) -> Optional[Tuple[int, int, int, int]]:
+    """Bounding box (top, bottom, left, right) of the set pixels, or None if it covers the whole mask"""
+    rows = np.flatnonzero(mask.any(axis=1))
+    cols = np.flatnonzero(mask.any(axis=0))
+    if rows.size == 0:
+        return None
+    window = (int(rows[0]), int(rows[-1]) + 1, int(cols[0]), int(cols[-1]) + 1)
+    if window == (0, mask.shape[0], 0, mask.shape[1]):
+        return None
+    return window
+
+
+def _closest_pixel(mask: np.ndarray, point: Tuple[int, int], cols: int) -> Optional[int]:
+    """Flat index of the set pixel of a flat mask nearest to point, or None if none is set"""
+    index = np.flatnonzero(mask)
+    if index.size == 0:
+        return None
+    rows, columns = np.divmod(index, cols)
+    return int(index[np.argmin((rows - point[0]) ** 2 + (columns - point[1]) ** 2)])
+
+
+def integer_cost_bound(cost_map: np.ndarray) -> Optional[int]:
+    """
+    Check whether a cost map can be searched with a bucket queue
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        
+    Returns:
+        The largest cost if every cost is a non-negative integer no larger
+        than MAX_BUCKET_COST, otherwise None
+    """
+    if cost_map.size == 0:
+        return None
+    
+    low = cost_map.min()
+    high = cost_map.max()
+    if not (0 <= low and high <= MAX_BUCKET_COST):
+        return None
+    
+    if not np.issubdtype(cost_map.dtype, np.integer):
+        if not np.array_equal(cost_map, np.floor(cost_map)):
+            return None
+    
+    return int(high)
+
+
+class _SearchBudget:
+    """Expansion, wall time and memory limits of one find_path query"""
+    
+    def __init__(self, max_expansions: Optional[int] = None, max_seconds: Optional[float] = None,
+                 max_memory: Optional[int] = None):
+        for limit in (max_expansions, max_seconds, max_memory):
+            if limit is not None and limit <= 0:
+                raise ValueError("Search budgets must be positive")
+        self.max_expansions = max_expansions
+        self.max_seconds = max_seconds
+        self.max_memory = max_memory
+        self.started = time.perf_counter()
+    
+    def max_open(self, array_bytes: int, entry_bytes: int) -> float:
+        """Largest open set that keeps the search structures within max_memory"""
+        if self.max_memory is None:
+            return inf
+        return (self.max_memory - array_bytes) // entry_bytes
+    
+    def next_check(self, expansions: int) -> float:
+        """Expansion count at which exceeded() should be called next"""
+        # A Python float: comparing ints with NumPy scalars is slow in the search loops
+        check_at = inf if self.max_expansions is None else self.max_expansions
+        if self.max_seconds is not None:
+            check_at = min(check_at, expansions + BUDGET_CHECK_INTERVAL)
+        return check_at
+    
+    def exceeded(self, expansions: int) -> Optional[str]:
+        """Name of the limit the search has reached, or None"""
+        if self.max_expansions is not None and expansions >= self.max_expansions:
+            return 'expansions'
+        if self.max_seconds is not None and self.elapsed() >= self.max_seconds:
+            return 'seconds'
+        return None
+    
+    def elapsed(self) -> float:
+        """Seconds since the query started"""
+        return time.perf_counter() - self.started
+    
+    def limit(self, name: str):
+        """Value of the named limit"""
+        return {'expansions': self.max_expansions, 'seconds': self.max_seconds,
+                'memory': self.max_memory}[name]
+
+
+class PixelPath(Sequence):
+    """
+    Route as an (N, 2) int32 array of (row, col) pixels
+    
+    Behaves like the list of (row, col) tuples it replaces: len(), indexing,
+    iteration and comparison with lists work as before, while the route
+    takes 8 bytes per pixel. np.asarray(path) returns the array without
+    copying, so per-step statistics vectorize directly, and encode() packs
+    the route as a run-length chain code for storage and transfer.
+    """
+    
+    __slots__ = ('points',)
+    
+    def __init__(self, points):
+        """
+        Wrap route points
+        
+        Args:
+            points: (N, 2) array or sequence of (row, col) pixels
+        """
+        self.points = np.ascontiguousarray(np.asarray(points, dtype=np.int32).reshape(-1, 2))
+    
+    def __len__(self) -> int:
+        return len(self.points)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PixelPath(self.points[index])
+        row, col = self.points[index].tolist()
+        return row, col
+    
+    def __iter__(self) -> Iterator[Tuple[int, int]]:
+        return map(tuple, self.points.tolist())
+    
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, (PixelPath, list, tuple)):
+            return NotImplemented
+        try:
+            other = np.asarray(other, dtype=np.int64).reshape(-1, 2)
+        except (TypeError, ValueError):
+            return False
+        return bool(np.array_equal(self.points, other))
+    
+    __hash__ = None
+    
+    def __array__(self, dtype=None, copy=None) -> np.ndarray:
+        return self.points if dtype is None else self.points.astype(dtype, copy=False)
+    
+    def __repr__(self) -> str:
+        if not len(self):
+            return "PixelPath([])"
+        return f"PixelPath({len(self)} pixels, {self[0]} -> {self[-1]})"
+    
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the point array"""
+        return self.points.nbytes
+    
+    def chain_code(self) -> np.ndarray:
+        """
+        Direction index (into DIRECTIONS) of every step
+        
+        Returns:
+            uint8 array of N - 1 codes
+        """
+        steps = np.diff(self.points, axis=0)
+        if steps.size and (np.abs(steps).max() > 1 or not np.abs(steps).sum(axis=1).all()):
+            raise ValueError("Path steps must join 8-connected neighbors")
+        return _STEP_CODES[steps[:, 0] + 1, steps[:, 1] + 1]
+    
+    def encode(self) -> bytes:
+        """
+        Pack the route as its start pixel and run-length chain code
+        
+        The start is stored as two little-endian int32 values, followed by
+        one (code, run) byte pair per stretch of up to MAX_CHAIN_RUN steps
+        in the same direction. Straight stretches cost 2 bytes regardless
+        of their length, and a route never costs more than 2 bytes per step.
+        
+        Returns:
+            Encoded route for PixelPath.decode
+        """
+        if not len(self):
+            raise ValueError("Cannot encode an empty path")
+        codes = self.chain_code()
+        starts = np.flatnonzero(np.diff(codes.astype(np.int16), prepend=-1) != 0)
+        lengths = np.diff(starts, append=codes.size)
+        
+        # Split runs longer than MAX_CHAIN_RUN into full pieces plus a remainder
+        pieces = -(-lengths // MAX_CHAIN_RUN)
+        runs = np.full(pieces.sum(), MAX_CHAIN_RUN, dtype=np.int64)
+        runs[np.cumsum(pieces) - 1] = lengths - MAX_CHAIN_RUN * (pieces - 1)
+        pairs = np.column_stack((np.repeat(codes[starts], pieces), runs)).astype(np.uint8)
+        return self.points[0].astype('<i4').tobytes() + pairs.tobytes()
+    
+    @classmethod
+    def decode(cls, data: bytes) -> 'PixelPath':
+        """
+        Rebuild a route packed by encode
+        
+        Args:
+            data: Encoded route
+            
+        Returns:
+            The decoded PixelPath
+        """
+        if len(data) < 8 or len(data) % 2:
+            raise ValueError("Invalid path encoding")
+        start = np.frombuffer(data[:8], dtype='<i4').astype(np.int32)
+        pairs = np.frombuffer(data[8:], dtype=np.uint8).reshape(-1, 2)
+        if pairs.size and (pairs[:, 0].max() >= 8 or not pairs[:, 1].all()):
+            raise ValueError("Invalid path encoding")
+        steps = _STEPS[np.repeat(pairs[:, 0], pairs[:, 1])]
+        points = np.empty((len(steps) + 1, 2), dtype=np.int32)
+        points[0] = start
+        np.cumsum(steps, axis=0, out=points[1:])
+        points[1:] += start
+        return cls(points)
+
 
 class AStarPathfinder:
     """A* pathfinding algorithm for route optimization"""
     
-    def __init__(self):
-        """Initialize the pathfinder"""
+    def __init__(self, engine='array', landmarks=DEFAULT_LANDMARKS, movement='cell',
+                 headings=8, max_turn=1, turn_penalty=0.0):
+        """
+        Initialize the pathfinder
+        
+        Args:
+            engine: Search engine ('array' keeps the search state in flat
+                NumPy arrays, 'bucket' uses a bucket queue on integer cost
+                maps and falls back to 'array' otherwise, 'bidirectional'
+                searches from both ends at once, 'lattice' searches over
+                (pixel, heading) states with limited turns, 'dict' is the
+                original dictionary-based search)
+            landmarks: Number of landmarks for the 'alt' heuristic
+            movement: Step cost model ('cell' charges the cost of the pixel
+                entered, the same for straight and diagonal steps; 'metric'
+                charges the step length, 1 or sqrt(2), times the mean cost
+                of both pixels and is supported by the array and lattice
+                engines; the bucket engine falls back to the array engine)
+            headings: Number of headings for the 'lattice' engine (8, or 16
+                adding knight moves for gentler curves)
+            max_turn: Largest heading change per step for the 'lattice'
+                engine, in heading steps (360 / headings degrees)
+            turn_penalty: Cost added per heading step turned by the
+                'lattice' engine
+        """
+        self.engine = engine
+        self.landmarks = landmarks
+        self.movement = movement
+        self.headings = headings
+        self.max_turn = max_turn
+        self.turn_penalty = turn_penalty
+        self.path = None
+        self.cost = None
+        self.queue = None
+        self.expansions = None
+        self.suboptimality = None
+        self.multiresolution_report = None
+        self.any_angle_report = None
+        self.lattice_report = None
+        self.waypoint_report = None
+        self.search_stats = None
+        self.budget_report = None
+    
+    def find_path(self, cost_map: np.ndarray, start: Tuple[int, int], 
+                  end: Tuple[int, int], allowed: Optional[np.ndarray] = None,
+                  heuristic: str = 'euclidean', weight: float = 1.0,
+                  record_expanded: bool = False, max_expansions: Optional[int] = None,
+                  max_seconds: Optional[float] = None,
+                  max_memory: Optional[int] = None, no_go: Optional[np.ndarray] = None,
+                  corridor=None, obstacle_cost: Optional[float] = None) -> Optional[PixelPath]:
+        """
+        Find optimal path using A* algorithm
+        
+        Per-query metrics are stored in self.search_stats: expansions, heap
+        pushes, peak open set size (stale entries included), estimated peak
+        bytes of the search arrays and open set, wall time in seconds and
+        optionally the expanded pixels.
+        
+        A search that reaches one of its budgets stops, returns None and
+        stores self.budget_report: the limit exceeded ('expansions',
+        'seconds' or 'memory') and its value, expansions and seconds so far,
+        the partial route to the expanded pixel nearest the end (the best
+        complete route for the bidirectional engine once the ends have met)
+        with its cost, and a lower bound on the optimal cost where the
+        search provides one. A memory budget smaller than the search arrays
+        is refused before they are allocated. The dict engine has no budgets.
+        
+        The allowed mask, no-go mask, corridor and obstacle cost are combined
+        into one mask (see route_mask) whose excluded pixels the engines
+        close before searching. Unless the 'alt' heuristic is used, the
+        search also runs only on the bounding box of the allowed pixels, so
+        a narrow corridor allocates and expands only a fraction of the map.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask (same shape as cost_map) of the
+                pixels the route may use
+            heuristic: 'euclidean' (pixel distance), 'scaled' (distance in
+                steps times the cheapest cost in the map) or 'alt'
+                (landmark lower bounds from a cached LandmarkTable)
+            weight: Heuristic inflation epsilon >= 1. Values above 1 give a
+                bounded-suboptimal search whose route costs at most weight
+                times the optimum; the achieved ratio is stored in
+                self.suboptimality
+            record_expanded: Keep a boolean mask of the expanded pixels in
+                self.search_stats['expanded'] for rendering the explored region
+            max_expansions: Optional limit on the number of expanded nodes
+            max_seconds: Optional limit on the wall time of the search
+            max_memory: Optional limit in bytes on the search arrays and the
+                open set (estimated as in search_stats)
+            no_go: Optional boolean mask of pixels the route must avoid
+                (e.g. protected areas)
+            corridor: Optional planning corridor the route must stay in, as
+                a boolean or 0/1 mask or polygon vertices (row, col)
+            obstacle_cost: Optional cost from which pixels are impassable
+                (e.g. the water cost)
+            
+        Returns:
+            PixelPath of the route pixels (an (N, 2) int32 array that acts
+            like a list of (row, col) tuples), or None if no path found
+        """
+        # Clear the previous query's results before any early return
         self.path = None
         self.cost = None
+        self.expansions = 0
+        self.suboptimality = None
+        self.search_stats = None
+        self.budget_report = None
+        
+        allowed = route_mask(cost_map, allowed, no_go, corridor, obstacle_cost)
+        if not self._validate_query(cost_map, start, end, allowed, heuristic):
+            return None
+        if weight < 1.0:
+            raise ValueError("Heuristic weight must be at least 1")
+        if self.movement != 'cell' and self.engine in ('bidirectional', 'dict'):
+            raise ValueError(f"The {self.engine} engine only supports the cell movement model")
+        
+        if self.engine == 'bidirectional' and weight != 1.0:
+            raise ValueError("The bidirectional engine does not support weighted search")
+        if self.engine == 'dict':
+            if heuristic != 'euclidean' or weight != 1.0:
+                raise ValueError("The dict engine only supports the unweighted euclidean heuristic")
+            if (max_expansions, max_seconds, max_memory) != (None, None, None):
+                raise ValueError("The dict engine does not support search budgets")
+        
+        # Landmark bounds belong to the full map, so 'alt' searches are not cropped
+        window = _mask_window(allowed) if allowed is not None and heuristic != 'alt' else None
+        if window is not None:
+            top, bottom, left, right = window
+            path = self.find_path(cost_map[top:bottom, left:right],
+                                  (start[0] - top, start[1] - left), (end[0] - top, end[1] - left),
+                                  allowed[top:bottom, left:right], heuristic, weight, record_expanded,
+                                  max_expansions, max_seconds, max_memory)
+            return self._shift_result(path, window, cost_map.shape)
+        
+        self.suboptimality = 1.0
+        budget = _SearchBudget(max_expansions, max_seconds, max_memory)
+        if budget.max_open(self._search_array_bytes(cost_map.size), HEAP_ENTRY_BYTES) < 1:
+            # Refuse before allocating the search arrays
+            self.expansions = 0
+            self._record_search(0, 0, 0, lambda: np.zeros(cost_map.size, dtype=bool))
+            path = self._exceed_budget('memory', budget, [tuple(start)], 0.0, None)
+        elif self.engine == 'array':
+            path = self._find_path_array(cost_map, start, end, allowed, heuristic, weight, budget)
+        elif self.engine == 'bucket':
+            path = self._find_path_bucket(cost_map, start, end, allowed, heuristic, weight, budget)
+        elif self.engine == 'bidirectional':
+            path = self._find_path_bidirectional(cost_map, start, end, allowed, heuristic, budget)
+        elif self.engine == 'lattice':
+            path = self._find_path_lattice(cost_map, start, end, allowed, heuristic, weight, budget)
+        elif self.engine == 'dict':
+            path = self._find_path_dict(cost_map, start, end, allowed)
+        else:
+            raise ValueError(f"Unknown engine: {self.engine}")
+        
+        stats = self.search_stats
+        stats['seconds'] = budget.elapsed()
+        stats['expanded'] = stats['expanded']().reshape(cost_map.shape) if record_expanded else None
+        if path is not None:
+            path = PixelPath(path)
+            self.path = path
+        return path
+    
+    def _shift_result(self, path: Optional[PixelPath], window: Tuple[int, int, int, int],
+                      shape: Tuple[int, int]) -> Optional[PixelPath]:
+        """
+        Move the result of a search on a window of the cost map back to full map coordinates
+        
+        Args:
+            path: Route found in the window, or None
+            window: (top, bottom, left, right) of the window
+            shape: Shape of the full cost map
+            
+        Returns:
+            The route in full map coordinates, or None
+        """
+        top, bottom, left, right = window
+        if path is not None:
+            path = PixelPath(path.points + np.array([top, left], dtype=np.int32))
+            self.path = path
+        if self.budget_report is not None:
+            self.budget_report['partial_path'] = [(row + top, col + left)
+                                                  for row, col in self.budget_report['partial_path']]
+        if self.search_stats is not None and self.search_stats['expanded'] is not None:
+            expanded = np.zeros(shape, dtype=bool)
+            expanded[top:bottom, left:right] = self.search_stats['expanded']
+            self.search_stats['expanded'] = expanded
+        return path
+    
+    def _search_array_bytes(self, n: int) -> int:
+        """Bytes of the flat search arrays the engine allocates for n pixels"""
+        if self.engine == 'lattice':
+            states = n * self.headings
+            return 9 * n + states * (13 if states < 2 ** 31 else 17)
+        if self.engine == 'bidirectional':
+            return 42 * n
+        if self.engine == 'dict':
+            return 0
+        return 25 * n
+    
+    def _exceed_budget(self, name: str, budget: _SearchBudget, partial: List[Tuple[int, int]],
+                       partial_cost: float, lower_bound: Optional[float]) -> None:
+        """
+        Store self.budget_report for a search stopped by its budget
+        
+        Args:
+            name: Limit exceeded ('expansions', 'seconds' or 'memory')
+            budget: Limits of the query
+            partial: Best route found so far from the start
+            partial_cost: Cost of the partial route
+            lower_bound: Lower bound on the optimal route cost, or None
+            
+        Returns:
+            None, the find_path result of a stopped search
+        """
+        self.budget_report = {
+            'exceeded': name,
+            'limit': budget.limit(name),
+            'expansions': self.expansions,
+            'seconds': budget.elapsed(),
+            'partial_path': partial,
+            'partial_cost': float(partial_cost),
+            'lower_bound': None if lower_bound is None else float(lower_bound),
+        }
+        return None
+    
+    def _partial_route(self, expanded: np.ndarray, came_from, g_score, start: Tuple[int, int],
+                       end: Tuple[int, int], cols: int) -> Tuple[List[Tuple[int, int]], float]:
+        """Route and cost to the expanded pixel nearest the end of a stopped search"""
+        best = _closest_pixel(expanded, end, cols)
+        if best is None:
+            return [tuple(start)], 0.0
+        return self._reconstruct_path_array(came_from, best, cols), g_score[best]
+    
+    def _record_search(self, pushes: int, peak_open: int, structure_bytes: int, expanded):
+        """
+        Store the counters of the search that just finished in self.search_stats
+        
+        Args:
+            pushes: Entries pushed onto the open set
+            peak_open: Largest open set size, stale entries included
+            structure_bytes: Estimated peak bytes of the search arrays and open set
+            expanded: Callable returning the flat mask of expanded pixels
+        """
+        self.search_stats = {
+            'expansions': self.expansions,
+            'pushes': pushes,
+            'peak_open': peak_open,
+            'memory_bytes': int(structure_bytes),
+            'seconds': None,
+            'expanded': expanded,
+        }
+    
+    def _validate_query(self, cost_map: np.ndarray, start: Tuple[int, int],
+                        end: Tuple[int, int], allowed: Optional[np.ndarray],
+                        heuristic: str) -> bool:
+        """
+        Check a route query, raising ValueError for invalid arguments
+        
+        Returns:
+            False if the allowed mask excludes the start or end point
+        """
+        rows, cols = cost_map.shape
+        
+        # Validate start and end points
+        if not (0 <= start[0] < rows and 0 <= start[1] < cols):
+            raise ValueError("Start point out of bounds")
+        if not (0 <= end[0] < rows and 0 <= end[1] < cols):
+            raise ValueError("End point out of bounds")
+        
+        if allowed is not None:
+            if allowed.shape != cost_map.shape:
+                raise ValueError("Allowed mask must have the same shape as the cost map")
+            if not (allowed[start] and allowed[end]):
+                return False
+        
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"Unknown heuristic: {heuristic}")
+        if self.movement not in MOVEMENTS:
+            raise ValueError(f"Unknown movement model: {self.movement}")
+        if self.movement != 'cell' and heuristic == 'alt':
+            raise ValueError("Landmark tables use the cell movement model")
+        return True
+    
+    def find_path_anytime(self, cost_map: np.ndarray, start: Tuple[int, int],
+                          end: Tuple[int, int], allowed: Optional[np.ndarray] = None,
+                          heuristic: str = 'euclidean', initial_weight: float = 3.0,
+                          weight_step: float = 0.5,
+                          time_budget: Optional[float] = None) -> Iterator[Tuple[List[Tuple[int, int]], float, float]]:
+        """
+        Anytime Repairing A* (ARA*): yield a quick inflated-heuristic route
+        first, then successively better routes
+        
+        Each pass lowers the heuristic weight by weight_step and reuses the
+        previous search: only pixels whose g-score improved after they were
+        expanded (the INCONS list) and the remaining open list are searched
+        again. The generator stops once a route is proven optimal or the
+        time budget has elapsed; the first route is always completed.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use
+            heuristic: Heuristic name (see find_path)
+            initial_weight: Heuristic weight of the first pass
+            weight_step: Weight decrease between passes
+            time_budget: Optional limit in seconds on the whole search
+            
+        Yields:
+            (path, cost, suboptimality bound) for each improved route
+        """
+        if self.movement != 'cell':
+            raise ValueError("Anytime search only supports the cell movement model")
+        if not self._validate_query(cost_map, start, end, allowed, heuristic):
+            return
+        if initial_weight < 1.0:
+            raise ValueError("Heuristic weight must be at least 1")
+        if weight_step <= 0:
+            raise ValueError("Weight step must be positive")
+        
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+        self.queue = 'heap'
+        rows, cols = cost_map.shape
+        n = rows * cols
+        
+        cost = np.ascontiguousarray(cost_map, dtype=np.float64).reshape(n)
+        g_score = np.full(n, np.inf)
+        came_from = np.full(n, -1, dtype=np.int64)
+        blocked = _initial_closed(allowed, n)
+        closed = blocked.copy()
+        inconsistent = np.zeros(n, dtype=bool)
+        
+        cost_v = memoryview(cost)
+        g_v = memoryview(g_score)
+        parent_v = memoryview(came_from)
+        closed_v = memoryview(closed)
+        incons_v = memoryview(inconsistent)
+        
+        h = self._heuristic_function(cost_map, end, heuristic)
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        g_v[source] = 0.0
+        
+        weight = initial_weight
+        open_set = [(weight * h(*start), source)]
+        incons = []
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expansions = 0
+        best_cost = np.inf
+        
+        while True:
+            # Improve the route until no open pixel can beat it at this weight
+            while open_set:
+                f, current = open_set[0]
+                if closed_v[current]:
+                    heappop(open_set)
+                    continue
+                if f >= g_v[target]:
+                    break
+                heappop(open_set)
+                closed_v[current] = True
+                expansions += 1
+                if (deadline is not None and best_cost < np.inf and not expansions & 1023
+                        and time.perf_counter() > deadline):
+                    self.expansions = expansions
+                    return
+                
+                row, col = divmod(current, cols)
+                g_current = g_v[current]
+                for dr, dc in DIRECTIONS:
+                    nr = row + dr
+                    nc = col + dc
+                    if not (0 <= nr < rows and 0 <= nc < cols):
+                        continue
+                    
+                    neighbor = nr * cols + nc
+                    tentative_g = g_current + cost_v[neighbor]
+                    if tentative_g < g_v[neighbor]:
+                        if closed_v[neighbor]:
+                            if blocked[neighbor]:
+                                continue
+                            # Expanded in this pass: defer to the next one
+                            g_v[neighbor] = tentative_g
+                            parent_v[neighbor] = current
+                            if not incons_v[neighbor]:
+                                incons_v[neighbor] = True
+                                incons.append(neighbor)
+                        else:
+                            g_v[neighbor] = tentative_g
+                            parent_v[neighbor] = current
+                            heappush(open_set, (tentative_g + weight * h(nr, nc), neighbor))
+            
+            if g_v[target] == np.inf:
+                self.expansions = expansions
+                return
+            
+            # Parents may have improved after their children were reached, so
+            # the traced route can be cheaper than the target's g-score
+            path = self._reconstruct_path_array(parent_v, target, cols)
+            indices = np.array(path, dtype=np.int64) @ np.array([cols, 1])
+            route_cost = float(cost[indices[1:]].sum())
+            
+            # Pixels that could still lead to a cheaper route
+            frontier = {index for _, index in open_set if not closed_v[index]}
+            frontier.update(incons)
+            lower = route_cost
+            for index in frontier:
+                row, col = divmod(index, cols)
+                lower = min(lower, g_v[index] + h(row, col))
+            bound = min(weight, route_cost / lower) if lower > 0 else 1.0
+            
+            if route_cost < best_cost:
+                best_cost = route_cost
+                self.path = path
+                self.cost = route_cost
+                self.suboptimality = bound
+                self.expansions = expansions
+                yield path, route_cost, bound
+            
+            if bound <= 1.0 or weight <= 1.0:
+                return
+            if deadline is not None and time.perf_counter() > deadline:
+                return
+            
+            # Next pass: lower the weight and rebuild the open list from the
+            # frontier with the new keys
+            weight = max(1.0, weight - weight_step)
+            open_set = []
+            for index in frontier:
+                row, col = divmod(index, cols)
+                open_set.append((g_v[index] + weight * h(row, col), index))
+            heapq.heapify(open_set)
+            incons = []
+            inconsistent[:] = False
+            np.copyto(closed, blocked)
+    
+    def _find_path_array(self, cost_map: np.ndarray, start: Tuple[int, int],
+                         end: Tuple[int, int],
+                         allowed: Optional[np.ndarray] = None,
+                         heuristic: str = 'euclidean',
+                         weight: float = 1.0,
+                         budget: Optional[_SearchBudget] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        A* search with g-scores, parents and closed flags stored in flat
+        NumPy arrays indexed by row * cols + col
+        
+        The open set is a heap with lazy deletion: an improved node is pushed
+        again and stale entries are skipped when popped, so no membership
+        scan of the heap is needed.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use
+            heuristic: Heuristic name (see find_path)
+            weight: Heuristic inflation epsilon (see find_path)
+            budget: Optional search limits (see find_path)
+            
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        self.queue = 'heap'
+        rows, cols = cost_map.shape
+        n = rows * cols
+        
+        cost = np.ascontiguousarray(cost_map, dtype=np.float64).reshape(n)
+        g_score = np.full(n, np.inf)
+        came_from = np.full(n, -1, dtype=np.int64)
+        closed = _initial_closed(allowed, n)
+        
+        # Memoryviews give fast scalar access to the NumPy buffers
+        cost_v = memoryview(cost)
+        g_v = memoryview(g_score)
+        parent_v = memoryview(came_from)
+        closed_v = memoryview(closed)
+        
+        h = self._heuristic_function(cost_map, end, heuristic)
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        g_v[source] = 0.0
+        
+        open_set = [(weight * h(*start), source)]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expansions = 0
+        pushes = 1
+        peak_open = 1
+        array_bytes = cost.nbytes + g_score.nbytes + came_from.nbytes + closed.nbytes
+        budget = budget or _SearchBudget()
+        max_open = budget.max_open(array_bytes, HEAP_ENTRY_BYTES)
+        check_at = budget.next_check(0)
+        exceeded = None
+        
+        # Weighted search does not reopen closed pixels; the cheapest g + h
+        # over improvements it skipped enters the suboptimality lower bound
+        weighted = weight != 1.0
+        skipped_bound = np.inf
+        
+        # A step costs (entered pixel + origin share) * length: the cell model
+        # has no origin share and unit lengths
+        metric = self.movement == 'metric'
+        moves = tuple((dr, dc, 0.5 * length if metric else 1.0)
+                      for (dr, dc), length in zip(DIRECTIONS, DIRECTION_LENGTHS))
+        origin_share = 0.0
+        
+        while open_set:
+            if len(open_set) > peak_open:
+                peak_open = len(open_set)
+                if peak_open > max_open:
+                    exceeded = 'memory'
+                    break
+            if expansions >= check_at:
+                exceeded = budget.exceeded(expansions)
+                if exceeded:
+                    break
+                check_at = budget.next_check(expansions)
+            current = heappop(open_set)[1]
+            
+            # Skip entries superseded by a cheaper push of the same node
+            if closed_v[current]:
+                continue
+            
+            if current == target:
+                path = self._reconstruct_path_array(parent_v, target, cols)
+                self.path = path
+                self.cost = g_v[target]
+                self.expansions = expansions
+                self._record_search(pushes, peak_open, array_bytes + peak_open * HEAP_ENTRY_BYTES,
+                                    lambda: _expanded_pixels(closed, allowed))
+                if weighted:
+                    # The weight itself also bounds the ratio for consistent heuristics
+                    self.suboptimality = min(weight, self._achieved_suboptimality(
+                        open_set, g_v, closed_v, h, cols, min(self.cost, skipped_bound)))
+                return path
+            
+            closed_v[current] = True
+            expansions += 1
+            row, col = divmod(current, cols)
+            g_current = g_v[current]
+            if metric:
+                origin_share = cost_v[current]
+            
+            for dr, dc, length in moves:
+                nr = row + dr
+                nc = col + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+                
+                neighbor = nr * cols + nc
+                if closed_v[neighbor]:
+                    if weighted:
+                        # Disallowed pixels are closed with an infinite g
+                        tentative_g = g_current + (cost_v[neighbor] + origin_share) * length
+                        if tentative_g < g_v[neighbor] < np.inf:
+                            skipped_bound = min(skipped_bound, tentative_g + h(nr, nc))
+                    continue
+                
+                tentative_g = g_current + (cost_v[neighbor] + origin_share) * length
+                if tentative_g < g_v[neighbor]:
+                    g_v[neighbor] = tentative_g
+                    parent_v[neighbor] = current
+                    heappush(open_set, (tentative_g + weight * h(nr, nc), neighbor))
+                    pushes += 1
+        
+        # No path found, or a budget ran out
+        self.expansions = expansions
+        self._record_search(pushes, peak_open, array_bytes + peak_open * HEAP_ENTRY_BYTES,
+                            lambda: _expanded_pixels(closed, allowed))
+        if exceeded:
+            partial, partial_cost = self._partial_route(_expanded_pixels(closed, allowed),
+                                                        parent_v, g_v, start, end, cols)
+            lower_bound = open_set[0][0] if weight == 1.0 else None
+            return self._exceed_budget(exceeded, budget, partial, partial_cost, lower_bound)
+        return None
+    
+    def _find_path_bucket(self, cost_map: np.ndarray, start: Tuple[int, int],
+                          end: Tuple[int, int],
+                          allowed: Optional[np.ndarray] = None,
+                          heuristic: str = 'euclidean',
+                          weight: float = 1.0,
+                          budget: Optional[_SearchBudget] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        A* search with a bucket queue (Dial's algorithm) for integer costs
+        
+        The heuristic is floored, so every f-score is an integer. A step adds
+        at most max_cost to g, and the floored heuristic changes by at most 2
+        between neighbors (max_cost + 1 for landmark bounds), so pending
+        entries stay within a fixed window above the current minimum. A ring
+        of buckets covering that window gives O(1) push and amortized O(1)
+        pop. Cost maps with non-integer, negative or very large costs,
+        weighted searches and the metric movement model use the heap-based
+        array engine.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use
+            heuristic: Heuristic name (see find_path)
+            weight: Heuristic inflation epsilon (see find_path)
+            budget: Optional search limits (see find_path)
+            
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        max_cost = integer_cost_bound(cost_map)
+        if max_cost is None or weight != 1.0 or self.movement != 'cell':
+            return self._find_path_array(cost_map, start, end, allowed, heuristic, weight, budget)
+        
+        self.queue = 'bucket'
+        rows, cols = cost_map.shape
+        n = rows * cols
+        
+        unreached = np.iinfo(np.int64).max
+        cost = np.ascontiguousarray(cost_map, dtype=np.int64).reshape(n)
+        g_score = np.full(n, unreached, dtype=np.int64)
+        came_from = np.full(n, -1, dtype=np.int64)
+        closed = _initial_closed(allowed, n)
+        
+        cost_v = memoryview(cost)
+        g_v = memoryview(g_score)
+        parent_v = memoryview(came_from)
+        closed_v = memoryview(closed)
+        
+        h = self._heuristic_function(cost_map, end, heuristic, integer=True)
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        g_v[source] = 0
+        
+        jump = 2 if heuristic == 'euclidean' else max_cost + 1
+        n_buckets = max_cost + jump + 1
+        current_f = h(*start)
+        array_bytes = (cost.nbytes + g_score.nbytes + came_from.nbytes + closed.nbytes
+                       + n_buckets * BUCKET_SLOT_BYTES)
+        budget = budget or _SearchBudget()
+        max_open = budget.max_open(array_bytes, BUCKET_ENTRY_BYTES)
+        if max_open < 1:
+            # Refuse before allocating the bucket ring
+            self.expansions = 0
+            self._record_search(0, 0, 0, lambda: np.zeros(n, dtype=bool))
+            return self._exceed_budget('memory', budget, [tuple(start)], 0.0, current_f)
+        buckets = [[] for _ in range(n_buckets)]
+        buckets[current_f % n_buckets].append(source)
+        queued = 1
+        expansions = 0
+        pushes = 1
+        peak_open = 1
+        check_at = budget.next_check(0)
+        exceeded = None
+        
+        while queued:
+            if queued > peak_open:
+                peak_open = queued
+                if peak_open > max_open:
+                    exceeded = 'memory'
+                    break
+            if expansions >= check_at:
+                exceeded = budget.exceeded(expansions)
+                if exceeded:
+                    break
+                check_at = budget.next_check(expansions)
+            bucket = buckets[current_f % n_buckets]
+            while not bucket:
+                current_f += 1
+                bucket = buckets[current_f % n_buckets]
+            current = bucket.pop()
+            queued -= 1
+            
+            if closed_v[current]:
+                continue
+            
+            if current == target:
+                path = self._reconstruct_path_array(parent_v, target, cols)
+                self.path = path
+                self.cost = float(g_v[target])
+                self.expansions = expansions
+                self._record_search(pushes, peak_open, array_bytes + peak_open * BUCKET_ENTRY_BYTES,
+                                    lambda: _expanded_pixels(closed, allowed))
+                return path
+            
+            closed_v[current] = True
+            expansions += 1
+            row, col = divmod(current, cols)
+            g_current = g_v[current]
+            
+            for dr, dc in DIRECTIONS:
+                nr = row + dr
+                nc = col + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+                
+                neighbor = nr * cols + nc
+                if closed_v[neighbor]:
+                    continue
+                
+                tentative_g = g_current + cost_v[neighbor]
+                if tentative_g < g_v[neighbor]:
+                    g_v[neighbor] = tentative_g
+                    parent_v[neighbor] = current
+                    f = tentative_g + h(nr, nc)
+                    # An inconsistent floored heuristic (costs below 2 with
+                    # the Euclidean one) can give an f below the current
+                    # bucket; keep such entries in the current bucket
+                    if f < current_f:
+                        f = current_f
+                    buckets[f % n_buckets].append(neighbor)
+                    queued += 1
+                    pushes += 1
+        
+        # No path found, or a budget ran out
+        self.expansions = expansions
+        self._record_search(pushes, peak_open, array_bytes + peak_open * BUCKET_ENTRY_BYTES,
+                            lambda: _expanded_pixels(closed, allowed))
+        if exceeded:
+            partial, partial_cost = self._partial_route(_expanded_pixels(closed, allowed),
+                                                        parent_v, g_v, start, end, cols)
+            # Every pending entry has an f-score of at least current_f
+            return self._exceed_budget(exceeded, budget, partial, partial_cost, current_f)
+        return None
+    
+    def _find_path_bidirectional(self, cost_map: np.ndarray, start: Tuple[int, int],
+                                 end: Tuple[int, int],
+                                 allowed: Optional[np.ndarray] = None,
+                                 heuristic: str = 'euclidean',
+                                 budget: Optional[_SearchBudget] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        Bidirectional A* search with array-backed state for both directions
+        
+        The forward search runs from start toward end and the backward search
+        from end toward start. Both use the average potential
+        p(v) = (h(v, end) - h(start, v)) / 2 of the chosen heuristic, the
+        forward side keyed by g + p and the backward side by g - p. With this
+        pair the two sides are Dijkstra searches over the same reduced costs,
+        so the search can stop once the two smallest keys add up to the best
+        connection found. That connection is optimal. The side with the
+        smaller open set is expanded next.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use
+            heuristic: Heuristic name (see find_path)
+            budget: Optional search limits (see find_path)
+            
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        self.queue = 'heap'
+        rows, cols = cost_map.shape
+        n = rows * cols
+        
+        cost = np.ascontiguousarray(cost_map, dtype=np.float64).reshape(n)
+        g_scores = (np.full(n, np.inf), np.full(n, np.inf))
+        came_from = (np.full(n, -1, dtype=np.int64), np.full(n, -1, dtype=np.int64))
+        closed = (_initial_closed(allowed, n), _initial_closed(allowed, n))
+        
+        cost_v = memoryview(cost)
+        g_v = [memoryview(a) for a in g_scores]
+        parent_v = [memoryview(a) for a in came_from]
+        closed_v = [memoryview(a) for a in closed]
+        array_bytes = cost.nbytes + sum(a.nbytes for a in g_scores + came_from + closed)
+        budget = budget or _SearchBudget()
+        max_open = budget.max_open(array_bytes, HEAP_ENTRY_BYTES)
+        check_at = budget.next_check(0)
+        exceeded = None
+        
+        def expanded():
+            return _expanded_pixels(closed[0] | closed[1], allowed)
+        
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        if source == target:
+            self.path = [start]
+            self.cost = 0.0
+            self.expansions = 0
+            self._record_search(0, 0, array_bytes, expanded)
+            return self.path
+        
+        # Side 0 searches forward from start, side 1 backward from end
+        h_end = self._heuristic_function(cost_map, end, heuristic)
+        h_start = self._heuristic_function(cost_map, start, heuristic, reverse=True)
+        g_v[0][source] = 0.0
+        g_v[1][target] = 0.0
+        open_sets = ([(0.5 * (h_end(*start) - h_start(*start)), source)],
+                     [(-0.5 * (h_end(*end) - h_start(*end)), target)])
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        
+        best_cost = np.inf
+        meeting = -1
+        expansions = 0
+        pushes = 2
+        peak_open = 2
+        
+        while True:
+            # Drop stale entries so the heap tops are valid lower bounds
+            for side in (0, 1):
+                heap = open_sets[side]
+                while heap and closed_v[side][heap[0][1]]:
+                    heappop(heap)
+            if not (open_sets[0] and open_sets[1]):
+                break
+            if open_sets[0][0][0] + open_sets[1][0][0] >= best_cost:
+                break
+            if len(open_sets[0]) + len(open_sets[1]) > peak_open:
+                peak_open = len(open_sets[0]) + len(open_sets[1])
+                if peak_open > max_open:
+                    exceeded = 'memory'
+                    break
+            if expansions >= check_at:
+                exceeded = budget.exceeded(expansions)
+                if exceeded:
+                    break
+                check_at = budget.next_check(expansions)
+            
+            side = 0 if len(open_sets[0]) <= len(open_sets[1]) else 1
+            heap = open_sets[side]
+            g_side = g_v[side]
+            g_other = g_v[1 - side]
+            parent_side = parent_v[side]
+            closed_side = closed_v[side]
+            sign = 1.0 if side == 0 else -1.0
+            
+            current = heappop(heap)[1]
+            closed_side[current] = True
+            expansions += 1
+            row, col = divmod(current, cols)
+            g_current = g_side[current]
+            # Each step costs the pixel being entered: the neighbor when
+            # searching forward, the current pixel when searching backward
+            backward_step = cost_v[current]
+            
+            for dr, dc in DIRECTIONS:
+                nr = row + dr
+                nc = col + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+                
+                neighbor = nr * cols + nc
+                if closed_side[neighbor]:
+                    continue
+                
+                step = cost_v[neighbor] if side == 0 else backward_step
+                tentative_g = g_current + step
+                if tentative_g < g_side[neighbor]:
+                    g_side[neighbor] = tentative_g
+                    parent_side[neighbor] = current
+                    potential = 0.5 * (h_end(nr, nc) - h_start(nr, nc))
+                    heappush(heap, (tentative_g + sign * potential, neighbor))
+                    pushes += 1
+                    
+                    total = tentative_g + g_other[neighbor]
+                    if total < best_cost:
+                        best_cost = total
+                        meeting = neighbor
+        
+        self.expansions = expansions
+        self._record_search(pushes, peak_open, array_bytes + peak_open * HEAP_ENTRY_BYTES, expanded)
+        if exceeded:
+            # Routes not found yet cost at least the two smallest keys
+            lower_bound = min(best_cost, open_sets[0][0][0] + open_sets[1][0][0])
+        if meeting == -1:
+            if exceeded:
+                partial, partial_cost = self._partial_route(_expanded_pixels(closed[0], allowed),
+                                                            parent_v[0], g_v[0], start, end, cols)
+                return self._exceed_budget(exceeded, budget, partial, partial_cost, lower_bound)
+            # No path found
+            return None
+        
+        path = self._reconstruct_path_array(parent_v[0], meeting, cols)
+        current = parent_v[1][meeting]
+        while current != -1:
+            path.append(divmod(current, cols))
+            current = parent_v[1][current]
+        
+        if exceeded:
+            return self._exceed_budget(exceeded, budget, path, best_cost, lower_bound)
+        self.path = path
+        self.cost = best_cost
+        return path
+    
+    def _find_path_lattice(self, cost_map: np.ndarray, start: Tuple[int, int],
+                           end: Tuple[int, int],
+                           allowed: Optional[np.ndarray] = None,
+                           heuristic: str = 'euclidean',
+                           weight: float = 1.0,
+                           budget: Optional[_SearchBudget] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        A* over (pixel, heading) states for curvature-aware routes
+        
+        Each step moves one cell in its heading, which may differ from the
+        previous heading by at most max_turn heading steps and costs
+        turn_penalty per heading step turned. With 16 headings the knight
+        moves enter two pixels, and both are charged and must be allowed;
+        the metric model prices them as the diagonal and straight step the
+        returned route takes, so self.cost minus the turn costs equals the
+        path_statistics total.
+        The route may leave the start in any heading. g-scores, parents and
+        closed flags live in flat arrays indexed by pixel * headings +
+        heading. A summary is stored in self.lattice_report.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use
+            heuristic: Heuristic name (see find_path)
+            weight: Heuristic inflation epsilon (see find_path)
+            budget: Optional search limits (see find_path)
+            
+        Returns:
+            8-connected list of coordinates representing the path, or None
+            if no path found
+        """
+        if self.headings == 8:
+            offsets = DIRECTIONS
+        elif self.headings == 16:
+            offsets = HEADINGS_16
+        else:
+            raise ValueError("Lattice search supports 8 or 16 headings")
+        if not 0 <= self.max_turn <= self.headings // 2:
+            raise ValueError(f"max_turn must be between 0 and {self.headings // 2}")
+        
+        self.queue = 'heap'
+        rows, cols = cost_map.shape
+        n = rows * cols
+        headings = self.headings
+        states = n * headings
+        metric = self.movement == 'metric'
+        
+        # Per heading: offset, origin cost weight and (flat offset, weight)
+        # for every pixel the move enters
+        moves = []
+        for dr, dc in offsets:
+            line_rows, line_cols = raster_line((0, 0), (dr, dc))
+            pixels = len(line_rows) - 1
+            weights = [1.0] * pixels
+            origin_weight = 0.0
+            if metric:
+                # Priced step by step like the returned pixels, as in
+                # path_statistics: each 8-connected step costs its length
+                # times the mean cost of its two pixels
+                lengths = np.hypot(np.diff(line_rows), np.diff(line_cols)).tolist()
+                origin_weight = 0.5 * lengths[0]
+                weights = [0.5 * (a + b) for a, b in zip(lengths, lengths[1:])] + [0.5 * lengths[-1]]
+            entered = tuple((int(r) * cols + int(c), w)
+                            for r, c, w in zip(line_rows[1:], line_cols[1:], weights))
+            moves.append((dr, dc, origin_weight, entered))
+        turns = [[((heading + delta) % headings, self.turn_penalty * abs(delta))
+                  for delta in range(-self.max_turn, self.max_turn + 1)]
+                 for heading in range(headings)]
+        if 2 * self.max_turn == headings:
+            # The opposite heading is reachable both ways; keep it once
+            for successors in turns:
+                successors.pop()
+        
+        cost = np.ascontiguousarray(cost_map, dtype=np.float64).reshape(n)
+        blocked = _initial_closed(allowed, n)
+        g_score = np.full(states, np.inf)
+        came_from = np.full(states, -1, dtype=np.int32 if states < 2 ** 31 else np.int64)
+        closed = np.zeros(states, dtype=bool)
+        
+        cost_v = memoryview(cost)
+        blocked_v = memoryview(blocked)
+        g_v = memoryview(g_score)
+        parent_v = memoryview(came_from)
+        closed_v = memoryview(closed)
+        
+        h = self._heuristic_function(cost_map, end, heuristic)
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        
+        # The route may leave the start in any heading
+        h_start = weight * h(*start)
+        open_set = []
+        for heading in range(headings):
+            g_v[source * headings + heading] = 0.0
+            open_set.append((h_start, source * headings + heading))
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expansions = 0
+        pushes = headings
+        peak_open = headings
+        array_bytes = cost.nbytes + blocked.nbytes + g_score.nbytes + came_from.nbytes + closed.nbytes
+        budget = budget or _SearchBudget()
+        max_open = budget.max_open(array_bytes, HEAP_ENTRY_BYTES)
+        check_at = budget.next_check(0)
+        exceeded = None
+        
+        def expanded():
+            return closed.reshape(n, headings).any(axis=1)
+        
+        
+        while open_set:
+            if len(open_set) > peak_open:
+                peak_open = len(open_set)
+                if peak_open > max_open:
+                    exceeded = 'memory'
+                    break
+            if expansions >= check_at:
+                exceeded = budget.exceeded(expansions)
+                if exceeded:
+                    break
+                check_at = budget.next_check(expansions)
+            state = heappop(open_set)[1]
+            if closed_v[state]:
+                continue
+            
+            pixel, heading = divmod(state, headings)
+            if pixel == target:
+                path = self._reconstruct_lattice_path(parent_v, state, moves, cols)
+                self.path = path
+                self.cost = g_v[state]
+                self.expansions = expansions
+                self._record_search(pushes, peak_open, array_bytes + peak_open * HEAP_ENTRY_BYTES,
+                                    expanded)
+                if weight != 1.0:
+                    self.suboptimality = weight
+                return path
+            
+            closed_v[state] = True
+            expansions += 1
+            row, col = divmod(pixel, cols)
+            g_current = g_v[state]
+            origin_cost = cost_v[pixel]
+            
+            for next_heading, turn_cost in turns[heading]:
+                dr, dc, origin_weight, entered = moves[next_heading]
+                nr = row + dr
+                nc = col + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
+                    continue
+                
+                neighbor = (nr * cols + nc) * headings + next_heading
+                if closed_v[neighbor]:
+                    continue
+                
+                step = origin_cost * origin_weight + turn_cost
+                for offset, pixel_weight in entered:
+                    if blocked_v[pixel + offset]:
+                        break
+                    step += cost_v[pixel + offset] * pixel_weight
+                else:
+                    tentative_g = g_current + step
+                    if tentative_g < g_v[neighbor]:
+                        g_v[neighbor] = tentative_g
+                        parent_v[neighbor] = state
+                        heappush(open_set, (tentative_g + weight * h(nr, nc), neighbor))
+                        pushes += 1
+        
+        self.expansions = expansions
+        self._record_search(pushes, peak_open, array_bytes + peak_open * HEAP_ENTRY_BYTES, expanded)
+        if exceeded:
+            partial, partial_cost = [tuple(start)], 0.0
+            best = _closest_pixel(expanded(), end, cols)
+            if best is not None:
+                # The cheapest expanded heading of that pixel
+                pixel_states = np.arange(best * headings, (best + 1) * headings)
+                state = int(pixel_states[np.argmin(np.where(closed[pixel_states],
+                                                            g_score[pixel_states], np.inf))])
+                partial = self._reconstruct_lattice_path(parent_v, state, moves, cols)
+                partial_cost = g_v[state]
+            lower_bound = open_set[0][0] if weight == 1.0 else None
+            return self._exceed_budget(exceeded, budget, partial, partial_cost, lower_bound)
+        return None
+    
+    def _reconstruct_lattice_path(self, came_from, state: int, moves: list,
+                                  cols: int) -> List[Tuple[int, int]]:
+        """
+        Expand a chain of lattice states into an 8-connected pixel route
+        
+        Args:
+            came_from: Flat parent states (-1 for start states)
+            state: Final state
+            moves: Per-heading move table from _find_path_lattice
+            cols: Number of columns in grid
+            
+        Returns:
+            List of coordinates from start to end
+        """
+        headings = len(moves)
+        chain = [state]
+        while came_from[chain[-1]] != -1:
+            chain.append(came_from[chain[-1]])
+        chain.reverse()
+        
+        path = [divmod(chain[0] // headings, cols)]
+        turns = 0
+        turned = 0
+        previous = None
+        for state in chain[1:]:
+            pixel, heading = divmod(state, headings)
+            dr, dc, _, entered = moves[heading]
+            origin = pixel - dr * cols - dc
+            path.extend(divmod(origin + offset, cols) for offset, _ in entered)
+            if previous is not None and heading != previous:
+                delta = abs(heading - previous)
+                turns += 1
+                turned += min(delta, headings - delta)
+            previous = heading
+        
+        self.lattice_report = {
+            'headings': headings,
+            'states': len(came_from),
+            'turns': turns,
+            'heading_steps_turned': turned,
+            'turn_cost': turned * self.turn_penalty,
+        }
+        return path
+    
+    def _find_path_dict(self, cost_map: np.ndarray, start: Tuple[int, int],
+                        end: Tuple[int, int],
+                        allowed: Optional[np.ndarray] = None) -> Optional[List[Tuple[int, int]]]:
+        """
+        Original A* search keeping its state in dictionaries keyed by tuples
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use
+            
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        self.queue = 'heap'
+        rows, cols = cost_map.shape
+        
+        # Initialize data structures
+        open_set = []
+        heapq.heappush(open_set, (0, start))
+        
+        came_from = {}
+        g_score = {start: 0}
+        f_score = {start: self._heuristic(start, end)}
+        
+        closed_set = set()
+        pushes = 1
+        peak_open = 1
+        
+        def expanded():
+            mask = np.zeros(rows * cols, dtype=bool)
+            if closed_set:
+                mask[[r * cols + c for r, c in closed_set]] = True
+            return mask
+        
+        def structure_bytes():
+            # Containers plus a (row, col) key tuple and float score per entry
+            containers = sum(sys.getsizeof(c) for c in (came_from, g_score, f_score, closed_set))
+            return containers + len(g_score) * DICT_ENTRY_BYTES + peak_open * HEAP_ENTRY_BYTES
+        
+        while open_set:
+            peak_open = max(peak_open, len(open_set))
+            current = heapq.heappop(open_set)[1]
+            
+            if current == end:
+                # Reconstruct path
+                path = self._reconstruct_path(came_from, current)
+                self.path = path
+                self.cost = g_score[end]
+                self.expansions = len(closed_set)
+                self._record_search(pushes, peak_open, structure_bytes(), expanded)
+                return path
+            
+            closed_set.add(current)
+            
+            # Check all neighbors (8-directional movement)
+            for neighbor in self._get_neighbors(current, rows, cols):
+                if neighbor in closed_set:
+                    continue
+                if allowed is not None and not allowed[neighbor]:
+                    continue
+                
+                # Calculate tentative g_score
+                move_cost = cost_map[neighbor[0], neighbor[1]]
+                tentative_g = g_score[current] + move_cost
+                
+                if neighbor not in g_score or tentative_g < g_score[neighbor]:
+                    came_from[neighbor] = current
+                    g_score[neighbor] = tentative_g
+                    f = tentative_g + self._heuristic(neighbor, end)
+                    f_score[neighbor] = f
+                    
+                    # Add to open set if not already there
+                    if neighbor not in [item[1] for item in open_set]:
+                        heapq.heappush(open_set, (f, neighbor))
+                        pushes += 1
+        
+        # No path found
+        self.expansions = len(closed_set)
+        self._record_search(pushes, peak_open, structure_bytes(), expanded)
+        return None
+    
+    def find_path_multiresolution(self, cost_map: np.ndarray, start: Tuple[int, int],
+                                  end: Tuple[int, int], levels: int = 3, corridor_width: int = 8,
+                                  compare_exact: bool = False) -> Optional[List[Tuple[int, int]]]:
+        """
+        Coarse-to-fine routing over a cost map pyramid
+        
+        Solves the route on the cost map downsampled by 2 ** levels, then at
+        each finer level searches only inside a corridor of corridor_width
+        pixels around the upsampled route from the level above. The result
+        is a valid route on the full-resolution cost map, but it can miss
+        cheaper routes outside the corridor. A summary is stored in
+        self.multiresolution_report.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            levels: Number of pyramid levels above full resolution
+            corridor_width: Corridor half-width in pixels at every level
+            compare_exact: Also run the exact search and report how far the
+                coarse-to-fine route deviates from it
+            
+        Returns:
+            List of coordinates representing the path, or None if no path found
+        """
+        rows, cols = cost_map.shape
+        
+        if not (0 <= start[0] < rows and 0 <= start[1] < cols):
+            raise ValueError("Start point out of bounds")
+        if not (0 <= end[0] < rows and 0 <= end[1] < cols):
+            raise ValueError("End point out of bounds")
+        
+        pyramid = build_cost_pyramid(cost_map, levels)
+        top = len(pyramid) - 1
+        searcher = AStarPathfinder(engine=self.engine, movement=self.movement)
+        
+        path = searcher.find_path(pyramid[top], (start[0] >> top, start[1] >> top),
+                                  (end[0] >> top, end[1] >> top))
+        searched = [pyramid[top].size]
+        
+        for level in range(top - 1, -1, -1):
+            if path is None:
+                break
+            
+            level_map = pyramid[level]
+            level_rows, level_cols = level_map.shape
+            
+            # Each coarse pixel covers a 2x2 block of the finer level
+            blocks = np.array(path, dtype=np.int64) * 2
+            r0 = max(int(blocks[:, 0].min()) - corridor_width, 0)
+            r1 = min(int(blocks[:, 0].max()) + 2 + corridor_width, level_rows)
+            c0 = max(int(blocks[:, 1].min()) - corridor_width, 0)
+            c1 = min(int(blocks[:, 1].max()) + 2 + corridor_width, level_cols)
+            
+            corridor = np.zeros((r1 - r0, c1 - c0), dtype=bool)
+            for dr in (0, 1):
+                for dc in (0, 1):
+                    pr = blocks[:, 0] + dr
+                    pc = blocks[:, 1] + dc
+                    inside = (pr < level_rows) & (pc < level_cols)
+                    corridor[pr[inside] - r0, pc[inside] - c0] = True
+            corridor = _dilate(corridor, corridor_width)
+            searched.append(int(corridor.sum()))
+            
+            local = searcher.find_path(level_map[r0:r1, c0:c1],
+                                       ((start[0] >> level) - r0, (start[1] >> level) - c0),
+                                       ((end[0] >> level) - r0, (end[1] >> level) - c0),
+                                       allowed=corridor)
+            path = None if local is None else [(r + r0, c + c0) for r, c in local]
+        
+        report = {
+            'levels': top,
+            'corridor_width': corridor_width,
+            'searched_pixels': searched,
+            'searched_fraction': searched[-1] / cost_map.size,
+            'cost': None,
+        }
+        self.multiresolution_report = report
+        if path is None:
+            return None
+        
+        self.path = path
+        self.cost = searcher.cost
+        report['cost'] = self.cost
+        
+        if compare_exact:
+            exact = AStarPathfinder(engine=self.engine, movement=self.movement)
+            exact_path = exact.find_path(cost_map, start, end)
+            report['exact_cost'] = exact.cost
+            report['cost_deviation'] = self.cost / exact.cost - 1.0 if exact.cost else 0.0
+            route = np.array(path, dtype=np.int64)
+            exact_route = np.array(exact_path, dtype=np.int64)
+            shared = np.intersect1d(route[:, 0] * cols + route[:, 1],
+                                    exact_route[:, 0] * cols + exact_route[:, 1])
+            report['overlap'] = len(shared) / len(exact_route)
+        
+        return path
+    
+    def find_path_via(self, cost_map: np.ndarray, waypoints, allowed: Optional[np.ndarray] = None,
+                      heuristic: str = 'euclidean', weight: float = 1.0,
+                      optimize_order: bool = False,
+                      processes: Optional[int] = 1) -> Optional[PixelPath]:
+        """
+        Route from the first to the last waypoint through every waypoint
+        
+        Each leg between consecutive waypoints is an independent find_path
+        query with this pathfinder's settings, so the legs can run
+        concurrently in a process pool; the cost map is sent to each worker
+        once. The lattice engine starts every leg in a free heading. A
+        summary is stored in self.waypoint_report: the visit order, the
+        ordered waypoints, the leg costs, the route index of every waypoint
+        and the total cost.
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            waypoints: Sequence of (row, col) points: start, via points, end
+            allowed: Optional boolean mask of the pixels the route may use
+            heuristic: Heuristic name (see find_path)
+            weight: Heuristic inflation epsilon (see find_path)
+            optimize_order: Visit the via points in the cheapest order (start
+                and end stay fixed); exact for up to MAX_ORDERED_WAYPOINTS
+                via points, using the route costs between all waypoints
+            processes: Number of worker processes (1 runs in this process,
+                None uses every core)
+            
+        Returns:
+            PixelPath of the stitched route, or None if a leg has no path
+        """
+        points = _as_points(waypoints)
+        if len(points) < 2:
+            raise ValueError("At least a start and an end waypoint are required")
+        vias = len(points) - 2
+        if optimize_order and vias > MAX_ORDERED_WAYPOINTS:
+            raise ValueError(f"Order optimization supports at most {MAX_ORDERED_WAYPOINTS} via points")
+        
+        self.waypoint_report = None
+        settings = {
+            'engine': self.engine,
+            'landmarks': self.landmarks,
+            'movement': self.movement,
+            'headings': self.headings,
+            'max_turn': self.max_turn,
+            'turn_penalty': self.turn_penalty,
+        }
+        query = (allowed, heuristic, weight)
+        
+        order = list(range(len(points)))
+        if optimize_order and vias > 1:
+            simple = (allowed is None and self.movement == 'cell'
+                      and self.engine != 'lattice' and weight == 1.0)
+            if simple:
+                # One multi-target search per waypoint gives the same costs
+                matrix = cost_matrix(cost_map, points, points, processes=processes)
+            else:
+                pairs = [(a, b) for a in range(len(points)) for b in range(len(points)) if a != b]
+                results = _solve_legs(cost_map, settings, query,
+                                      [(points[a], points[b]) for a, b in pairs], processes)
+                matrix = np.zeros((len(points), len(points)))
+                for (a, b), (_, leg_cost) in zip(pairs, results):
+                    matrix[a, b] = np.inf if leg_cost is None else leg_cost
+            order = _best_visit_order(matrix)
+        
+        ordered = [points[i] for i in order]
+        legs = _solve_legs(cost_map, settings, query, list(zip(ordered, ordered[1:])), processes)
+        
+        self.waypoint_report = {
+            'order': order,
+            'waypoints': ordered,
+            'leg_costs': [leg_cost for _, leg_cost in legs],
+            'waypoint_indices': None,
+            'cost': None,
+        }
+        if any(path is None for path, _ in legs):
+            return None
+        
+        path = PixelPath(np.concatenate([legs[0][0].points] +
+                                        [leg_path.points[1:] for leg_path, _ in legs[1:]]))
+        self.path = path
+        self.cost = sum(leg_cost for _, leg_cost in legs)
+        self.waypoint_report['cost'] = self.cost
+        # Route index of every waypoint, where one leg ends and the next starts
+        self.waypoint_report['waypoint_indices'] = np.cumsum(
+            [0] + [len(leg_path) - 1 for leg_path, _ in legs]).tolist()
+        return path
     
-    def find_path(self, cost_map: np.ndarray, start: Tuple[int, int], 
-                  end: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+    def find_path_any_angle(self, cost_map: np.ndarray, start: Tuple[int, int],
+                            end: Tuple[int, int], allowed: Optional[np.ndarray] = None,
+                            heuristic: str = 'euclidean',
+                            compare_grid: bool = False) -> Optional[List[Tuple[int, int]]]:
         """
-        Find optimal path using A* algorithm
+        Any-angle route search (Theta*) with line-of-sight over the raster
+        
+        Pixels are reached through the grid as in find_path; when a pixel is
+        expanded, the search tries linking it straight to its parent's parent
+        instead (Lazy Theta*), so there is one line-of-sight check per
+        expansion. The straight segment is rasterized and costs the sum of the
+        pixels it enters, the same as a grid route through those pixels, and
+        it is only used when none of them is disallowed and it is not more
+        expensive. The route is returned as its corner vertices;
+        rasterize_path() gives every pixel. A summary is stored in
+        self.any_angle_report.
         
         Args:
             cost_map: 2D array of terrain costs
             start: Starting coordinates (row, col)
             end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use
+            heuristic: Heuristic name (see find_path)
+            compare_grid: Also run the 8-connected search and report its cost
+                and geometric length
             
         Returns:
-            List of coordinates representing the path, or None if no path found
+            List of route vertices (row, col), or None if no path found
         """
+        self.any_angle_report = None
+        if self.movement != 'cell':
+            raise ValueError("Any-angle search only supports the cell movement model")
+        if not self._validate_query(cost_map, start, end, allowed, heuristic):
+            return None
+        
+        self.queue = 'heap'
         rows, cols = cost_map.shape
+        n = rows * cols
         
-        # Validate start and end points
-        if not (0 <= start[0] < rows and 0 <= start[1] < cols):
-            raise ValueError("Start point out of bounds")
-        if not (0 <= end[0] < rows and 0 <= end[1] < cols):
-            raise ValueError("End point out of bounds")
+        cost = np.ascontiguousarray(cost_map, dtype=np.float64).reshape(n)
+        blocked = _initial_closed(allowed, n)
+        g_score = np.full(n, np.inf)
+        came_from = np.full(n, -1, dtype=np.int64)
+        closed = blocked.copy()
         
-        # Initialize data structures
-        open_set = []
-        heapq.heappush(open_set, (0, start))
+        cost_v = memoryview(cost)
+        blocked_v = memoryview(blocked)
+        g_v = memoryview(g_score)
+        parent_v = memoryview(came_from)
+        closed_v = memoryview(closed)
         
-        came_from = {}
-        g_score = {start: 0}
-        f_score = {start: self._heuristic(start, end)}
+        h = self._heuristic_function(cost_map, end, heuristic)
+        source = start[0] * cols + start[1]
+        target = end[0] * cols + end[1]
+        g_v[source] = 0.0
+        parent_v[source] = source
         
-        closed_set = set()
+        open_set = [(h(*start), source)]
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        expansions = 0
         
         while open_set:
-            current = heapq.heappop(open_set)[1]
+            current = heappop(open_set)[1]
+            if closed_v[current]:
+                continue
             
-            if current == end:
-                # Reconstruct path
-                path = self._reconstruct_path(came_from, current)
-                self.path = path
-                self.cost = g_score[end]
-                return path
+            # Lazy line-of-sight: try linking the pixel straight to its
+            # parent's parent once, when it is expanded
+            parent = parent_v[current]
+            grandparent = parent_v[parent]
+            if grandparent != parent:
+                line_cost, clear = _line_cost(cost, blocked, cost_v, blocked_v, cols,
+                                              grandparent, current)
+                straight_g = g_v[grandparent] + line_cost
+                if clear and straight_g <= g_v[current]:
+                    g_v[current] = straight_g
+                    parent_v[current] = grandparent
             
-            closed_set.add(current)
+            if current == target:
+                break
             
-            # Check all neighbors (8-directional movement)
-            for neighbor in self._get_neighbors(current, rows, cols):
-                if neighbor in closed_set:
+            closed_v[current] = True
+            expansions += 1
+            row, col = divmod(current, cols)
+            g_current = g_v[current]
+            
+            for dr, dc in DIRECTIONS:
+                nr = row + dr
+                nc = col + dc
+                if not (0 <= nr < rows and 0 <= nc < cols):
                     continue
                 
-                # Calculate tentative g_score
-                move_cost = cost_map[neighbor[0], neighbor[1]]
-                tentative_g = g_score[current] + move_cost
+                neighbor = nr * cols + nc
+                if closed_v[neighbor]:
+                    continue
                 
-                if neighbor not in g_score or tentative_g < g_score[neighbor]:
-                    came_from[neighbor] = current
-                    g_score[neighbor] = tentative_g
-                    f = tentative_g + self._heuristic(neighbor, end)
-                    f_score[neighbor] = f
-                    
-                    # Add to open set if not already there
-                    if neighbor not in [item[1] for item in open_set]:
-                        heapq.heappush(open_set, (f, neighbor))
+                tentative_g = g_current + cost_v[neighbor]
+                if tentative_g < g_v[neighbor]:
+                    g_v[neighbor] = tentative_g
+                    parent_v[neighbor] = current
+                    heappush(open_set, (tentative_g + h(nr, nc), neighbor))
         
-        # No path found
-        return None
+        self.expansions = expansions
+        if g_v[target] == np.inf:
+            return None
+        
+        vertices = [end]
+        current = target
+        while current != source:
+            current = parent_v[current]
+            vertices.append(divmod(current, cols))
+        vertices.reverse()
+        
+        self.path = vertices
+        self.cost = g_v[target]
+        report = {
+            'vertices': len(vertices),
+            'length': path_length(vertices),
+            'cost': self.cost,
+        }
+        if compare_grid:
+            grid = AStarPathfinder(engine=self.engine, landmarks=self.landmarks)
+            grid_path = grid.find_path(cost_map, start, end, allowed=allowed, heuristic=heuristic)
+            report['grid_cost'] = grid.cost
+            report['grid_length'] = path_length(grid_path)
+            report['grid_vertices'] = len(grid_path)
+        self.any_angle_report = report
+        return vertices
+    
+    def _heuristic_function(self, cost_map: np.ndarray, point: Tuple[int, int], heuristic: str,
+                            reverse: bool = False, integer: bool = False):
+        """
+        Build the heuristic used by the array-backed engines
+        
+        Args:
+            cost_map: 2D array of terrain costs
+            point: Goal of the search (or its origin when reverse is set)
+            heuristic: Heuristic name (see find_path)
+            reverse: Bound the cost from point to a pixel instead of from a
+                pixel to point
+            integer: Floor the estimates, as the bucket queue requires
+            
+        Returns:
+            Function h(row, col) giving a lower bound on the remaining cost
+        """
+        if heuristic == 'euclidean':
+            point_row, point_col = point
+            if integer:
+                def h(row, col):
+                    return isqrt((row - point_row) ** 2 + (col - point_col) ** 2)
+            else:
+                def h(row, col):
+                    return sqrt((row - point_row) ** 2 + (col - point_col) ** 2)
+            return h
+        elif heuristic == 'scaled':
+            # Every step costs at least the cheapest pixel times its length
+            # (1 in the cell model), so a route costs at least the Chebyshev
+            # distance, or the octile distance in the metric model, times it
+            scale = max(float(np.min(cost_map)), 0.0) if cost_map.size else 0.0
+            point_row, point_col = point
+            if self.movement == 'metric' and self.engine == 'lattice' and self.headings == 16:
+                # Knight moves are shorter than their octile distance
+                def h(row, col):
+                    return scale * sqrt((row - point_row) ** 2 + (col - point_col) ** 2)
+            elif self.movement == 'metric':
+                diagonal_extra = sqrt(2) - 1
+                
+                def h(row, col):
+                    dr = abs(row - point_row)
+                    dc = abs(col - point_col)
+                    return scale * (max(dr, dc) + diagonal_extra * min(dr, dc))
+            elif integer:
+                def h(row, col):
+                    return int(scale * max(abs(row - point_row), abs(col - point_col)))
+            else:
+                def h(row, col):
+                    return scale * max(abs(row - point_row), abs(col - point_col))
+            return h
+        elif heuristic == 'alt':
+            bound = landmark_table(cost_map, self.landmarks).bound_function(cost_map, point, reverse)
+            if integer:
+                def h(row, col):
+                    # Bounds are non-negative, so int() floors them
+                    return int(bound(row, col))
+                return h
+            return bound
+        else:
+            raise ValueError(f"Unknown heuristic: {heuristic}")
+    
+    def _achieved_suboptimality(self, open_set: list, g_v, closed_v, h, cols: int,
+                                lower: float) -> float:
+        """
+        Ratio between a weighted search's route cost and a lower bound on the optimum
+        
+        The optimal cost is at least the smallest g + h over the pixels still
+        open and the improvements the search skipped on closed pixels.
+        
+        Args:
+            open_set: Heap left by the search
+            g_v: Flat g-scores
+            closed_v: Flat closed flags
+            h: Uninflated heuristic function
+            cols: Number of columns in grid
+            lower: Route cost, or a smaller bound already known
+            
+        Returns:
+            Achieved suboptimality (1.0 means provably optimal)
+        """
+        cost = self.cost
+        for _, index in open_set:
+            if not closed_v[index]:
+                row, col = divmod(index, cols)
+                bound = g_v[index] + h(row, col)
+                if bound < lower:
+                    lower = bound
+        return cost / lower if lower > 0 else 1.0
     
     def _heuristic(self, point1: Tuple[int, int], point2: Tuple[int, int]) -> float:
         """
@@ -108,13 +1949,7 @@ class AStarPathfinder:
         neighbors = []
         row, col = point
         
-        # 8 directions: N, NE, E, SE, S, SW, W, NW
-        directions = [
-            (-1, 0), (-1, 1), (0, 1), (1, 1),
-            (1, 0), (1, -1), (0, -1), (-1, -1)
-        ]
-        
-        for dr, dc in directions:
+        for dr, dc in DIRECTIONS:
             new_row, new_col = row + dr, col + dc
             if 0 <= new_row < rows and 0 <= new_col < cols:
                 neighbors.append((new_row, new_col))
@@ -139,26 +1974,1043 @@ class AStarPathfinder:
         path.reverse()
         return path
     
-    def get_path_statistics(self, cost_map: np.ndarray) -> dict:
+    def _reconstruct_path_array(self, came_from, current: int, cols: int) -> List[Tuple[int, int]]:
+        """
+        Reconstruct path from a flat parent array
+        
+        Args:
+            came_from: Flat array of predecessor indices (-1 for none)
+            current: Flat index of the end point
+            cols: Number of columns in grid
+            
+        Returns:
+            List of points forming the path
+        """
+        path = []
+        while current != -1:
+            path.append(divmod(current, cols))
+            current = came_from[current]
+        path.reverse()
+        return path
+    
+    def get_path_statistics(self, cost_map: np.ndarray,
+                            class_map: Optional[np.ndarray] = None) -> dict:
         """
         Get statistics about the found path
         
         Args:
             cost_map: The cost map used for pathfinding
+            class_map: Optional land cover mask for the per-class breakdown
             
         Returns:
-            Dictionary with path statistics
+            Dictionary with path statistics (see path_statistics)
         """
         if self.path is None:
             return None
         
-        total_cost = sum(cost_map[p[0], p[1]] for p in self.path)
-        avg_cost = total_cost / len(self.path)
+        return path_statistics(cost_map, self.path, class_map, self.movement)
+
+
+def _fingerprint_weights() -> np.ndarray:
+    """Per-word multipliers of cost_map_fingerprint, built on first use"""
+    global _word_weights
+    if _word_weights is None:
+        # Odd multipliers make every word change alter its block checksum
+        _word_weights = ((2 * np.arange(FINGERPRINT_BLOCK_WORDS, dtype=np.uint64) + 1)
+                         * np.uint64(0x9E3779B97F4A7C15))
+    return _word_weights
+
+
+def cost_map_fingerprint(cost_map: np.ndarray) -> str:
+    """
+    Cheap content hash identifying a cost map (or any array)
+    
+    Each block of 8-byte words is reduced to a position-weighted checksum
+    with NumPy, and only the block checksums are hashed. This reads the
+    map at memory speed, several times faster than hashing every byte.
+    The checksum is not cryptographic: it catches any single changed
+    word, but maps crafted to collide are possible.
+    
+    Args:
+        cost_map: 2D array of terrain costs
         
-        return {
-            'length': len(self.path),
-            'total_cost': float(total_cost),
-            'average_cost': float(avg_cost),
-            'start': self.path[0],
-            'end': self.path[-1]
-        }
+    Returns:
+        Hex digest covering the shape, dtype and cost values
+    """
+    data = np.ascontiguousarray(cost_map).reshape(-1).view(np.uint8)
+    tail = data.size % 8
+    words = data[:data.size - tail].view(np.uint64)
+    weights = _fingerprint_weights()
+    
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{cost_map.shape}{cost_map.dtype.str}".encode())
+    checksums = np.empty((words.size + FINGERPRINT_BLOCK_WORDS - 1) // FINGERPRINT_BLOCK_WORDS,
+                         dtype=np.uint64)
+    for block, offset in enumerate(range(0, words.size, FINGERPRINT_BLOCK_WORDS)):
+        chunk = words[offset:offset + FINGERPRINT_BLOCK_WORDS]
+        checksums[block] = (chunk * weights[:chunk.size]).sum(dtype=np.uint64)
+    digest.update(checksums.tobytes())
+    digest.update(data[data.size - tail:].tobytes())
+    return digest.hexdigest()
+
+
+def _as_points(points) -> List[Tuple[int, int]]:
+    """Normalize a single (row, col) point or a sequence of points to a list of tuples"""
+    arr = np.asarray(points, dtype=np.int64)
+    if arr.size == 0:
+        return []
+    if arr.ndim == 1:
+        arr = arr.reshape(1, 2)
+    if arr.ndim != 2 or arr.shape[1] != 2:
+        raise ValueError("Points must be (row, col) pairs")
+    return [(int(r), int(c)) for r, c in arr]
+
+
+def cost_distance(cost_map: np.ndarray, source, targets=None,
+                  engine: str = 'dijkstra') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Accumulated cost from a source to every pixel (whole-raster Dijkstra)
+    
+    Uses the same movement model as AStarPathfinder.find_path: each step
+    costs the value of the pixel being entered, so distance[end] equals the
+    cost of find_path(cost_map, source, end). Distances, backlinks and closed
+    flags are kept in flat NumPy arrays with a lazy-deletion heap; the
+    'sweep' engine computes the same field with sweep_cost_distance instead.
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        source: Source coordinates (row, col), or a sequence of them
+        targets: Optional sequence of (row, col) points; the search stops as
+            soon as all of them are settled. Pixels that were not settled
+            by then hold upper bounds rather than exact costs. The sweep
+            engine always computes the whole field.
+        engine: 'dijkstra' or 'sweep'
+        
+    Returns:
+        distance: Accumulated cost raster (float64, inf where unreachable)
+        backlink: Direction raster (uint8); a value k < 8 means the previous
+            pixel on the cheapest route lies at DIRECTIONS[k] from this pixel,
+            sources hold SOURCE_BACKLINK and unreached pixels NO_BACKLINK
+    """
+    if engine not in COST_DISTANCE_ENGINES:
+        raise ValueError(f"Unknown engine: {engine}")
+    if engine == 'sweep':
+        # The sweep module builds on this one, so it is imported on first use
+        from sweep import sweep_cost_distance
+        distance, backlink, _ = sweep_cost_distance(cost_map, source)
+        return distance, backlink
+    
+    rows, cols = cost_map.shape
+    n = rows * cols
+    sources = _as_points(source)
+    for row, col in sources:
+        if not (0 <= row < rows and 0 <= col < cols):
+            raise ValueError("Source point out of bounds")
+    
+    pending = None
+    if targets is not None:
+        pending = set()
+        for row, col in _as_points(targets):
+            if not (0 <= row < rows and 0 <= col < cols):
+                raise ValueError("Target point out of bounds")
+            pending.add(row * cols + col)
+    
+    cost = np.ascontiguousarray(cost_map, dtype=np.float64).reshape(n)
+    distance = np.full(n, np.inf)
+    backlink = np.full(n, NO_BACKLINK, dtype=np.uint8)
+    closed = np.zeros(n, dtype=bool)
+    
+    cost_v = memoryview(cost)
+    dist_v = memoryview(distance)
+    back_v = memoryview(backlink)
+    closed_v = memoryview(closed)
+    
+    open_set = []
+    for row, col in sources:
+        index = row * cols + col
+        dist_v[index] = 0.0
+        back_v[index] = SOURCE_BACKLINK
+        open_set.append((0.0, index))
+    heapq.heapify(open_set)
+    heappush = heapq.heappush
+    heappop = heapq.heappop
+    
+    # Each move paired with the backlink code pointing back along it
+    moves = [(dr, dc, (k + 4) % 8) for k, (dr, dc) in enumerate(DIRECTIONS)]
+    
+    while open_set:
+        d, current = heappop(open_set)
+        if closed_v[current]:
+            continue
+        closed_v[current] = True
+        
+        if pending is not None and current in pending:
+            pending.discard(current)
+            if not pending:
+                break
+        
+        row, col = divmod(current, cols)
+        
+        for dr, dc, back in moves:
+            nr = row + dr
+            nc = col + dc
+            if not (0 <= nr < rows and 0 <= nc < cols):
+                continue
+            
+            neighbor = nr * cols + nc
+            if closed_v[neighbor]:
+                continue
+            
+            nd = d + cost_v[neighbor]
+            if nd < dist_v[neighbor]:
+                dist_v[neighbor] = nd
+                back_v[neighbor] = back
+                heappush(open_set, (nd, neighbor))
+    
+    return distance.reshape(rows, cols), backlink.reshape(rows, cols)
+
+
+def trace_path(backlink: np.ndarray, target: Tuple[int, int]) -> Optional[List[Tuple[int, int]]]:
+    """
+    Trace the cheapest route to a target through a backlink raster
+    
+    Runs in O(path length) regardless of the raster size.
+    
+    Args:
+        backlink: Direction raster returned by cost_distance
+        target: Target coordinates (row, col)
+        
+    Returns:
+        List of coordinates from the source to the target, or None if the
+        target was not reached
+    """
+    rows, cols = backlink.shape
+    row, col = target
+    if not (0 <= row < rows and 0 <= col < cols):
+        raise ValueError("Target point out of bounds")
+    
+    flat = memoryview(np.ascontiguousarray(backlink).reshape(-1))
+    code = flat[row * cols + col]
+    if code == NO_BACKLINK:
+        return None
+    
+    path = [(row, col)]
+    while code != SOURCE_BACKLINK:
+        dr, dc = DIRECTIONS[code]
+        row += dr
+        col += dc
+        path.append((row, col))
+        code = flat[row * cols + col]
+    path.reverse()
+    return path
+
+
+def raster_line(start: Tuple[int, int], end: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Pixels on the 8-connected raster line between two points
+    
+    Args:
+        start: First point (row, col)
+        end: Last point (row, col)
+        
+    Returns:
+        (rows, cols) arrays from start to end, both included
+    """
+    dr = end[0] - start[0]
+    dc = end[1] - start[1]
+    steps = max(abs(dr), abs(dc))
+    t = np.arange(steps + 1, dtype=np.int64)
+    if steps == 0:
+        return t + start[0], t + start[1]
+    # Round t * d / steps to the nearest integer, halves away from start
+    rows = start[0] + np.sign(dr) * ((2 * t * abs(dr) + steps) // (2 * steps))
+    cols = start[1] + np.sign(dc) * ((2 * t * abs(dc) + steps) // (2 * steps))
+    return rows, cols
+
+
+def _line_cost(cost: np.ndarray, blocked: np.ndarray, cost_v, blocked_v, cols: int,
+               origin: int, target: int) -> Tuple[float, bool]:
+    """
+    Cost of the raster line between two flat indices
+    
+    Uses the same pixels as raster_line. A line costs the sum of the pixels
+    it enters, so the origin is not counted. Long lines are gathered with
+    one vectorized index computation.
+    
+    Returns:
+        (line cost, clear) where clear is False if the line enters a
+        blocked pixel
+    """
+    origin_row, origin_col = divmod(origin, cols)
+    target_row, target_col = divmod(target, cols)
+    dr = target_row - origin_row
+    dc = target_col - origin_col
+    abs_dr = abs(dr)
+    abs_dc = abs(dc)
+    steps = abs_dr if abs_dr > abs_dc else abs_dc
+    twice = 2 * steps
+    row_step = cols if dr > 0 else -cols
+    col_step = 1 if dc > 0 else -1
+    
+    if steps <= SHORT_LINE:
+        total = 0.0
+        for t2 in range(2, twice + 1, 2):
+            index = origin + (t2 * abs_dr + steps) // twice * row_step + (t2 * abs_dc + steps) // twice * col_step
+            if blocked_v[index]:
+                return total, False
+            total += cost_v[index]
+        return total, True
+    
+    t2 = _RAMP[:steps] if steps <= len(_RAMP) else np.arange(2, twice + 1, 2, dtype=np.int64)
+    index = origin + (t2 * abs_dr + steps) // twice * row_step + (t2 * abs_dc + steps) // twice * col_step
+    return float(cost[index].sum()), not blocked[index].any()
+
+
+def rasterize_path(vertices: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """
+    Expand route vertices (e.g. from find_path_any_angle) into every pixel
+    
+    Args:
+        vertices: Route corner points (row, col)
+        
+    Returns:
+        8-connected list of coordinates along the route
+    """
+    path = [tuple(vertices[0])]
+    for a, b in zip(vertices, vertices[1:]):
+        rows, cols = raster_line(a, b)
+        path.extend(zip(rows[1:].tolist(), cols[1:].tolist()))
+    return path
+
+
+def _shortcut_costs(cost: np.ndarray, blocked: Optional[np.ndarray], origin: np.ndarray,
+                    targets: np.ndarray, movement: str) -> np.ndarray:
+    """
+    Costs of the raster lines from one point to many, in one vectorized pass
+    
+    Lines use the pixels of raster_line and are priced like route steps:
+    the pixels entered ('cell') or step length times the mean cost of both
+    pixels ('metric'). The lines are laid out as rows of a (targets, steps)
+    grid, masked beyond each line's own length.
+    
+    Args:
+        cost: 2D float64 cost map
+        blocked: Optional boolean mask of pixels lines may not enter
+        origin: (row, col) of the common start
+        targets: (J, 2) line ends
+        movement: Step cost model
+        
+    Returns:
+        (J,) line costs, inf for lines entering a blocked pixel
+    """
+    delta = targets - origin
+    size = np.abs(delta)
+    steps = size.max(axis=1)
+    span = np.maximum(steps, 1)[:, None]
+    t2 = 2 * np.arange(steps.max() + 1, dtype=np.int64)[None, :]
+    valid = t2[:, 1:] <= 2 * steps[:, None]
+    
+    # t = 0 is the origin; entries past a line's end repeat the origin
+    rows = origin[0] + np.sign(delta[:, :1]) * ((t2 * size[:, :1] + span) // (2 * span))
+    cols = origin[1] + np.sign(delta[:, 1:]) * ((t2 * size[:, 1:] + span) // (2 * span))
+    rows[:, 1:][~valid] = origin[0]
+    cols[:, 1:][~valid] = origin[1]
+    pixels = cost[rows, cols]
+    
+    if movement == 'metric':
+        diagonal = (np.diff(rows, axis=1) != 0) & (np.diff(cols, axis=1) != 0)
+        segments = 0.5 * (pixels[:, :-1] + pixels[:, 1:]) * np.where(diagonal, sqrt(2), 1.0)
+    else:
+        segments = pixels[:, 1:]
+    totals = np.where(valid, segments, 0.0).sum(axis=1)
+    if blocked is not None:
+        totals[(blocked[rows[:, 1:], cols[:, 1:]] & valid).any(axis=1)] = np.inf
+    return totals
+
+
+def simplify_path(cost_map: np.ndarray, path, allowed: Optional[np.ndarray] = None,
+                  movement: str = 'cell', keep=None) -> List[Tuple[int, int]]:
+    """
+    Reduce a pixel route to corner vertices without making it more expensive
+    
+    Visibility-based shortcutting: from each vertex the route jumps to the
+    farthest later route pixel whose raster line costs no more than the
+    stretch of route it replaces and stays inside allowed. Candidate lines
+    are priced in batches of SHORTCUT_BATCH with one vectorized gather per
+    batch, and batches continue along the route while any candidate in the
+    previous one was accepted. rasterize_path(vertices) is therefore an
+    8-connected route from the same start to the same end whose cost is at
+    most the original cost, while the vertex list is much shorter to draw
+    and store. Shortcuts ignore heading limits, so routes of the lattice
+    engine may turn more sharply once simplified. Shortcuts never skip a
+    pixel listed in keep, so via points stay on the route and each leg is
+    simplified on its own.
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        path: 8-connected route (list of (row, col), PixelPath or (N, 2) array)
+        allowed: Optional boolean mask of the pixels the route may use
+        movement: Step cost model of the route (see AStarPathfinder)
+        keep: Optional route indices that must stay vertices (e.g.
+            waypoint_report['waypoint_indices'] of find_path_via)
+        
+    Returns:
+        List of route vertices (row, col), starting and ending with the
+        route's end points
+    """
+    if movement not in MOVEMENTS:
+        raise ValueError(f"Unknown movement model: {movement}")
+    points = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+    if len(points) < 3:
+        return [tuple(point) for point in points.tolist()]
+    
+    cost = np.asarray(cost_map, dtype=np.float64)
+    blocked = None if allowed is None else ~np.asarray(allowed, dtype=bool)
+    
+    # Cost of the route up to each of its pixels
+    cells = cost[points[:, 0], points[:, 1]]
+    if movement == 'metric':
+        diagonal = np.all(np.diff(points, axis=0) != 0, axis=1)
+        steps = 0.5 * (cells[:-1] + cells[1:]) * np.where(diagonal, sqrt(2), 1.0)
+    else:
+        steps = cells[1:]
+    prefix = np.concatenate(([0.0], np.cumsum(steps)))
+    
+    n = len(points)
+    kept = np.unique(np.asarray([] if keep is None else keep, dtype=np.int64))
+    if kept.size and (kept[0] < 0 or kept[-1] >= n):
+        raise ValueError("Kept route indices out of range")
+    vertices = [0]
+    anchor = 0
+    while anchor < n - 1:
+        # Shortcuts end at the next kept pixel at the latest
+        stop = n - 1
+        following = np.searchsorted(kept, anchor, side='right')
+        if following < kept.size:
+            stop = int(kept[following])
+        best = anchor + 1
+        low = anchor + 2
+        while low <= stop:
+            high = min(low + SHORTCUT_BATCH, stop + 1)
+            lines = _shortcut_costs(cost, blocked, points[anchor], points[low:high], movement)
+            stretch = prefix[low:high] - prefix[anchor]
+            # Relative slack absorbs rounding between the two summation orders
+            accepted = np.flatnonzero(lines <= stretch + 1e-9 * np.abs(stretch))
+            if not accepted.size:
+                break
+            best = low + int(accepted[-1])
+            low = high
+        vertices.append(best)
+        anchor = best
+    
+    return [tuple(point) for point in points[vertices].tolist()]
+
+
+def polygon_mask(shape: Tuple[int, int], vertices) -> np.ndarray:
+    """
+    Boolean mask of the pixels inside or on the border of a polygon
+    
+    Every edge toggles the pixels right of where it crosses each pixel row,
+    and a cumulative sum along the rows gives the even-odd inside test for
+    all pixels at once.
+    
+    Args:
+        shape: (rows, cols) of the mask
+        vertices: Polygon corners (row, col), at least 3
+        
+    Returns:
+        Boolean array of the given shape
+    """
+    rows, cols = shape
+    points = np.asarray(vertices, dtype=np.float64)
+    if points.ndim != 2 or points.shape[1] != 2 or len(points) < 3:
+        raise ValueError("A polygon needs at least 3 (row, col) vertices")
+    
+    toggles = np.zeros((rows, cols + 1), dtype=np.uint8)
+    for (r0, c0), (r1, c1) in zip(points, np.roll(points, -1, axis=0)):
+        if r0 == r1:
+            continue
+        # Pixel rows in [min, max) of the edge, so shared vertices count once
+        edge_rows = np.arange(max(int(np.ceil(min(r0, r1))), 0), min(int(np.ceil(max(r0, r1))), rows))
+        crossing = c0 + (edge_rows - r0) * (c1 - c0) / (r1 - r0)
+        np.add.at(toggles, (edge_rows, np.clip(np.ceil(crossing), 0, cols).astype(np.int64)), 1)
+    # The uint8 sums wrap, which keeps their parity
+    inside = (np.cumsum(toggles, axis=1, dtype=np.uint8)[:, :cols] & 1).astype(bool)
+    
+    # Include the border so thin polygons and the vertices themselves count
+    corners = [(int(round(r)), int(round(c))) for r, c in points]
+    for a, b in zip(corners, corners[1:] + corners[:1]):
+        line_rows, line_cols = raster_line(a, b)
+        valid = (line_rows >= 0) & (line_rows < rows) & (line_cols >= 0) & (line_cols < cols)
+        inside[line_rows[valid], line_cols[valid]] = True
+    return inside
+
+
+def route_mask(cost_map: np.ndarray, allowed: Optional[np.ndarray] = None,
+               no_go: Optional[np.ndarray] = None, corridor=None,
+               obstacle_cost: Optional[float] = None) -> Optional[np.ndarray]:
+    """
+    Combine route restrictions into one mask of the pixels a route may use
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        allowed: Optional boolean mask of the pixels the route may use
+        no_go: Optional boolean mask of pixels the route must avoid
+        corridor: Optional planning corridor, as a boolean or 0/1 integer
+            mask of the cost map's shape, or (K, 2) polygon vertices (row, col)
+        obstacle_cost: Optional cost from which pixels are impassable
+        
+    Returns:
+        Boolean mask of the allowed pixels, or None without restrictions
+    """
+    masks = []
+    if allowed is not None:
+        masks.append(np.asarray(allowed, dtype=bool))
+    if no_go is not None:
+        masks.append(~np.asarray(no_go, dtype=bool))
+    if corridor is not None:
+        corridor = np.asarray(corridor)
+        if corridor.shape == cost_map.shape and (corridor.dtype == bool
+                                                 or np.issubdtype(corridor.dtype, np.integer)):
+            masks.append(corridor.astype(bool))
+        elif corridor.ndim == 2 and corridor.shape[1] == 2:
+            masks.append(polygon_mask(cost_map.shape, corridor))
+        else:
+            raise ValueError("Corridor must be a mask of the cost map's shape or (K, 2) polygon vertices")
+    if obstacle_cost is not None:
+        masks.append(cost_map < obstacle_cost)
+    if not masks:
+        return None
+    
+    for mask in masks:
+        if mask.shape != cost_map.shape:
+            raise ValueError("Route masks must have the same shape as the cost map")
+    combined = masks[0]
+    for mask in masks[1:]:
+        combined = combined & mask
+    return combined
+
+
+def path_length(path: List[Tuple[int, int]]) -> float:
+    """Geometric length of a route in pixels (Euclidean length of its segments)"""
+    points = np.asarray(path, dtype=np.float64)
+    if len(points) < 2:
+        return 0.0
+    return float(np.hypot(*np.diff(points, axis=0).T).sum())
+
+
+def path_statistics(cost_map: np.ndarray, path, class_map: Optional[np.ndarray] = None,
+                    movement: str = 'metric') -> dict:
+    """
+    Metric length and cost breakdown of a route in one vectorized pass
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        path: 8-connected route as a list of (row, col) or an (N, 2) array
+        class_map: Optional land cover mask; adds cost and length per class
+        movement: Step cost model (see AStarPathfinder)
+        
+    Returns:
+        Dictionary with the metric length in pixels, the number of pixels and
+        diagonal steps, the total and per-length average cost (the pixel cost
+        for a one-pixel route), the cost of
+        every step and, with class_map, cost and length per class id
+    """
+    if movement not in MOVEMENTS:
+        raise ValueError(f"Unknown movement model: {movement}")
+    points = np.asarray(path, dtype=np.int64).reshape(-1, 2)
+    cells = cost_map[points[:, 0], points[:, 1]].astype(np.float64)
+    
+    diagonal = np.all(np.diff(points, axis=0) != 0, axis=1)
+    step_lengths = np.where(diagonal, sqrt(2), 1.0)
+    if movement == 'metric':
+        segment_costs = 0.5 * (cells[:-1] + cells[1:]) * step_lengths
+    else:
+        segment_costs = cells[1:].copy()
+    
+    length = float(step_lengths.sum())
+    total_cost = float(segment_costs.sum())
+    if length:
+        average_cost = total_cost / length
+    else:
+        # A one-pixel route (start == end) reports the cost of its pixel
+        average_cost = float(cells[0]) if len(cells) else 0.0
+    stats = {
+        'length': length,
+        'pixels': len(points),
+        'diagonal_steps': int(diagonal.sum()),
+        'total_cost': total_cost,
+        'average_cost': average_cost,
+        'segment_costs': segment_costs,
+        'start': tuple(points[0].tolist()) if len(points) else None,
+        'end': tuple(points[-1].tolist()) if len(points) else None,
+    }
+    
+    if class_map is not None:
+        # Each step's length (and metric cost) is split evenly between the
+        # classes of its two pixels; a cell step is charged to the pixel entered
+        classes = np.asarray(class_map)[points[:, 0], points[:, 1]].astype(np.int64)
+        size = int(classes.max()) + 1 if len(classes) else 0
+        half_length = 0.5 * step_lengths
+        if movement == 'metric':
+            half_cost = 0.5 * segment_costs
+            by_cost = (np.bincount(classes[:-1], half_cost, size) +
+                       np.bincount(classes[1:], half_cost, size))
+        else:
+            by_cost = np.bincount(classes[1:], segment_costs, size)
+        by_length = (np.bincount(classes[:-1], half_length, size) +
+                     np.bincount(classes[1:], half_length, size))
+        present = np.unique(classes)
+        stats['cost_by_class'] = {int(k): float(by_cost[k]) for k in present}
+        stats['length_by_class'] = {int(k): float(by_length[k]) for k in present}
+    
+    return stats
+
+
+def _matrix_row(cost_map: np.ndarray, source: Tuple[int, int], targets: List[Tuple[int, int]],
+                return_paths: bool) -> Tuple[np.ndarray, Optional[list]]:
+    """One multi-target search from a source to all targets"""
+    distance, backlink = cost_distance(cost_map, source, targets=targets)
+    costs = np.array([distance[t] for t in targets], dtype=np.float64)
+    paths = None
+    if return_paths:
+        paths = [trace_path(backlink, t) for t in targets]
+    return costs, paths
+
+
+# Per-process state for cost_matrix and find_path_via workers, set once
+# by the pool initializer
+_worker_state = {}
+
+
+def _init_matrix_worker(cost_map: np.ndarray, targets: List[Tuple[int, int]], return_paths: bool):
+    """Store the shared inputs in the worker so each task only ships a point"""
+    _worker_state['cost_map'] = cost_map
+    _worker_state['targets'] = targets
+    _worker_state['return_paths'] = return_paths
+
+
+def _matrix_row_worker(source: Tuple[int, int]) -> Tuple[np.ndarray, Optional[list]]:
+    """Pool task wrapper around _matrix_row"""
+    return _matrix_row(_worker_state['cost_map'], source, _worker_state['targets'],
+                       _worker_state['return_paths'])
+
+
+def cost_matrix(cost_map: np.ndarray, sources, targets, return_paths: bool = False,
+                processes: Optional[int] = 1):
+    """
+    Route costs between every source and every target
+    
+    Runs one multi-target search per point on the smaller side instead of
+    one search per pair. Each search stops once all points on the other side
+    are settled. When there are fewer targets than sources, the searches
+    start from the targets: each step costs the pixel entered, so a route
+    walked backwards differs only by its end pixels and
+    cost(s -> t) = distance_t[s] + cost[t] - cost[s].
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        sources: Sequence of N start coordinates (row, col)
+        targets: Sequence of M end coordinates (row, col)
+        return_paths: Also return the route for every pair
+        processes: Number of worker processes (1 runs in this process,
+            None uses every core)
+        
+    Returns:
+        N x M array of route costs (inf where unreachable), plus an N x M
+        nested list of paths (None where unreachable) if return_paths is set
+    """
+    sources = _as_points(sources)
+    targets = _as_points(targets)
+    reverse = len(targets) < len(sources)
+    origins, others = (targets, sources) if reverse else (sources, targets)
+    
+    if processes == 1 or len(origins) == 1:
+        rows = [_matrix_row(cost_map, origin, others, return_paths) for origin in origins]
+    else:
+        with ProcessPoolExecutor(max_workers=processes, initializer=_init_matrix_worker,
+                                 initargs=(cost_map, others, return_paths)) as pool:
+            rows = list(pool.map(_matrix_row_worker, origins))
+    
+    matrix = np.vstack([costs for costs, _ in rows])
+    paths = [row_paths for _, row_paths in rows] if return_paths else None
+    
+    if reverse:
+        # Rows were computed from the targets; convert to source -> target costs
+        source_cost = np.array([cost_map[p] for p in sources], dtype=np.float64)
+        target_cost = np.array([cost_map[p] for p in targets], dtype=np.float64)
+        matrix = matrix.T + target_cost[None, :] - source_cost[:, None]
+        if return_paths:
+            paths = [[None if paths[j][i] is None else paths[j][i][::-1]
+                      for j in range(len(targets))]
+                     for i in range(len(sources))]
+    
+    if return_paths:
+        return matrix, paths
+    return matrix
+
+
+def _solve_leg(cost_map: np.ndarray, settings: dict, query: tuple,
+               leg: Tuple[Tuple[int, int], Tuple[int, int]]) -> Tuple[Optional[PixelPath], Optional[float]]:
+    """One find_path query with the given pathfinder settings"""
+    allowed, heuristic, weight = query
+    pathfinder = AStarPathfinder(**settings)
+    path = pathfinder.find_path(cost_map, leg[0], leg[1], allowed=allowed,
+                                heuristic=heuristic, weight=weight)
+    return path, None if path is None else float(pathfinder.cost)
+
+
+def _init_leg_worker(cost_map: np.ndarray, settings: dict, query: tuple):
+    """Store the shared inputs in the worker so each task only ships a leg"""
+    _worker_state['cost_map'] = cost_map
+    _worker_state['settings'] = settings
+    _worker_state['query'] = query
+
+
+def _leg_worker(leg: Tuple[Tuple[int, int], Tuple[int, int]]) -> Tuple[Optional[PixelPath], Optional[float]]:
+    """Pool task wrapper around _solve_leg"""
+    return _solve_leg(_worker_state['cost_map'], _worker_state['settings'],
+                      _worker_state['query'], leg)
+
+
+def _solve_legs(cost_map: np.ndarray, settings: dict, query: tuple, legs: list,
+                processes: Optional[int]) -> List[Tuple[Optional[PixelPath], Optional[float]]]:
+    """Solve independent legs, in a process pool unless processes is 1"""
+    if processes == 1 or len(legs) == 1:
+        return [_solve_leg(cost_map, settings, query, leg) for leg in legs]
+    with ProcessPoolExecutor(max_workers=processes, initializer=_init_leg_worker,
+                             initargs=(cost_map, settings, query)) as pool:
+        return list(pool.map(_leg_worker, legs))
+
+
+def _best_visit_order(matrix: np.ndarray) -> List[int]:
+    """
+    Cheapest order through every point with the first and last fixed
+    
+    Held-Karp dynamic programming over subsets of the middle points.
+    
+    Args:
+        matrix: Square matrix of route costs between the points
+        
+    Returns:
+        Point indices from first to last
+    """
+    n = len(matrix)
+    middle = list(range(1, n - 1))
+    m = len(middle)
+    # best[mask][j]: cheapest route from the first point through the
+    # middle points in mask, ending at middle[j]
+    best = np.full((1 << m, m), np.inf)
+    parent = np.full((1 << m, m), -1, dtype=np.int64)
+    for j in range(m):
+        best[1 << j, j] = matrix[0, middle[j]]
+    for mask in range(1, 1 << m):
+        for j in range(m):
+            if not mask & (1 << j) or best[mask, j] == np.inf:
+                continue
+            for k in range(m):
+                if mask & (1 << k):
+                    continue
+                candidate = best[mask, j] + matrix[middle[j], middle[k]]
+                if candidate < best[mask | (1 << k), k]:
+                    best[mask | (1 << k), k] = candidate
+                    parent[mask | (1 << k), k] = j
+    
+    full = (1 << m) - 1
+    totals = best[full] + matrix[middle, n - 1]
+    last = int(np.argmin(totals))
+    if totals[last] == np.inf:
+        return list(range(n))
+    
+    order = []
+    mask = full
+    while last != -1:
+        order.append(middle[last])
+        previous = int(parent[mask, last])
+        mask &= ~(1 << last)
+        last = previous
+    return [0] + order[::-1] + [n - 1]
+
+
+def alternative_routes(cost_map: np.ndarray, start: Tuple[int, int], end: Tuple[int, int],
+                       k: int = 3, max_overlap: float = 0.6, max_stretch: float = 1.5) -> List[dict]:
+    """
+    Up to k diverse near-optimal routes between two points (via-pixel method)
+    
+    One cost-distance field from the start and one from the end give the
+    cost of the cheapest route through every pixel at once:
+    distance_start(v) + distance_end(v) + cost(end) - cost(v). Candidate via
+    pixels are the plateaus, where both shortest-path trees share an edge,
+    so the route through them is locally optimal. They are tried from the
+    cheapest up; each candidate route is traced from both backlink rasters
+    and kept if it has no loops, costs at most max_stretch times the best
+    route and shares at most max_overlap of its pixels with every route kept
+    so far. Pixels on a traced candidate are not tried again, since they
+    lead to nearly the same route.
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        start: Starting coordinates (row, col)
+        end: Ending coordinates (row, col)
+        k: Number of routes including the best one
+        max_overlap: Largest share of an alternative's pixels that may lie
+            on another kept route
+        max_stretch: Largest cost of an alternative relative to the best
+        
+    Returns:
+        List of dictionaries sorted by cost, the best route first, with the
+        path, cost, stretch (cost / best cost), metric length and overlap
+        (share of the route's pixels that lie on the best route). Empty if
+        the end cannot be reached.
+    """
+    if k < 1:
+        raise ValueError("k must be at least 1")
+    rows, cols = cost_map.shape
+    
+    distance_start, backlink_start = cost_distance(cost_map, start)
+    if not np.isfinite(distance_start[end]):
+        return []
+    distance_end, backlink_end = cost_distance(cost_map, end)
+    
+    # Reverse routes differ only in which endpoint is charged
+    cost = np.asarray(cost_map, dtype=np.float64)
+    via_cost = (distance_start + distance_end + cost[end] - cost).reshape(-1)
+    best_cost = float(distance_start[end])
+    best = trace_path(backlink_start, end)
+    best_index = np.array(best, dtype=np.int64) @ np.array([cols, 1])
+    
+    kept = [np.zeros(rows * cols, dtype=bool)]
+    kept[0][best_index] = True
+    routes = [{
+        'path': best,
+        'cost': best_cost,
+        'stretch': 1.0,
+        'length': path_length(best),
+        'overlap': 1.0,
+    }]
+    
+    # Plateau edges: v's parent towards the start has v as its parent
+    # towards the end
+    index = np.arange(rows * cols, dtype=np.int64)
+    offsets = np.array([dr * cols + dc for dr, dc in DIRECTIONS] + [0] * (NO_BACKLINK - 7),
+                       dtype=np.int64)
+    parent_start = index + offsets[backlink_start.reshape(-1)]
+    parent_end = index + offsets[backlink_end.reshape(-1)]
+    on_edge = (backlink_start.reshape(-1) < 8) & (parent_end[parent_start] == index)
+    plateau = np.zeros(rows * cols, dtype=bool)
+    plateau[on_edge] = True
+    plateau[parent_start[on_edge]] = True
+    
+    used = np.zeros(rows * cols, dtype=bool)
+    used[best_index] = True
+    limit = best_cost * max_stretch + 1e-9 * max(best_cost, 1.0)
+    candidates = np.flatnonzero(plateau & (via_cost <= limit) & ~used)
+    candidates = candidates[np.argsort(via_cost[candidates], kind='stable')]
+    
+    for via_index in candidates.tolist():
+        if len(routes) == k:
+            break
+        if used[via_index]:
+            continue
+        
+        via = divmod(via_index, cols)
+        path = trace_path(backlink_start, via) + trace_path(backlink_end, via)[-2::-1]
+        route_index = np.array(path, dtype=np.int64) @ np.array([cols, 1])
+        used[route_index] = True
+        if len(np.unique(route_index)) != len(route_index):
+            continue
+        if any(other[route_index].mean() > max_overlap for other in kept):
+            continue
+        
+        kept.append(np.zeros(rows * cols, dtype=bool))
+        kept[-1][route_index] = True
+        routes.append({
+            'path': path,
+            'cost': float(via_cost[via_index]),
+            'stretch': float(via_cost[via_index]) / best_cost if best_cost else 1.0,
+            'length': path_length(path),
+            'overlap': float(kept[0][route_index].mean()),
+        })
+    
+    return routes
+
+
+def build_cost_pyramid(cost_map: np.ndarray, levels: int) -> List[np.ndarray]:
+    """
+    Block-averaged cost maps at 1/2, 1/4, ... resolution
+    
+    Odd dimensions are padded by repeating the last row or column. Levels
+    stop early once the map is a single pixel.
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        levels: Number of downsampled levels to build
+        
+    Returns:
+        List starting with the original cost map, then each coarser level
+    """
+    pyramid = [cost_map]
+    for _ in range(levels):
+        current = pyramid[-1]
+        rows, cols = current.shape
+        if rows == 1 and cols == 1:
+            break
+        padded = np.pad(current, ((0, rows % 2), (0, cols % 2)), mode='edge')
+        coarse = padded.reshape(padded.shape[0] // 2, 2, padded.shape[1] // 2, 2).mean(axis=(1, 3))
+        pyramid.append(coarse)
+    return pyramid
+
+
+def _dilate(mask: np.ndarray, radius: int) -> np.ndarray:
+    """Binary dilation with a (2 * radius + 1) square, using cumulative sums along each axis"""
+    result = mask
+    for axis in (0, 1):
+        n = result.shape[axis]
+        counts = np.cumsum(result, axis=axis, dtype=np.int64)
+        counts = np.insert(counts, 0, 0, axis=axis)
+        index = np.arange(n)
+        upper = np.take(counts, np.minimum(index + radius + 1, n), axis=axis)
+        lower = np.take(counts, np.maximum(index - radius, 0), axis=axis)
+        result = upper > lower
+    return result
+
+
+class LandmarkTable:
+    """
+    Exact cost-distance fields from a few landmark pixels (ALT heuristic)
+    
+    For a landmark L with field D = cost_distance(cost_map, L), the triangle
+    inequality gives two lower bounds on the cost of a route from a to b:
+    D[b] - D[a], and (D[a] - cost[a]) - (D[b] - cost[b]). The second holds
+    because each step costs the pixel being entered, so the cost from x back
+    to L is D[x] + cost[L] - cost[x]. The heuristic takes the largest bound
+    over all landmarks.
+    """
+    
+    def __init__(self, cost_map: np.ndarray, count: int = DEFAULT_LANDMARKS):
+        """
+        Choose landmarks and compute their fields
+        
+        The first landmark is the top-left pixel and each further one is the
+        pixel farthest from all landmarks chosen so far, which spreads them
+        along the map border.
+        
+        Args:
+            cost_map: 2D array of terrain costs (all finite)
+            count: Number of landmarks
+        """
+        if not np.all(np.isfinite(cost_map)):
+            raise ValueError("Landmark tables require a cost map with finite costs")
+        
+        rows, cols = cost_map.shape
+        n = rows * cols
+        count = max(1, min(count, n))
+        
+        self.shape = (rows, cols)
+        self.landmarks = []
+        # float32 keeps the table at 4 bytes per pixel and landmark
+        self.distances = np.empty((count, n), dtype=np.float32)
+        
+        exact = True
+        nearest = np.full(n, np.inf)
+        landmark = (0, 0)
+        for i in range(count):
+            field = cost_distance(cost_map, landmark)[0].reshape(n)
+            exact = exact and bool(np.array_equal(field, np.floor(field)))
+            self.landmarks.append(landmark)
+            self.distances[i] = field
+            np.minimum(nearest, field, out=nearest)
+            landmark = divmod(int(np.argmax(nearest)), cols)
+        
+        # Fields that float32 cannot hold exactly lose up to one unit in the
+        # last place per value; shrink bounds by that much to stay admissible
+        largest = float(self.distances.max())
+        if exact and largest <= 2 ** 24:
+            self.slack = 0.0
+        else:
+            self.slack = 4.0 * largest * np.finfo(np.float32).eps
+    
+    def bound_function(self, cost_map: np.ndarray, point: Tuple[int, int], reverse: bool = False):
+        """
+        Lower bound on route costs to (or from) a fixed point
+        
+        Args:
+            cost_map: The cost map the table was built from
+            point: Goal pixel (row, col)
+            reverse: Bound the cost from point to a pixel instead of from a
+                pixel to point
+            
+        Returns:
+            Function h(row, col) returning a non-negative lower bound
+        """
+        rows, cols = self.shape
+        n = rows * cols
+        cost_v = memoryview(np.ascontiguousarray(cost_map, dtype=np.float64).reshape(n))
+        fields = [memoryview(field) for field in self.distances]
+        
+        index = point[0] * cols + point[1]
+        point_cost = cost_v[index]
+        anchors = [(field, float(field[index])) for field in fields]
+        slack = self.slack
+        
+        if not reverse:
+            def h(row, col):
+                x = row * cols + col
+                x_cost = cost_v[x]
+                best = 0.0
+                for field, d_point in anchors:
+                    d_x = field[x]
+                    # cost(x -> point) >= D[point] - D[x]
+                    bound = d_point - d_x
+                    if bound > best:
+                        best = bound
+                    # cost(x -> point) >= (D[x] - cost[x]) - (D[point] - cost[point])
+                    bound = d_x - x_cost - d_point + point_cost
+                    if bound > best:
+                        best = bound
+                return best - slack if best > slack else 0.0
+        else:
+            def h(row, col):
+                x = row * cols + col
+                x_cost = cost_v[x]
+                best = 0.0
+                for field, d_point in anchors:
+                    d_x = field[x]
+                    # cost(point -> x) >= D[x] - D[point]
+                    bound = d_x - d_point
+                    if bound > best:
+                        best = bound
+                    # cost(point -> x) >= (D[point] - cost[point]) - (D[x] - cost[x])
+                    bound = d_point - point_cost - d_x + x_cost
+                    if bound > best:
+                        best = bound
+                return best - slack if best > slack else 0.0
+        
+        return h
+
+
+def landmark_table(cost_map: np.ndarray, count: int = DEFAULT_LANDMARKS) -> LandmarkTable:
+    """
+    Get the landmark table for a cost map, building it on first use
+    
+    Tables are cached by cost map fingerprint and landmark count, so
+    repeated route requests on the same image reuse them.
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        count: Number of landmarks
+        
+    Returns:
+        LandmarkTable for the cost map
+    """
+    key = (cost_map_fingerprint(cost_map), count)
+    table = _landmark_cache.get(key)
+    if table is not None:
+        _landmark_cache.move_to_end(key)
+        return table
+    
+    table = LandmarkTable(cost_map, count)
+    _landmark_cache[key] = table
+    while len(_landmark_cache) > MAX_CACHED_LANDMARK_TABLES:
+        _landmark_cache.popitem(last=False)
+    return table
@@ -0,0 +1,285 @@
+"""
+Route Cache Module
+Memoizes route queries by cost map fingerprint, in memory and on disk
+"""
+
+import numpy as np
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from typing import List, Tuple, Optional
+
+from pathfinding import AStarPathfinder, PixelPath, cost_map_fingerprint, route_mask
+
+# Approximate bytes of a cached entry besides its path array
+ENTRY_OVERHEAD_BYTES = 512
+
+# Cache shared by all sessions of this process
+_shared_cache = None
+_shared_cache_lock = threading.Lock()
+
+
+class RouteCache:
+    """
+    LRU cache of find_path results
+    
+    Entries are keyed by the cost map fingerprint, the end points, the
+    allowed mask and every search option, and hold the route as an (N, 2)
+    int32 array with its cost. The memory tier evicts the least recently
+    used entries beyond max_bytes. With a disk_dir every entry is also
+    written there, and memory misses are looked up on disk before
+    searching; the oldest files beyond max_disk_bytes are removed. Searches
+    stopped by a budget are not cached. All methods are thread-safe, so one
+    cache can serve every Streamlit session of a process.
+    """
+    
+    def __init__(self, max_bytes: int = 64 * 2**20, disk_dir: Optional[str] = None,
+                 max_disk_bytes: int = 512 * 2**20):
+        """
+        Initialize the cache
+        
+        Args:
+            max_bytes: Memory budget of the in-memory tier
+            disk_dir: Optional directory for the disk tier
+            max_disk_bytes: Budget of the disk tier
+        """
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir
+        self.max_disk_bytes = max_disk_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if disk_dir is not None:
+            os.makedirs(disk_dir, exist_ok=True)
+    
+    def find_path(self, pathfinder: AStarPathfinder, cost_map: np.ndarray,
+                  start: Tuple[int, int], end: Tuple[int, int],
+                  allowed: Optional[np.ndarray] = None, heuristic: str = 'euclidean',
+                  weight: float = 1.0, no_go: Optional[np.ndarray] = None, corridor=None,
+                  obstacle_cost: Optional[float] = None, max_expansions: Optional[int] = None,
+                  max_seconds: Optional[float] = None,
+                  max_memory: Optional[int] = None) -> Optional[PixelPath]:
+        """
+        Cached AStarPathfinder.find_path
+        
+        On a hit the pathfinder's path, cost and suboptimality are set as if
+        it had searched, and its search_stats are None. The restrictions
+        are combined with route_mask first, so the key covers all of them.
+        
+        Args:
+            pathfinder: Pathfinder whose settings and result attributes are used
+            cost_map: 2D array of terrain costs
+            start: Starting coordinates (row, col)
+            end: Ending coordinates (row, col)
+            allowed: Optional boolean mask of the pixels the route may use
+            heuristic: Heuristic name (see find_path)
+            weight: Heuristic inflation epsilon (see find_path)
+            no_go: Optional boolean mask of pixels the route must avoid
+            corridor: Optional planning corridor (mask or polygon vertices)
+            obstacle_cost: Optional cost from which pixels are impassable
+            max_expansions: Optional expansion budget of a search on a miss
+            max_seconds: Optional time budget of a search on a miss
+            max_memory: Optional memory budget of a search on a miss
+            
+        Returns:
+            PixelPath of the route pixels, or None if no path found
+        """
+        allowed = route_mask(cost_map, allowed, no_go, corridor, obstacle_cost)
+        key = self.key(pathfinder, cost_map, start, end, allowed, heuristic, weight)
+        if self.load(pathfinder, key):
+            return pathfinder.path
+        
+        path = pathfinder.find_path(cost_map, start, end, allowed=allowed,
+                                    heuristic=heuristic, weight=weight,
+                                    max_expansions=max_expansions, max_seconds=max_seconds,
+                                    max_memory=max_memory)
+        if pathfinder.budget_report is None:
+            self.put(key, {
+                'path': None if path is None else path.points.copy(),
+                'cost': None if path is None else float(pathfinder.cost),
+                'suboptimality': pathfinder.suboptimality,
+            })
+        return path
+    
+    def key(self, pathfinder: AStarPathfinder, cost_map: np.ndarray,
+            start: Tuple[int, int], end: Tuple[int, int],
+            allowed: Optional[np.ndarray] = None, heuristic: str = 'euclidean',
+            weight: float = 1.0) -> str:
+        """
+        Cache key of a route query
+        
+        Returns:
+            Hex digest of the cost map and mask fingerprints, end points,
+            search options and pathfinder settings
+        """
+        parts = (
+            cost_map_fingerprint(cost_map),
+            None if allowed is None else cost_map_fingerprint(np.asarray(allowed, dtype=bool)),
+            (int(start[0]), int(start[1])), (int(end[0]), int(end[1])),
+            heuristic, float(weight),
+            pathfinder.engine, pathfinder.movement, pathfinder.landmarks,
+            pathfinder.headings, pathfinder.max_turn, float(pathfinder.turn_penalty),
+        )
+        return hashlib.blake2b(repr(parts).encode(), digest_size=16).hexdigest()
+    
+    def load(self, pathfinder: AStarPathfinder, key: str) -> bool:
+        """
+        Set a pathfinder's results from the entry of a key
+        
+        The pathfinder's path, cost and suboptimality are set as if it had
+        searched, and its search_stats are None.
+        
+        Returns:
+            False on a miss, leaving the pathfinder unchanged
+        """
+        entry = self.get(key)
+        if entry is None:
+            return False
+        pathfinder.path = None if entry['path'] is None else PixelPath(entry['path'].copy())
+        pathfinder.cost = entry['cost']
+        pathfinder.suboptimality = entry['suboptimality']
+        pathfinder.expansions = 0
+        pathfinder.search_stats = None
+        pathfinder.budget_report = None
+        return True
+    
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Look up an entry, first in memory and then on disk
+        
+        Returns:
+            The cached entry, or None on a miss
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry
+            
+            entry = self._read_disk(key)
+            if entry is not None:
+                self.disk_hits += 1
+                self._store(key, entry)
+                return entry
+            
+            self.misses += 1
+            return None
+    
+    def put(self, key: str, entry: dict):
+        """Store an entry in memory and, with a disk tier, on disk"""
+        with self._lock:
+            self._store(key, entry)
+            if self.disk_dir is not None:
+                self._write_disk(key, entry)
+    
+    def stats(self) -> dict:
+        """Hit and miss counters and the size of both tiers"""
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'hit_rate': (self.hits + self.disk_hits) / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'memory_bytes': self.memory_bytes,
+                'disk_bytes': sum(size for _, size, _ in self._disk_files()),
+            }
+    
+    def clear(self):
+        """Drop every entry from both tiers and reset the counters"""
+        with self._lock:
+            self._entries.clear()
+            self.memory_bytes = 0
+            self.hits = self.disk_hits = self.misses = 0
+            for path, _, _ in self._disk_files():
+                os.remove(path)
+    
+    def _store(self, key: str, entry: dict):
+        """Insert into the memory tier and evict beyond max_bytes (lock held)"""
+        if key in self._entries:
+            self.memory_bytes -= _entry_bytes(self._entries.pop(key))
+        self._entries[key] = entry
+        self.memory_bytes += _entry_bytes(entry)
+        while self.memory_bytes > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            self.memory_bytes -= _entry_bytes(evicted)
+    
+    def _read_disk(self, key: str) -> Optional[dict]:
+        """Load an entry from the disk tier (lock held)"""
+        if self.disk_dir is None:
+            return None
+        path = os.path.join(self.disk_dir, key + '.npz')
+        try:
+            with np.load(path) as data:
+                found = bool(data['found'])
+                suboptimality = float(data['suboptimality'])
+                return {
+                    'path': data['path'] if found else None,
+                    'cost': float(data['cost']) if found else None,
+                    'suboptimality': None if np.isnan(suboptimality) else suboptimality,
+                }
+        except (OSError, KeyError, ValueError):
+            return None
+    
+    def _write_disk(self, key: str, entry: dict):
+        """Write an entry atomically and trim the disk tier (lock held)"""
+        path = os.path.join(self.disk_dir, key + '.npz')
+        partial = path + '.tmp'
+        found = entry['path'] is not None
+        with open(partial, 'wb') as f:
+            np.savez(f, found=found,
+                     path=entry['path'] if found else np.empty((0, 2), dtype=np.int32),
+                     cost=entry['cost'] if found else np.nan,
+                     # NaN stands for None, which would need a pickled array
+                     suboptimality=np.nan if entry['suboptimality'] is None else entry['suboptimality'])
+        os.replace(partial, path)
+        
+        files = sorted(self._disk_files(), key=lambda file: file[2])
+        total = sum(size for _, size, _ in files)
+        for file_path, size, _ in files:
+            if total <= self.max_disk_bytes or file_path == path:
+                break
+            os.remove(file_path)
+            total -= size
+    
+    def _disk_files(self) -> List[Tuple[str, int, float]]:
+        """(path, size, modification time) of every disk tier entry"""
+        if self.disk_dir is None:
+            return []
+        files = []
+        for name in os.listdir(self.disk_dir):
+            if name.endswith('.npz'):
+                path = os.path.join(self.disk_dir, name)
+                stat = os.stat(path)
+                files.append((path, stat.st_size, stat.st_mtime))
+        return files
+
+
+def _entry_bytes(entry: dict) -> int:
+    """Approximate memory held by a cache entry"""
+    path = entry['path']
+    return ENTRY_OVERHEAD_BYTES + (0 if path is None else path.nbytes)
+
+
+def shared_route_cache(max_bytes: int = 64 * 2**20, disk_dir: Optional[str] = None,
+                       max_disk_bytes: int = 512 * 2**20) -> RouteCache:
+    """
+    Get the route cache shared by every caller in this process
+    
+    The cache is created with the given settings on first use; later
+    calls return the same instance.
+    
+    Returns:
+        The process-wide RouteCache
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = RouteCache(max_bytes, disk_dir, max_disk_bytes)
+        return _shared_cache
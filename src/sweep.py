@@ -0,0 +1,377 @@
+"""
+Sweeping Cost-Distance Module
+Computes accumulated cost fields with vectorized line sweeps, whole or tile
+by tile across worker processes
+"""
+
+import numpy as np
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import List, Tuple, Optional
+
+from pathfinding import DIRECTIONS, NO_BACKLINK, SOURCE_BACKLINK, _as_points
+
+# Full sweep rounds sweep_cost_distance runs before giving up on convergence
+MAX_SWEEP_ITERATIONS = 1000
+
+# Edge length of the tiles tiled_cost_distance hands to worker processes
+DEFAULT_TILE_SIZE = 512
+
+# Per-process state for tiled_cost_distance workers, set once by the pool
+# initializer
+_worker_state = {}
+
+
+def _sweep_lines(field: np.ndarray, cost: np.ndarray, reverse: bool, pending: np.ndarray,
+                 opposite: np.ndarray, crossing: np.ndarray, buffer: np.ndarray,
+                 tolerance: float) -> int:
+    """
+    Relax every line of a padded field from the line before it
+    
+    Line i of field holds the distances of one row (or column), padded with
+    inf at both ends, and is lowered to the cheapest of its three neighbors
+    on the previous line plus its own cost. Lines whose predecessor has not
+    changed since this direction last visited them are skipped.
+    
+    Args:
+        field: (lines, length + 2) distances, updated in place
+        cost: (lines, length) pixel costs
+        reverse: Sweep from the last line to the first
+        pending: Flags of the lines changed since this direction read them
+        opposite: Flags of the same lines for the opposite direction
+        crossing: (2, length) flags of the lines of the other orientation
+        buffer: Scratch array of the line length
+        tolerance: Improvements up to this amount flag no line
+        
+    Returns:
+        Number of pixels improved by more than tolerance
+    """
+    lines = field.shape[0]
+    if reverse:
+        order, step = range(lines - 2, -1, -1), -1
+    else:
+        order, step = range(1, lines), 1
+    minimum = np.minimum
+    improved = 0
+    
+    for line in order:
+        previous = line - step
+        if not pending[previous]:
+            continue
+        pending[previous] = False
+        
+        source = field[previous]
+        minimum(source[:-2], source[1:-1], out=buffer)
+        minimum(buffer, source[2:], out=buffer)
+        buffer += cost[line]
+        target = field[line, 1:-1]
+        changed = buffer < target - tolerance if tolerance else buffer < target
+        minimum(target, buffer, out=target)
+        
+        count = int(np.count_nonzero(changed))
+        if count:
+            improved += count
+            pending[line] = True
+            opposite[line] = True
+            crossing[:, changed] = True
+    
+    # No line follows the last one in this direction
+    pending[0 if reverse else lines - 1] = False
+    return improved
+
+
+def sweep_cost_distance(cost_map: np.ndarray, source, tolerance: float = 0.0,
+                        max_iterations: int = MAX_SWEEP_ITERATIONS) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """
+    Accumulated cost from a source to every pixel by vectorized sweeps
+    
+    Same movement model and result as cost_distance, but computed by
+    relaxing whole rows at once: each iteration sweeps the rows top to
+    bottom and bottom to top, then the columns left to right and right to
+    left, lowering every pixel to the cheapest of its three neighbors on
+    the previous line (straight and both diagonals) plus its own cost. The
+    Python loop runs once per line instead of once per pixel, and lines
+    whose predecessor did not change are skipped. Iterations repeat until
+    a full round changes nothing; routes that wind back and forth need
+    more rounds. Backlinks are derived from the final field. Pixel costs
+    must be positive (inf marks an impassable pixel).
+    
+    Args:
+        cost_map: 2D array of terrain costs
+        source: Source coordinates (row, col), or a sequence of them
+        tolerance: Improvements up to this amount do not trigger further
+            sweeps; 0 iterates to the exact field
+        max_iterations: Most sweep rounds before giving up
+        
+    Returns:
+        distance: Accumulated cost raster (float64, inf where unreachable)
+        backlink: Direction raster (uint8) as returned by cost_distance
+        report: Dict with the sweep rounds run ('iterations'), whether the
+            field converged, the pixels improved in each round ('changes')
+            and the wall time
+    """
+    t0 = time.perf_counter()
+    rows, cols = cost_map.shape
+    sources = _as_points(source)
+    for row, col in sources:
+        if not (0 <= row < rows and 0 <= col < cols):
+            raise ValueError("Source point out of bounds")
+    
+    cost = np.ascontiguousarray(cost_map, dtype=np.float64)
+    if not np.all(cost > 0):
+        raise ValueError("Sweeping needs positive pixel costs")
+    
+    distance = np.full((rows, cols), np.inf)
+    row_pending = np.zeros((2, rows), dtype=bool)
+    col_pending = np.zeros((2, cols), dtype=bool)
+    for row, col in sources:
+        distance[row, col] = 0.0
+        row_pending[:, row] = True
+        col_pending[:, col] = True
+    changes, converged = _sweep_field(distance, cost, row_pending, col_pending,
+                                      tolerance, max_iterations)
+    
+    backlink = _field_backlinks(distance, sources)
+    report = {
+        'iterations': len(changes),
+        'converged': converged,
+        'changes': changes,
+        'seconds': time.perf_counter() - t0,
+    }
+    return distance, backlink, report
+
+
+def _sweep_field(distance: np.ndarray, cost: np.ndarray, row_pending: np.ndarray,
+                 col_pending: np.ndarray, tolerance: float,
+                 max_iterations: int) -> Tuple[List[int], bool]:
+    """
+    Run sweep rounds on a distance raster until nothing changes
+    
+    Args:
+        distance: (rows, cols) distances, lowered in place
+        cost: (rows, cols) positive float64 pixel costs
+        row_pending: (2, rows) flags of the rows to read going down and up
+        col_pending: (2, cols) flags of the columns to read going right and left
+        tolerance: Improvements up to this amount flag no line
+        max_iterations: Most sweep rounds
+        
+    Returns:
+        Pixels improved in each round, and whether the field converged
+    """
+    rows, cols = distance.shape
+    cost_t = np.ascontiguousarray(cost.T)
+    
+    # Rows of field and columns of field_t, padded with inf at both ends
+    field = np.full((rows, cols + 2), np.inf)
+    field[:, 1:-1] = distance
+    field_t = np.full((cols, rows + 2), np.inf)
+    row_buffer = np.empty(cols)
+    col_buffer = np.empty(rows)
+    
+    changes = []
+    converged = False
+    while len(changes) < max_iterations:
+        improved = _sweep_lines(field, cost, False, row_pending[0], row_pending[1],
+                                col_pending, row_buffer, tolerance)
+        improved += _sweep_lines(field, cost, True, row_pending[1], row_pending[0],
+                                 col_pending, row_buffer, tolerance)
+        field_t[:, 1:-1] = field[:, 1:-1].T
+        improved += _sweep_lines(field_t, cost_t, False, col_pending[0], col_pending[1],
+                                 row_pending, col_buffer, tolerance)
+        improved += _sweep_lines(field_t, cost_t, True, col_pending[1], col_pending[0],
+                                 row_pending, col_buffer, tolerance)
+        field[:, 1:-1] = field_t[:, 1:-1].T
+        changes.append(improved)
+        if not (row_pending.any() or col_pending.any()):
+            converged = True
+            break
+    
+    distance[:] = field[:, 1:-1]
+    return changes, converged
+
+
+def _field_backlinks(distance: np.ndarray, sources: List[Tuple[int, int]]) -> np.ndarray:
+    """Backlink raster pointing every reached pixel at its cheapest neighbor"""
+    rows, cols = distance.shape
+    padded = np.pad(distance, 1, constant_values=np.inf)
+    best = np.full((rows, cols), np.inf)
+    backlink = np.full((rows, cols), NO_BACKLINK, dtype=np.uint8)
+    for k, (dr, dc) in enumerate(DIRECTIONS):
+        neighbor = padded[1 + dr:1 + dr + rows, 1 + dc:1 + dc + cols]
+        better = neighbor < best
+        best[better] = neighbor[better]
+        backlink[better] = k
+    backlink[np.isinf(distance)] = NO_BACKLINK
+    for row, col in sources:
+        backlink[row, col] = SOURCE_BACKLINK
+    return backlink
+
+
+def _tile_grid(shape: Tuple[int, int], tile_size: int) -> List[List[Tuple[int, int, int, int]]]:
+    """(r0, r1, c0, c1) bounds of the tiles covering a raster, by tile row and column"""
+    rows, cols = shape
+    return [[(r0, min(r0 + tile_size, rows), c0, min(c0 + tile_size, cols))
+             for c0 in range(0, cols, tile_size)]
+            for r0 in range(0, rows, tile_size)]
+
+
+def _solve_tile(distance: np.ndarray, cost: np.ndarray, bounds: Tuple[int, int, int, int],
+                tolerance: float) -> Tuple[int, List[Tuple[int, int]]]:
+    """
+    Sweep one tile seeded with the current field on its one-pixel halo
+    
+    The tile and its halo are copied out of the shared field, swept to
+    convergence and only the tile's own pixels are written back, so tiles
+    solved at the same time never write the same pixel.
+    
+    Args:
+        distance: Full distance raster, lowered in place
+        cost: Full float64 cost raster
+        bounds: (r0, r1, c0, c1) of the tile
+        tolerance: Improvements up to this amount are not reported
+        
+    Returns:
+        Number of tile pixels improved, and the (dr, dc) offsets of the
+        neighbor tiles whose halo changed
+    """
+    rows, cols = distance.shape
+    r0, r1, c0, c1 = bounds
+    h0, h1 = max(r0 - 1, 0), min(r1 + 1, rows)
+    w0, w1 = max(c0 - 1, 0), min(c1 + 1, cols)
+    window = distance[h0:h1, w0:w1].copy()
+    _sweep_field(window, np.ascontiguousarray(cost[h0:h1, w0:w1]),
+                 np.ones((2, h1 - h0), dtype=bool), np.ones((2, w1 - w0), dtype=bool),
+                 tolerance, MAX_SWEEP_ITERATIONS)
+    
+    solved = window[r0 - h0:r1 - h0, c0 - w0:c1 - w0]
+    own = distance[r0:r1, c0:c1]
+    changed = solved < own - tolerance if tolerance else solved < own
+    np.minimum(own, solved, out=own)
+    
+    improved = int(np.count_nonzero(changed))
+    neighbors = []
+    if improved:
+        edges = {-1: slice(0, 1), 0: slice(None), 1: slice(-1, None)}
+        for dr in (-1, 0, 1):
+            for dc in (-1, 0, 1):
+                if (dr or dc) and changed[edges[dr], edges[dc]].any():
+                    neighbors.append((dr, dc))
+    return improved, neighbors
+
+
+def _init_tile_worker(distance_name: str, cost_name: str, shape: Tuple[int, int],
+                      tolerance: float):
+    """Attach the shared distance and cost rasters once per worker"""
+    for key, name in (('distance', distance_name), ('cost', cost_name)):
+        block = shared_memory.SharedMemory(name=name)
+        _worker_state[key + '_block'] = block
+        _worker_state[key] = np.ndarray(shape, dtype=np.float64, buffer=block.buf)
+    _worker_state['tolerance'] = tolerance
+
+
+def _tile_worker(bounds: Tuple[int, int, int, int]) -> Tuple[int, List[Tuple[int, int]]]:
+    """Pool task wrapper around _solve_tile"""
+    return _solve_tile(_worker_state['distance'], _worker_state['cost'], bounds,
+                       _worker_state['tolerance'])
+
+
+def tiled_cost_distance(cost_map: np.ndarray, source, tile_size: int = DEFAULT_TILE_SIZE,
+                        processes: Optional[int] = None, tolerance: float = 0.0,
+                        max_rounds: int = MAX_SWEEP_ITERATIONS) -> Tuple[np.ndarray, np.ndarray, dict]:
+    """
+    Accumulated cost from a source to every pixel, tile by tile across cores
+    
+    The distance and cost rasters live in shared memory; worker processes
+    receive only tile bounds. Each round solves every active tile with the
+    sweep engine of sweep_cost_distance, seeded with the current field on
+    the one-pixel halo it shares with its neighbors, and activates the
+    neighbors whose halo it lowered. Rounds repeat until no tile is active,
+    which gives the same field as cost_distance.
+    
+    Args:
+        cost_map: 2D array of terrain costs (positive, inf for impassable)
+        source: Source coordinates (row, col), or a sequence of them
+        tile_size: Edge length of the tiles in pixels
+        processes: Number of worker processes (1 runs in this process,
+            None uses every core)
+        tolerance: Improvements up to this amount do not reactivate tiles
+        max_rounds: Most rounds before giving up
+        
+    Returns:
+        distance: Accumulated cost raster (float64, inf where unreachable)
+        backlink: Direction raster (uint8) as returned by cost_distance
+        report: Dict with the rounds run, tiles solved ('tile_solves'),
+            tile count, whether the field converged and the wall time
+    """
+    if tile_size < 1:
+        raise ValueError("Tile size must be positive")
+    t0 = time.perf_counter()
+    rows, cols = cost_map.shape
+    sources = _as_points(source)
+    for row, col in sources:
+        if not (0 <= row < rows and 0 <= col < cols):
+            raise ValueError("Source point out of bounds")
+    
+    cost = np.ascontiguousarray(cost_map, dtype=np.float64)
+    if not np.all(cost > 0):
+        raise ValueError("Sweeping needs positive pixel costs")
+    
+    grid = _tile_grid((rows, cols), tile_size)
+    tile_rows, tile_cols = len(grid), len(grid[0])
+    active = {(row // tile_size, col // tile_size) for row, col in sources}
+    rounds = 0
+    solves = 0
+    
+    distance = np.full((rows, cols), np.inf)
+    for row, col in sources:
+        distance[row, col] = 0.0
+    
+    blocks = []
+    shared = None
+    pool = None
+    try:
+        if processes != 1 and tile_rows * tile_cols > 1:
+            for array in (distance, cost):
+                block = shared_memory.SharedMemory(create=True, size=array.nbytes)
+                blocks.append(block)
+                np.ndarray(array.shape, dtype=np.float64, buffer=block.buf)[:] = array
+            shared = np.ndarray((rows, cols), dtype=np.float64, buffer=blocks[0].buf)
+            pool = ProcessPoolExecutor(max_workers=processes, initializer=_init_tile_worker,
+                                       initargs=(blocks[0].name, blocks[1].name, (rows, cols),
+                                                 tolerance))
+        
+        while active and rounds < max_rounds:
+            tiles = sorted(active)
+            if pool is None:
+                results = [_solve_tile(distance, cost, grid[i][j], tolerance) for i, j in tiles]
+            else:
+                results = list(pool.map(_tile_worker, [grid[i][j] for i, j in tiles]))
+            
+            active = set()
+            for (i, j), (_, neighbors) in zip(tiles, results):
+                for dr, dc in neighbors:
+                    if 0 <= i + dr < tile_rows and 0 <= j + dc < tile_cols:
+                        active.add((i + dr, j + dc))
+            rounds += 1
+            solves += len(tiles)
+        
+        if shared is not None:
+            distance[:] = shared
+    finally:
+        if pool is not None:
+            pool.shutdown()
+        shared = None
+        for block in blocks:
+            block.close()
+            block.unlink()
+    
+    backlink = _field_backlinks(distance, sources)
+    report = {
+        'rounds': rounds,
+        'tile_solves': solves,
+        'tiles': tile_rows * tile_cols,
+        'converged': not active,
+        'seconds': time.perf_counter() - t0,
+    }
+    return distance, backlink, report
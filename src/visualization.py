@@ -26,7 +26,7 @@ class RouteVisualizer:
         
         Args:
             image: Original satellite image
-            path: List of (row, col) coordinates forming the route
+            path: Route pixels or vertices (row, col), e.g. from simplify_path
             start: Start point coordinates
             end: End point coordinates
             
@@ -36,11 +36,11 @@ class RouteVisualizer:
         # Make a copy to avoid modifying original
         result = image.copy()
         
-        # Draw the path
-        for i in range(len(path) - 1):
-            pt1 = (path[i][1], path[i][0])  # (col, row) for cv2
-            pt2 = (path[i+1][1], path[i+1][0])
-            cv2.line(result, pt1, pt2, self.route_color, self.line_thickness)
+        # Draw the path as one polyline, (col, row) for cv2
+        points = np.asarray(path, dtype=np.int32).reshape(-1, 2)[:, ::-1]
+        if len(points) > 1:
+            cv2.polylines(result, [np.ascontiguousarray(points).reshape(-1, 1, 2)], False,
+                          self.route_color, self.line_thickness)
         
         # Draw start marker
         start_pt = (start[1], start[0])
@@ -0,0 +1,43 @@
+"""
+Shared helpers for the test modules: puts src/ on the import path and
+builds small random cost maps
+"""
+
+import os
+import sys
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+SEEDS = range(5)
+SHAPE = (24, 31)
+
+
+def random_cost_map(seed: int, integer: bool = False, shape=SHAPE) -> np.ndarray:
+    """Random positive cost map, with integer costs for the bucket engine"""
+    rng = np.random.default_rng(seed)
+    if integer:
+        return rng.integers(1, 50, shape).astype(np.float32)
+    return rng.uniform(0.5, 50.0, shape)
+
+
+def random_points(seed: int, shape=SHAPE):
+    """Random distinct start and end pixels"""
+    rng = np.random.default_rng(seed + 100)
+    start = tuple(int(v) for v in rng.integers(0, shape))
+    end = start
+    while end == start:
+        end = tuple(int(v) for v in rng.integers(0, shape))
+    return start, end
+
+
+def route_cost(cost_map: np.ndarray, path) -> float:
+    """Cost of a route under the per-pixel movement model"""
+    return float(sum(cost_map[row, col] for row, col in list(path)[1:]))
+
+
+def is_connected(path) -> bool:
+    """Whether every step of a route moves to one of the 8 neighbors"""
+    steps = np.abs(np.diff(np.asarray(path), axis=0))
+    return bool(np.all(steps.max(axis=1) == 1))
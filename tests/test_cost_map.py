@@ -0,0 +1,68 @@
+"""
+Tests of the lookup-table cost maps in cost_map.py
+"""
+
+import unittest
+
+import numpy as np
+
+from support import SHAPE
+from cost_map import CostMapGenerator
+
+
+def reference_cost_map(generator: CostMapGenerator, mask: np.ndarray) -> np.ndarray:
+    """One comparison per class, as the generator did before its lookup table"""
+    cost_map = np.zeros(mask.shape, dtype=np.float32)
+    for class_id, cost in generator.terrain_costs.items():
+        cost_map[mask == class_id] = cost
+    return cost_map
+
+
+class CostMapTest(unittest.TestCase):
+    """Lookup-table cost maps match the per-class comparison"""
+    
+    def setUp(self):
+        self.generator = CostMapGenerator()
+        # Class 6 has no cost
+        self.mask = np.random.default_rng(0).integers(0, 7, SHAPE)
+    
+    def test_matches_reference(self):
+        expected = reference_cost_map(self.generator, self.mask)
+        for dtype in (np.uint8, np.int32, np.int64):
+            np.testing.assert_array_equal(self.generator.generate_cost_map(self.mask.astype(dtype)), expected)
+        float_mask = self.mask.astype(np.float64)
+        np.testing.assert_array_equal(self.generator.generate_cost_map(float_mask), expected)
+    
+    def test_large_class_ids(self):
+        generator = CostMapGenerator({0: 5, 300: 7})
+        mask = np.array([[0, 300], [299, 1000]])
+        np.testing.assert_array_equal(generator.generate_cost_map(mask), [[5, 7], [0, 0]])
+    
+    def test_integer_output(self):
+        cost_map = self.generator.generate_cost_map(self.mask, dtype=np.uint16)
+        self.assertEqual(cost_map.dtype, np.uint16)
+        np.testing.assert_array_equal(cost_map, reference_cost_map(self.generator, self.mask))
+        with self.assertRaises(ValueError):
+            CostMapGenerator({0: 2.5}).generate_cost_map(self.mask, dtype=np.uint16)
+        with self.assertRaises(ValueError):
+            CostMapGenerator({0: 70000}).generate_cost_map(self.mask, dtype=np.uint16)
+    
+    def test_output_buffer(self):
+        out = np.empty(SHAPE, dtype=np.float64)
+        self.assertIs(self.generator.generate_cost_map(self.mask, out=out), out)
+        np.testing.assert_array_equal(out, reference_cost_map(self.generator, self.mask))
+        with self.assertRaises(ValueError):
+            self.generator.generate_cost_map(self.mask, out=np.empty((5, 5)))
+    
+    def test_negative_class_ids(self):
+        with self.assertRaises(ValueError):
+            self.generator.generate_cost_map(np.array([[0, -1]]))
+    
+    def test_update_costs(self):
+        self.generator.update_costs({4: 10})
+        cost_map = self.generator.generate_cost_map(self.mask)
+        self.assertTrue((cost_map[self.mask == 4] == 10).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+Tests of the HPA* cluster abstraction in hierarchical.py
+"""
+
+import unittest
+
+import numpy as np
+
+from support import SEEDS, is_connected, random_cost_map, random_points, route_cost
+from hierarchical import HierarchicalPathfinder
+from pathfinding import cost_distance
+
+SHAPE = (48, 60)
+
+
+class HierarchicalTest(unittest.TestCase):
+    """Refined routes are valid and never cheaper than the optimum"""
+    
+    def check_refine(self, refine: str):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed, shape=SHAPE)
+            start, end = random_points(seed, shape=SHAPE)
+            pathfinder = HierarchicalPathfinder(cluster_size=12, entrance_width=4, refine=refine)
+            path = pathfinder.find_path(cost_map, start, end)
+            self.assertEqual((tuple(path[0]), tuple(path[-1])), (start, end))
+            self.assertTrue(is_connected(path))
+            self.assertAlmostEqual(route_cost(cost_map, path), pathfinder.cost, places=6)
+            optimum = cost_distance(cost_map, start)[0][end]
+            self.assertGreaterEqual(pathfinder.cost, optimum - 1e-6)
+    
+    def test_corridor(self):
+        self.check_refine('corridor')
+    
+    def test_legs(self):
+        self.check_refine('legs')
+    
+    def test_uniform_map_is_exact(self):
+        cost_map = np.ones(SHAPE)
+        pathfinder = HierarchicalPathfinder(cluster_size=12, entrance_width=4)
+        pathfinder.find_path(cost_map, (2, 3), (45, 50))
+        self.assertEqual(pathfinder.cost, 47.0)
+    
+    def test_blocked(self):
+        cost_map = np.ones(SHAPE)
+        cost_map[:, 30] = np.inf
+        self.assertIsNone(HierarchicalPathfinder(cluster_size=12).find_path(cost_map, (0, 0), (0, 59)))
+    
+    def test_unknown_refine_mode(self):
+        with self.assertRaises(ValueError):
+            HierarchicalPathfinder(refine='exact').find_path(np.ones(SHAPE), (0, 0), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()
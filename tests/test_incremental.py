@@ -0,0 +1,100 @@
+"""
+Tests of the D* Lite repairs in incremental.py
+"""
+
+import unittest
+
+import numpy as np
+
+from support import SEEDS, SHAPE, is_connected, random_cost_map, random_points, route_cost
+from incremental import IncrementalPathfinder
+from pathfinding import cost_distance
+
+
+def changed_maps(cost_map: np.ndarray, seed: int):
+    """Local, class-wide and mixed changes of a cost map, applied in turn"""
+    rng = np.random.default_rng(seed + 200)
+    raised = cost_map.copy()
+    raised[8:14, 10:18] *= 5
+    lowered = raised.copy()
+    lowered[4:20, 3:9] /= 4
+    classes = lowered.copy()
+    classes[np.round(cost_map) % 3 == 0] *= 3
+    mixed = classes * rng.choice([0.5, 1.0, 2.0], size=cost_map.shape)
+    return [('raised', raised), ('lowered', lowered), ('classes', classes), ('mixed', mixed)]
+
+
+class IncrementalTest(unittest.TestCase):
+    """Planned and repaired routes match cost_distance"""
+    
+    def check_route(self, pathfinder: IncrementalPathfinder, path, cost_map, start, end):
+        self.assertEqual((tuple(path[0]), tuple(path[-1])), (start, end))
+        self.assertTrue(is_connected(path))
+        self.assertAlmostEqual(route_cost(cost_map, path), pathfinder.cost, places=6)
+        self.assertAlmostEqual(pathfinder.cost, cost_distance(cost_map, start)[0][end], places=6)
+    
+    def test_plan(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            pathfinder = IncrementalPathfinder()
+            path = pathfinder.plan(cost_map, start, end)
+            self.check_route(pathfinder, path, cost_map, start, end)
+    
+    def test_update_costs(self):
+        for fraction in (0.5, 1.0):
+            for seed in SEEDS:
+                cost_map = random_cost_map(seed)
+                start, end = random_points(seed)
+                pathfinder = IncrementalPathfinder(max_changed_fraction=fraction)
+                pathfinder.plan(cost_map, start, end)
+                for name, new_map in changed_maps(cost_map, seed):
+                    with self.subTest(fraction=fraction, seed=seed, change=name):
+                        path = pathfinder.update_costs(new_map)
+                        self.check_route(pathfinder, path, new_map, start, end)
+    
+    def test_local_change_is_repaired(self):
+        cost_map = np.ones(SHAPE)
+        pathfinder = IncrementalPathfinder()
+        pathfinder.plan(cost_map, (12, 0), (12, 30))
+        new_map = cost_map.copy()
+        new_map[10:15, 14:17] = 20.0
+        path = pathfinder.update_costs(new_map)
+        self.assertFalse(pathfinder.last_update['replanned'])
+        self.check_route(pathfinder, path, new_map, (12, 0), (12, 30))
+        
+        new_map[10:15, 14:17] = 0.25
+        path = pathfinder.update_costs(new_map)
+        self.assertFalse(pathfinder.last_update['replanned'])
+        self.check_route(pathfinder, path, new_map, (12, 0), (12, 30))
+    
+    def test_unchanged_costs(self):
+        cost_map = random_cost_map(0)
+        start, end = random_points(0)
+        pathfinder = IncrementalPathfinder()
+        path = pathfinder.plan(cost_map, start, end)
+        self.assertEqual(pathfinder.update_costs(cost_map.copy()), path)
+        self.assertEqual(pathfinder.last_update, {'changed': 0, 'expansions': 0, 'replanned': False})
+    
+    def test_move_start(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            pathfinder = IncrementalPathfinder()
+            path = pathfinder.plan(cost_map, start, end)
+            new_map = changed_maps(cost_map, seed)[-1][1]
+            pathfinder.update_costs(new_map)
+            
+            start = tuple(path[len(path) // 2])
+            path = pathfinder.move_start(start)
+            self.check_route(pathfinder, path, new_map, start, end)
+    
+    def test_shape_changed(self):
+        pathfinder = IncrementalPathfinder()
+        pathfinder.plan(np.ones(SHAPE), (0, 0), (5, 5))
+        with self.assertRaises(ValueError):
+            pathfinder.update_costs(np.ones((10, 10)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,784 @@
+"""
+Tests of AStarPathfinder and the routing helpers in pathfinding.py
+
+Run from the repository root with:
+    python -m unittest discover tests
+"""
+
+import itertools
+import unittest
+
+import numpy as np
+
+from support import SEEDS, SHAPE, is_connected, random_cost_map, random_points, route_cost
+from pathfinding import (BUDGET_CHECK_INTERVAL, HEAP_ENTRY_BYTES, MAX_BUCKET_COST, MAX_CHAIN_RUN,
+                         MAX_ORDERED_WAYPOINTS, AStarPathfinder, PixelPath, alternative_routes,
+                         build_cost_pyramid, cost_distance, cost_matrix, integer_cost_bound,
+                         landmark_table, path_length, path_statistics, polygon_mask,
+                         rasterize_path, route_mask, simplify_path, trace_path)
+
+
+class EngineCostTest(unittest.TestCase):
+    """Every engine must find a route as cheap as the cost-distance field"""
+    
+    def check_engine(self, pathfinder: AStarPathfinder, integer: bool = False, **options):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed, integer)
+            start, end = random_points(seed)
+            distance, _ = cost_distance(cost_map, start)
+            
+            path = pathfinder.find_path(cost_map, start, end, **options)
+            self.assertIsNotNone(path)
+            self.assertEqual(tuple(path[0]), start)
+            self.assertEqual(tuple(path[-1]), end)
+            self.assertTrue(is_connected(path))
+            self.assertAlmostEqual(pathfinder.cost, distance[end], places=6)
+            self.assertAlmostEqual(route_cost(cost_map, path), distance[end], places=6)
+    
+    def test_array(self):
+        self.check_engine(AStarPathfinder(engine='array'))
+    
+    def test_dict(self):
+        self.check_engine(AStarPathfinder(engine='dict'))
+    
+    def test_unreachable(self):
+        cost_map = random_cost_map(0)
+        allowed = np.ones(SHAPE, dtype=bool)
+        allowed[:, SHAPE[1] // 2] = False
+        pathfinder = AStarPathfinder()
+        self.assertIsNone(pathfinder.find_path(cost_map, (0, 0), (0, SHAPE[1] - 1), allowed=allowed))
+    
+    def test_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            AStarPathfinder(engine='quantum').find_path(random_cost_map(0), (0, 0), (1, 1))
+    
+    
+    def test_bucket(self):
+        pathfinder = AStarPathfinder(engine='bucket')
+        self.check_engine(pathfinder, integer=True)
+        self.assertEqual(pathfinder.queue, 'bucket')
+    
+    def test_bucket_fallback(self):
+        pathfinder = AStarPathfinder(engine='bucket')
+        self.check_engine(pathfinder)
+        self.assertEqual(pathfinder.queue, 'heap')
+    
+    def test_bidirectional(self):
+        self.check_engine(AStarPathfinder(engine='bidirectional'))
+    
+    def test_bidirectional_unreachable(self):
+        cost_map = random_cost_map(0)
+        cost_map[:, 15] = np.inf
+        pathfinder = AStarPathfinder(engine='bidirectional')
+        self.assertIsNone(pathfinder.find_path(cost_map, (0, 0), (23, 30)))
+        self.assertGreater(pathfinder.expansions, 0)
+    
+    def test_large_costs_fall_back(self):
+        cost_map = random_cost_map(0, integer=True)
+        cost_map[0, 0] = MAX_BUCKET_COST + 1
+        self.assertIsNone(integer_cost_bound(cost_map))
+        pathfinder = AStarPathfinder(engine='bucket')
+        pathfinder.find_path(cost_map, (0, 0), (5, 5))
+        self.assertEqual(pathfinder.queue, 'heap')
+    
+    def test_ring_counts_against_memory_budget(self):
+        cost_map = random_cost_map(0, integer=True) * 1000
+        pathfinder = AStarPathfinder(engine='bucket')
+        self.assertIsNone(pathfinder.find_path(cost_map, (0, 0), (20, 20), max_memory=100_000))
+        self.assertEqual(pathfinder.budget_report['exceeded'], 'memory')
+        self.assertEqual(pathfinder.expansions, 0)
+    
+    def test_alt(self):
+        self.check_engine(AStarPathfinder(), heuristic='alt')
+        self.check_engine(AStarPathfinder(engine='bidirectional'), heuristic='alt')
+    
+    def test_scaled(self):
+        self.check_engine(AStarPathfinder(), heuristic='scaled')
+        self.check_engine(AStarPathfinder(engine='bucket'), integer=True, heuristic='scaled')
+    
+    def test_weighted_bound(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            optimum = cost_distance(cost_map, start)[0][end]
+            for weight in (1.5, 3.0):
+                pathfinder = AStarPathfinder()
+                path = pathfinder.find_path(cost_map, start, end, heuristic='scaled', weight=weight)
+                self.assertAlmostEqual(route_cost(cost_map, path), pathfinder.cost, places=6)
+                self.assertGreaterEqual(pathfinder.cost, optimum - 1e-6)
+                self.assertLessEqual(pathfinder.cost, weight * optimum + 1e-6)
+                self.assertLessEqual(pathfinder.suboptimality, weight)
+    
+    def test_weight_below_one(self):
+        with self.assertRaises(ValueError):
+            AStarPathfinder().find_path(random_cost_map(0), (0, 0), (5, 5), weight=0.5)
+
+
+class CostDistanceTest(unittest.TestCase):
+    """cost_distance fields and the routes trace_path reads from them"""
+    
+    def test_trace_path_matches_field(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            distance, backlink = cost_distance(cost_map, start)
+            path = trace_path(backlink, end)
+            self.assertEqual((path[0], path[-1]), (start, end))
+            self.assertTrue(is_connected(path))
+            self.assertAlmostEqual(route_cost(cost_map, path), distance[end], places=6)
+    
+    def test_multiple_sources(self):
+        cost_map = random_cost_map(1)
+        sources = [(0, 0), (10, 20), (23, 5)]
+        distance, _ = cost_distance(cost_map, sources)
+        single = np.min([cost_distance(cost_map, source)[0] for source in sources], axis=0)
+        np.testing.assert_allclose(distance, single)
+    
+    def test_targets_are_exact(self):
+        cost_map = random_cost_map(2)
+        targets = [(3, 4), (20, 30)]
+        full, _ = cost_distance(cost_map, (12, 12))
+        partial, _ = cost_distance(cost_map, (12, 12), targets=targets)
+        for target in targets:
+            self.assertAlmostEqual(partial[target], full[target])
+    
+    def test_unreachable(self):
+        cost_map = np.full(SHAPE, np.inf)
+        cost_map[:5, :5] = 1.0
+        distance, backlink = cost_distance(cost_map, (0, 0))
+        self.assertTrue(np.isinf(distance[10, 10]))
+        self.assertIsNone(trace_path(backlink, (10, 10)))
+    
+    def test_rejects_bad_input(self):
+        cost_map = random_cost_map(0)
+        with self.assertRaises(ValueError):
+            cost_distance(cost_map, (SHAPE[0], 0))
+        with self.assertRaises(ValueError):
+            cost_distance(cost_map, (0, 0), engine='fast')
+
+
+class CostMatrixTest(unittest.TestCase):
+    """cost_matrix entries match single-source cost_distance fields"""
+    
+    def expected(self, cost_map, sources, targets):
+        return np.array([[cost_distance(cost_map, source)[0][target] for target in targets]
+                         for source in sources])
+    
+    def test_matrix(self):
+        cost_map = random_cost_map(3)
+        sources = [(0, 0), (12, 15)]
+        targets = [(23, 30), (5, 25), (20, 2)]
+        matrix, paths = cost_matrix(cost_map, sources, targets, return_paths=True)
+        np.testing.assert_allclose(matrix, self.expected(cost_map, sources, targets))
+        for i, source in enumerate(sources):
+            for j, target in enumerate(targets):
+                path = paths[i][j]
+                self.assertEqual((path[0], path[-1]), (source, target))
+                self.assertAlmostEqual(route_cost(cost_map, path), matrix[i, j], places=6)
+    
+    def test_more_sources_than_targets(self):
+        # Searches run from the targets and are converted back
+        cost_map = random_cost_map(4)
+        sources = [(0, 0), (12, 15), (23, 30)]
+        targets = [(5, 25)]
+        matrix = cost_matrix(cost_map, sources, targets)
+        np.testing.assert_allclose(matrix, self.expected(cost_map, sources, targets))
+    
+    def test_worker_processes(self):
+        cost_map = random_cost_map(5)
+        sources = [(0, 0), (12, 15)]
+        targets = [(23, 30), (5, 25)]
+        np.testing.assert_allclose(cost_matrix(cost_map, sources, targets, processes=2),
+                                   self.expected(cost_map, sources, targets))
+
+
+class MultiresolutionTest(unittest.TestCase):
+    """Coarse-to-fine routes against the exact optimum"""
+    
+    def test_route_and_report(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            optimum = cost_distance(cost_map, start)[0][end]
+            pathfinder = AStarPathfinder()
+            path = pathfinder.find_path_multiresolution(cost_map, start, end, levels=2,
+                                                        corridor_width=2, compare_exact=True)
+            self.assertEqual((tuple(path[0]), tuple(path[-1])), (start, end))
+            self.assertTrue(is_connected(path))
+            self.assertAlmostEqual(route_cost(cost_map, path), pathfinder.cost, places=6)
+            self.assertGreaterEqual(pathfinder.cost, optimum - 1e-6)
+            report = pathfinder.multiresolution_report
+            self.assertAlmostEqual(report['exact_cost'], optimum, places=6)
+            self.assertAlmostEqual(report['cost_deviation'], pathfinder.cost / optimum - 1.0)
+    
+    def test_wide_corridor_is_exact(self):
+        cost_map = random_cost_map(1)
+        start, end = random_points(1)
+        pathfinder = AStarPathfinder()
+        pathfinder.find_path_multiresolution(cost_map, start, end, levels=2, corridor_width=64)
+        self.assertAlmostEqual(pathfinder.cost, cost_distance(cost_map, start)[0][end], places=6)
+    
+    def test_cost_pyramid(self):
+        cost_map = random_cost_map(2, shape=(5, 7))
+        pyramid = build_cost_pyramid(cost_map, 5)
+        self.assertEqual([level.shape for level in pyramid], [(5, 7), (3, 4), (2, 2), (1, 1)])
+        self.assertAlmostEqual(pyramid[1][0, 0], cost_map[:2, :2].mean())
+        self.assertAlmostEqual(pyramid[1][2, 3], cost_map[4, 6])
+
+
+class LandmarkTest(unittest.TestCase):
+    """Landmark bounds never overestimate and tables are cached per map"""
+    
+    def test_bounds_are_admissible(self):
+        cost_map = random_cost_map(6)
+        table = landmark_table(cost_map, count=4)
+        goal = (20, 25)
+        h = table.bound_function(cost_map, goal)
+        h_reverse = table.bound_function(cost_map, goal, reverse=True)
+        from_goal = cost_distance(cost_map, goal)[0]
+        for row in range(0, SHAPE[0], 3):
+            for col in range(0, SHAPE[1], 3):
+                to_goal = cost_distance(cost_map, (row, col), targets=[goal])[0][goal]
+                self.assertLessEqual(h(row, col), to_goal + 1e-9)
+                self.assertLessEqual(h_reverse(row, col), from_goal[row, col] + 1e-9)
+    
+    def test_cached_by_content(self):
+        cost_map = random_cost_map(7)
+        self.assertIs(landmark_table(cost_map, count=2), landmark_table(cost_map.copy(), count=2))
+        self.assertIsNot(landmark_table(cost_map, count=2), landmark_table(cost_map + 1, count=2))
+
+
+class AnytimeTest(unittest.TestCase):
+    """ARA* improves its route until it reaches the optimum"""
+    
+    def test_converges_to_optimum(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            optimum = cost_distance(cost_map, start)[0][end]
+            results = list(AStarPathfinder().find_path_anytime(cost_map, start, end,
+                                                               heuristic='scaled'))
+            self.assertTrue(results)
+            costs = [cost for _, cost, _ in results]
+            self.assertEqual(costs, sorted(costs, reverse=True))
+            for path, cost, bound in results:
+                self.assertEqual((tuple(path[0]), tuple(path[-1])), (start, end))
+                self.assertAlmostEqual(route_cost(cost_map, path), cost, places=6)
+                self.assertLessEqual(cost, bound * optimum + 1e-6)
+            self.assertAlmostEqual(costs[-1], optimum, places=6)
+    
+    def test_first_route_within_budget(self):
+        cost_map = random_cost_map(1)
+        results = list(AStarPathfinder().find_path_anytime(cost_map, (0, 0), (23, 30), time_budget=0))
+        self.assertEqual(len(results), 1)
+
+
+
+class AnyAngleTest(unittest.TestCase):
+    """Theta* vertices rasterize to an optimal grid route"""
+    
+    def test_matches_cost_distance(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            pathfinder = AStarPathfinder()
+            vertices = pathfinder.find_path_any_angle(cost_map, start, end, compare_grid=True)
+            self.assertEqual((tuple(vertices[0]), tuple(vertices[-1])), (start, end))
+            path = rasterize_path(vertices)
+            self.assertTrue(is_connected(path))
+            self.assertAlmostEqual(route_cost(cost_map, path), pathfinder.cost, places=6)
+            self.assertAlmostEqual(pathfinder.cost, cost_distance(cost_map, start)[0][end], places=6)
+            self.assertAlmostEqual(pathfinder.any_angle_report['grid_cost'], pathfinder.cost, places=6)
+    
+    def test_uniform_map_is_straight(self):
+        vertices = AStarPathfinder().find_path_any_angle(np.ones(SHAPE), (0, 0), (7, 30))
+        self.assertEqual(vertices, [(0, 0), (7, 30)])
+    
+    def test_avoids_disallowed_pixels(self):
+        allowed = np.ones(SHAPE, dtype=bool)
+        allowed[3:, 15] = False
+        vertices = AStarPathfinder().find_path_any_angle(np.ones(SHAPE), (20, 0), (20, 30), allowed=allowed)
+        self.assertTrue(all(allowed[pixel] for pixel in rasterize_path(vertices)))
+        self.assertLessEqual(len(vertices), 4)
+
+
+
+class MetricMovementTest(unittest.TestCase):
+    """The metric model prices steps by length and agrees with path_statistics"""
+    
+    def test_cost_matches_statistics(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            pathfinder = AStarPathfinder(movement='metric')
+            path = pathfinder.find_path(cost_map, start, end)
+            self.assertTrue(is_connected(path))
+            stats = path_statistics(cost_map, path, movement='metric')
+            self.assertAlmostEqual(stats['total_cost'], pathfinder.cost, places=6)
+            
+            # The cell model's optimum is a metric route too, never a cheaper one
+            cell_path = AStarPathfinder().find_path(cost_map, start, end)
+            cell_stats = path_statistics(cost_map, cell_path, movement='metric')
+            self.assertLessEqual(pathfinder.cost, cell_stats['total_cost'] + 1e-6)
+    
+    def test_uniform_map_is_octile_distance(self):
+        pathfinder = AStarPathfinder(movement='metric')
+        pathfinder.find_path(np.ones(SHAPE), (0, 0), (7, 30))
+        self.assertAlmostEqual(pathfinder.cost, 7 * np.sqrt(2) + 23, places=9)
+    
+    def test_cell_statistics(self):
+        cost_map = random_cost_map(3)
+        class_map = np.arange(cost_map.size).reshape(SHAPE) % 4
+        path = AStarPathfinder().find_path(cost_map, (0, 0), (23, 30))
+        stats = path_statistics(cost_map, path, class_map, movement='cell')
+        self.assertAlmostEqual(stats['total_cost'], route_cost(cost_map, path), places=6)
+        self.assertAlmostEqual(sum(stats['cost_by_class'].values()), stats['total_cost'], places=6)
+        self.assertAlmostEqual(sum(stats['length_by_class'].values()), stats['length'], places=6)
+        self.assertAlmostEqual(stats['length'], path_length(path), places=9)
+    
+    def test_one_pixel_route(self):
+        cost_map = np.full(SHAPE, 3.0)
+        pathfinder = AStarPathfinder(movement='metric')
+        path = pathfinder.find_path(cost_map, (1, 1), (1, 1))
+        self.assertEqual(list(path), [(1, 1)])
+        self.assertEqual(pathfinder.cost, 0.0)
+        stats = path_statistics(cost_map, path)
+        self.assertEqual((stats['length'], stats['total_cost'], stats['average_cost']), (0.0, 0.0, 3.0))
+    
+    def test_unknown_movement(self):
+        with self.assertRaises(ValueError):
+            path_statistics(np.ones(SHAPE), [(0, 0), (1, 1)], movement='manhattan')
+    
+    def test_cell_only_searches_reject_metric(self):
+        pathfinder = AStarPathfinder(movement='metric')
+        with self.assertRaises(ValueError):
+            list(pathfinder.find_path_anytime(np.ones(SHAPE), (0, 0), (5, 5)))
+        with self.assertRaises(ValueError):
+            pathfinder.find_path_any_angle(np.ones(SHAPE), (0, 0), (5, 5))
+
+
+
+class LatticeTest(unittest.TestCase):
+    """Heading-lattice routes are priced like their pixels"""
+    
+    def test_cost_matches_statistics(self):
+        for movement in ('cell', 'metric'):
+            for headings in (8, 16):
+                for seed in SEEDS:
+                    cost_map = random_cost_map(seed)
+                    start, end = random_points(seed)
+                    pathfinder = AStarPathfinder(engine='lattice', movement=movement,
+                                                 headings=headings, max_turn=2, turn_penalty=1.5)
+                    path = pathfinder.find_path(cost_map, start, end)
+                    self.assertEqual((tuple(path[0]), tuple(path[-1])), (start, end))
+                    self.assertTrue(is_connected(path))
+                    stats = path_statistics(cost_map, path, movement=movement)
+                    self.assertAlmostEqual(stats['total_cost'] + pathfinder.lattice_report['turn_cost'],
+                                           pathfinder.cost, places=6)
+    
+    def test_unconstrained_matches_grid(self):
+        for movement in ('cell', 'metric'):
+            for seed in SEEDS:
+                cost_map = random_cost_map(seed)
+                start, end = random_points(seed)
+                grid = AStarPathfinder(movement=movement)
+                grid.find_path(cost_map, start, end)
+                lattice = AStarPathfinder(engine='lattice', movement=movement, max_turn=4)
+                lattice.find_path(cost_map, start, end)
+                self.assertAlmostEqual(lattice.cost, grid.cost, places=6)
+    
+    def test_straight_only(self):
+        pathfinder = AStarPathfinder(engine='lattice', max_turn=0)
+        self.assertIsNotNone(pathfinder.find_path(np.ones(SHAPE), (2, 2), (2, 20)))
+        self.assertIsNone(pathfinder.find_path(np.ones(SHAPE), (2, 2), (5, 20)))
+    
+    def test_bad_settings(self):
+        with self.assertRaises(ValueError):
+            AStarPathfinder(engine='lattice', headings=12).find_path(np.ones(SHAPE), (0, 0), (5, 5))
+        with self.assertRaises(ValueError):
+            AStarPathfinder(engine='lattice', max_turn=5).find_path(np.ones(SHAPE), (0, 0), (5, 5))
+
+
+
+class AlternativeRoutesTest(unittest.TestCase):
+    """Alternatives are valid, diverse and priced like their pixels"""
+    
+    def test_routes(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            optimum = cost_distance(cost_map, start)[0][end]
+            routes = alternative_routes(cost_map, start, end, k=4, max_overlap=0.7, max_stretch=1.5)
+            self.assertAlmostEqual(routes[0]['cost'], optimum, places=6)
+            self.assertEqual([route['cost'] for route in routes],
+                             sorted(route['cost'] for route in routes))
+            for route in routes:
+                path = route['path']
+                self.assertEqual((tuple(path[0]), tuple(path[-1])), (start, end))
+                self.assertTrue(is_connected(path))
+                self.assertEqual(len(set(path)), len(path))
+                self.assertAlmostEqual(route_cost(cost_map, path), route['cost'], places=6)
+                self.assertLessEqual(route['cost'], 1.5 * optimum + 1e-6)
+            for i, route in enumerate(routes[1:], 1):
+                for other in routes[:i]:
+                    shared = len(set(route['path']) & set(other['path'])) / len(route['path'])
+                    self.assertLessEqual(shared, 0.7)
+    
+    def test_finds_alternatives(self):
+        cost_map = np.ones(SHAPE)
+        cost_map[8:16, 10:21] = 1000.0
+        routes = alternative_routes(cost_map, (12, 0), (12, 30), k=2, max_stretch=1.2)
+        self.assertEqual(len(routes), 2)
+        sides = {route['path'][len(route['path']) // 2][0] < 12 for route in routes}
+        self.assertEqual(sides, {True, False})
+    
+    def test_unreachable(self):
+        cost_map = np.ones(SHAPE)
+        cost_map[:, 15] = np.inf
+        self.assertEqual(alternative_routes(cost_map, (0, 0), (0, 30)), [])
+    
+    def test_bad_k(self):
+        with self.assertRaises(ValueError):
+            alternative_routes(np.ones(SHAPE), (0, 0), (5, 5), k=0)
+
+
+
+class WaypointTest(unittest.TestCase):
+    """Via-point routes visit every waypoint and cost the sum of their legs"""
+    
+    def waypoints(self, seed: int, count: int):
+        rng = np.random.default_rng(seed + 300)
+        cells = rng.choice(SHAPE[0] * SHAPE[1], size=count, replace=False)
+        return [divmod(int(cell), SHAPE[1]) for cell in cells]
+    
+    def leg_cost(self, cost_map: np.ndarray, points) -> float:
+        return sum(cost_distance(cost_map, a)[0][b] for a, b in zip(points, points[1:]))
+    
+    def test_legs_in_order(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            points = self.waypoints(seed, 4)
+            pathfinder = AStarPathfinder()
+            path = pathfinder.find_path_via(cost_map, points)
+            self.assertTrue(is_connected(path))
+            visits = [list(path).index(point) for point in points]
+            self.assertEqual(visits, sorted(visits))
+            self.assertEqual((visits[0], visits[-1]), (0, len(path) - 1))
+            self.assertAlmostEqual(route_cost(cost_map, path), pathfinder.cost, places=6)
+            self.assertAlmostEqual(pathfinder.cost, self.leg_cost(cost_map, points), places=6)
+            self.assertEqual(pathfinder.waypoint_report['order'], [0, 1, 2, 3])
+    
+    def test_optimize_order(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            points = self.waypoints(seed, 5)
+            best = min(self.leg_cost(cost_map, [points[0], *middle, points[-1]])
+                       for middle in itertools.permutations(points[1:-1]))
+            for pathfinder in (AStarPathfinder(), AStarPathfinder(engine='dict')):
+                path = pathfinder.find_path_via(cost_map, points, optimize_order=True)
+                order = pathfinder.waypoint_report['order']
+                self.assertEqual((order[0], order[-1]), (0, 4))
+                self.assertEqual(sorted(order), list(range(5)))
+                self.assertAlmostEqual(pathfinder.cost, best, places=6)
+                self.assertAlmostEqual(route_cost(cost_map, path), best, places=6)
+    
+    def test_worker_processes(self):
+        cost_map = random_cost_map(2)
+        points = self.waypoints(2, 4)
+        serial = AStarPathfinder().find_path_via(cost_map, points)
+        parallel = AStarPathfinder().find_path_via(cost_map, points, processes=2)
+        self.assertEqual(parallel, serial)
+    
+    def test_unreachable_leg(self):
+        cost_map = np.ones(SHAPE)
+        cost_map[:, 15] = np.inf
+        pathfinder = AStarPathfinder()
+        self.assertIsNone(pathfinder.find_path_via(cost_map, [(0, 0), (5, 5), (0, 30)]))
+        self.assertIsNone(pathfinder.waypoint_report['leg_costs'][1])
+    
+    def test_bad_waypoints(self):
+        with self.assertRaises(ValueError):
+            AStarPathfinder().find_path_via(np.ones(SHAPE), [(0, 0)])
+        with self.assertRaises(ValueError):
+            AStarPathfinder().find_path_via(np.ones(SHAPE), self.waypoints(0, MAX_ORDERED_WAYPOINTS + 3),
+                                            optimize_order=True)
+
+
+
+class SearchStatsTest(unittest.TestCase):
+    """Every engine reports its counters in search_stats"""
+    
+    def test_counters(self):
+        cost_map = random_cost_map(0, integer=True)
+        start, end = random_points(0)
+        for engine in ('array', 'bucket', 'bidirectional', 'lattice', 'dict'):
+            pathfinder = AStarPathfinder(engine=engine)
+            pathfinder.find_path(cost_map, start, end)
+            stats = pathfinder.search_stats
+            self.assertEqual(stats['expansions'], pathfinder.expansions)
+            self.assertGreater(stats['expansions'], 0)
+            self.assertGreaterEqual(stats['pushes'], stats['peak_open'])
+            self.assertGreater(stats['memory_bytes'], 0)
+            self.assertGreaterEqual(stats['seconds'], 0.0)
+            self.assertIsNone(stats['expanded'])
+    
+    def test_expanded_mask(self):
+        cost_map = random_cost_map(1)
+        start, end = random_points(1)
+        for engine in ('array', 'bidirectional', 'dict'):
+            pathfinder = AStarPathfinder(engine=engine)
+            pathfinder.find_path(cost_map, start, end, record_expanded=True)
+            expanded = pathfinder.search_stats['expanded']
+            self.assertEqual(expanded.shape, SHAPE)
+            self.assertEqual(np.count_nonzero(expanded), pathfinder.expansions)
+            self.assertTrue(expanded[start])
+    
+    def test_cleared_between_queries(self):
+        pathfinder = AStarPathfinder()
+        pathfinder.find_path(np.ones(SHAPE), (0, 0), (5, 5))
+        allowed = np.ones(SHAPE, dtype=bool)
+        allowed[:, 15] = False
+        self.assertIsNone(pathfinder.find_path(np.ones(SHAPE), (0, 0), (0, 30), allowed=allowed))
+        self.assertIsNone(pathfinder.cost)
+        self.assertEqual(pathfinder.search_stats['expansions'], 15 * SHAPE[0])
+
+
+
+class BudgetTest(unittest.TestCase):
+    """Searches stop at their budgets and report the best partial route"""
+    
+    def test_expansion_budget(self):
+        cost_map = random_cost_map(0, integer=True)
+        start, end = (0, 0), (23, 30)
+        optimum = cost_distance(cost_map, start)[0][end]
+        for engine in ('array', 'bucket', 'bidirectional', 'lattice'):
+            pathfinder = AStarPathfinder(engine=engine)
+            self.assertIsNone(pathfinder.find_path(cost_map, start, end, max_expansions=50))
+            report = pathfinder.budget_report
+            self.assertEqual((report['exceeded'], report['limit'], report['expansions']),
+                             ('expansions', 50, 50))
+            partial = report['partial_path']
+            self.assertEqual(tuple(partial[0]), start)
+            self.assertTrue(is_connected(partial))
+            self.assertAlmostEqual(route_cost(cost_map, partial), report['partial_cost'], places=6)
+            self.assertLessEqual(report['lower_bound'], optimum + 1e-6)
+    
+    def test_time_budget(self):
+        pathfinder = AStarPathfinder()
+        cost_map = random_cost_map(0, shape=(200, 200))
+        self.assertIsNone(pathfinder.find_path(cost_map, (0, 0), (199, 199), max_seconds=1e-9))
+        self.assertEqual(pathfinder.budget_report['exceeded'], 'seconds')
+        self.assertEqual(pathfinder.expansions, BUDGET_CHECK_INTERVAL)
+    
+    def test_memory_budget(self):
+        cost_map = random_cost_map(0)
+        pathfinder = AStarPathfinder()
+        self.assertIsNone(pathfinder.find_path(cost_map, (0, 0), (23, 30), max_memory=1000))
+        self.assertEqual(pathfinder.budget_report['exceeded'], 'memory')
+        self.assertEqual(pathfinder.expansions, 0)
+        
+        self.assertIsNone(pathfinder.find_path(cost_map, (0, 0), (23, 30), max_memory=20_000))
+        self.assertEqual(pathfinder.budget_report['exceeded'], 'memory')
+        self.assertLessEqual(pathfinder.search_stats['memory_bytes'], 20_000 + HEAP_ENTRY_BYTES)
+    
+    def test_generous_budget(self):
+        cost_map = random_cost_map(1)
+        start, end = random_points(1)
+        pathfinder = AStarPathfinder()
+        self.assertIsNone(pathfinder.find_path(cost_map, start, end, max_expansions=1))
+        path = pathfinder.find_path(cost_map, start, end, max_expansions=10**6, max_seconds=60,
+                                    max_memory=2**30)
+        self.assertIsNone(pathfinder.budget_report)
+        self.assertAlmostEqual(route_cost(cost_map, path), cost_distance(cost_map, start)[0][end], places=6)
+    
+    def test_bad_budgets(self):
+        with self.assertRaises(ValueError):
+            AStarPathfinder().find_path(np.ones(SHAPE), (0, 0), (5, 5), max_expansions=0)
+        with self.assertRaises(ValueError):
+            AStarPathfinder(engine='dict').find_path(np.ones(SHAPE), (0, 0), (5, 5), max_seconds=1.0)
+
+
+
+class RouteMaskTest(unittest.TestCase):
+    """Restricted routes match the field of the masked cost map"""
+    
+    def restrictions(self, seed: int):
+        rng = np.random.default_rng(seed + 400)
+        no_go = rng.random(SHAPE) < 0.15
+        corridor = np.zeros(SHAPE, dtype=np.int64)
+        corridor[2:22, 3:28] = 1
+        start, end = (2, 3), (21, 27)
+        no_go[start] = no_go[end] = False
+        return no_go, corridor, start, end
+    
+    def test_matches_masked_field(self):
+        for seed in SEEDS:
+            no_go, corridor, start, end = self.restrictions(seed)
+            allowed = ~no_go & corridor.astype(bool)
+            for engine, integer in (('array', False), ('bucket', True), ('bidirectional', False)):
+                cost_map = random_cost_map(seed, integer)
+                optimum = cost_distance(np.where(allowed, cost_map, np.inf), start)[0][end]
+                pathfinder = AStarPathfinder(engine=engine)
+                path = pathfinder.find_path(cost_map, start, end, no_go=no_go, corridor=corridor)
+                if not np.isfinite(optimum):
+                    self.assertIsNone(path)
+                    continue
+                self.assertTrue(is_connected(path))
+                self.assertTrue(all(allowed[pixel] for pixel in path))
+                self.assertAlmostEqual(pathfinder.cost, optimum, places=6)
+    
+    def test_cropped_search_matches_full_map(self):
+        for seed in SEEDS:
+            no_go, corridor, start, end = self.restrictions(seed)
+            cost_map = random_cost_map(seed)
+            cropped = AStarPathfinder()
+            path = cropped.find_path(cost_map, start, end, no_go=no_go, corridor=corridor,
+                                     record_expanded=True)
+            # Landmark searches run on the whole map
+            full = AStarPathfinder()
+            full.find_path(cost_map, start, end, heuristic='alt', no_go=no_go, corridor=corridor)
+            if path is None:
+                self.assertIsNone(full.cost)
+                continue
+            self.assertAlmostEqual(cropped.cost, full.cost, places=6)
+            expanded = cropped.search_stats['expanded']
+            self.assertEqual(expanded.shape, SHAPE)
+            self.assertFalse(expanded[corridor == 0].any())
+            self.assertEqual(np.count_nonzero(expanded), cropped.expansions)
+    
+    def test_polygon_corridor(self):
+        triangle = [(0, 0), (23, 0), (23, 30)]
+        inside = polygon_mask(SHAPE, triangle)
+        rows, cols = np.indices(SHAPE)
+        # Pixels within a pixel of the hypotenuse may go either way
+        self.assertTrue(inside[cols < rows * 30 / 23 - 1].all())
+        self.assertFalse(inside[cols > rows * 30 / 23 + 1].any())
+        path = AStarPathfinder().find_path(np.ones(SHAPE), (0, 0), (23, 30), corridor=triangle)
+        self.assertTrue(all(inside[pixel] for pixel in path))
+    
+    def test_obstacle_cost(self):
+        cost_map = random_cost_map(3)
+        pathfinder = AStarPathfinder()
+        path = pathfinder.find_path(cost_map, (0, 0), (23, 30), obstacle_cost=30.0)
+        if cost_map[0, 0] < 30.0 and cost_map[23, 30] < 30.0:
+            self.assertTrue(all(cost_map[pixel] < 30.0 for pixel in path))
+        else:
+            self.assertIsNone(path)
+    
+    def test_excluded_end_point(self):
+        no_go = np.zeros(SHAPE, dtype=bool)
+        no_go[5, 5] = True
+        self.assertIsNone(AStarPathfinder().find_path(np.ones(SHAPE), (0, 0), (5, 5), no_go=no_go))
+    
+    def test_route_mask(self):
+        cost_map = np.ones(SHAPE)
+        self.assertIsNone(route_mask(cost_map))
+        with self.assertRaises(ValueError):
+            route_mask(cost_map, corridor=np.ones((5, 5), dtype=bool))
+        with self.assertRaises(ValueError):
+            route_mask(cost_map, no_go=np.zeros((5, 5), dtype=bool))
+        with self.assertRaises(ValueError):
+            polygon_mask(SHAPE, [(0, 0), (5, 5)])
+
+
+
+class PixelPathTest(unittest.TestCase):
+    """PixelPath acts like a list of tuples and round-trips its encoding"""
+    
+    def test_list_behaviour(self):
+        points = [(0, 0), (1, 1), (1, 2), (2, 2)]
+        path = PixelPath(points)
+        self.assertEqual(len(path), 4)
+        self.assertEqual(list(path), points)
+        self.assertEqual(path, points)
+        self.assertEqual(path[1], (1, 1))
+        self.assertEqual(path[-1], (2, 2))
+        self.assertEqual(path[1:3], points[1:3])
+        self.assertIsInstance(path[1:3], PixelPath)
+        self.assertIs(np.asarray(path), path.points)
+        self.assertEqual(path.nbytes, 32)
+        self.assertNotEqual(path, points[:-1])
+    
+    def test_encode_round_trip(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            path = AStarPathfinder().find_path(cost_map, start, end)
+            data = path.encode()
+            self.assertLessEqual(len(data), 8 + 2 * (len(path) - 1))
+            self.assertEqual(PixelPath.decode(data), path)
+    
+    def test_long_runs(self):
+        path = PixelPath([(0, col) for col in range(MAX_CHAIN_RUN * 2 + 5)] + [(1, MAX_CHAIN_RUN * 2 + 5)])
+        data = path.encode()
+        self.assertEqual(len(data), 8 + 2 * 4)
+        self.assertEqual(PixelPath.decode(data), path)
+        self.assertEqual(PixelPath.decode(PixelPath([(3, 4)]).encode()), [(3, 4)])
+    
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            PixelPath([(0, 0), (0, 2)]).encode()
+        with self.assertRaises(ValueError):
+            PixelPath([]).encode()
+        with self.assertRaises(ValueError):
+            PixelPath.decode(b'\x00' * 9)
+        with self.assertRaises(ValueError):
+            PixelPath.decode(b'\x00' * 8 + bytes([9, 1]))
+
+
+
+class SimplifyTest(unittest.TestCase):
+    """Simplified routes are never more expensive and keep their via points"""
+    
+    def test_never_more_expensive(self):
+        for movement in ('cell', 'metric'):
+            for seed in SEEDS:
+                cost_map = random_cost_map(seed)
+                start, end = random_points(seed)
+                allowed = np.random.default_rng(seed).random(SHAPE) > 0.1
+                allowed[start] = allowed[end] = True
+                pathfinder = AStarPathfinder(movement=movement)
+                path = pathfinder.find_path(cost_map, start, end, allowed=allowed)
+                if path is None:
+                    continue
+                vertices = simplify_path(cost_map, path, allowed, movement)
+                self.assertEqual((vertices[0], vertices[-1]), (start, end))
+                self.assertLessEqual(len(vertices), len(path))
+                pixels = rasterize_path(vertices)
+                self.assertTrue(is_connected(pixels))
+                self.assertTrue(all(allowed[pixel] for pixel in pixels))
+                cost = path_statistics(cost_map, pixels, movement=movement)['total_cost']
+                self.assertLessEqual(cost, pathfinder.cost + 1e-6)
+    
+    def test_straight_route(self):
+        path = AStarPathfinder().find_path(np.ones(SHAPE), (0, 0), (7, 30))
+        self.assertEqual(simplify_path(np.ones(SHAPE), path), [(0, 0), (7, 30)])
+    
+    def test_keeps_via_points(self):
+        waypoints = [(0, 0), (12, 16), (0, 30)]
+        pathfinder = AStarPathfinder()
+        path = pathfinder.find_path_via(np.ones(SHAPE), waypoints)
+        keep = pathfinder.waypoint_report['waypoint_indices']
+        self.assertEqual([path[index] for index in keep], waypoints)
+        self.assertEqual(simplify_path(np.ones(SHAPE), path), [(0, 0), (0, 30)])
+        self.assertEqual(simplify_path(np.ones(SHAPE), path, keep=keep), waypoints)
+        
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            start, end = random_points(seed)
+            waypoints = [start, (12, 15), end]
+            path = pathfinder.find_path_via(cost_map, waypoints)
+            vertices = simplify_path(cost_map, path, keep=pathfinder.waypoint_report['waypoint_indices'])
+            self.assertTrue(set(waypoints) <= set(vertices))
+            self.assertLessEqual(route_cost(cost_map, rasterize_path(vertices)), pathfinder.cost + 1e-6)
+    
+    def test_bad_input(self):
+        path = [(0, 0), (1, 1), (2, 2)]
+        with self.assertRaises(ValueError):
+            simplify_path(np.ones(SHAPE), path, keep=[3])
+        with self.assertRaises(ValueError):
+            simplify_path(np.ones(SHAPE), path, movement='manhattan')
+
+
+if __name__ == '__main__':
+    unittest.main()
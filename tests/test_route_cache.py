@@ -0,0 +1,101 @@
+"""
+Tests of the memory and disk tiers of route_cache.py
+"""
+
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from support import SHAPE, random_cost_map, random_points
+from pathfinding import AStarPathfinder
+from route_cache import RouteCache
+
+
+class RouteCacheTest(unittest.TestCase):
+    """Cached queries return what the search returned"""
+    
+    def setUp(self):
+        self.cost_map = random_cost_map(0)
+        self.start, self.end = random_points(0)
+    
+    def test_memory_hit(self):
+        cache = RouteCache()
+        pathfinder = AStarPathfinder()
+        path = cache.find_path(pathfinder, self.cost_map, self.start, self.end)
+        cost = pathfinder.cost
+        cached = cache.find_path(pathfinder, self.cost_map.copy(), self.start, self.end)
+        self.assertEqual(cached, path)
+        self.assertEqual((pathfinder.cost, pathfinder.suboptimality, pathfinder.expansions), (cost, 1.0, 0))
+        self.assertIsNone(pathfinder.search_stats)
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+    
+    def test_key_covers_options(self):
+        cache = RouteCache()
+        pathfinder = AStarPathfinder()
+        cache.find_path(pathfinder, self.cost_map, self.start, self.end)
+        cache.find_path(pathfinder, self.cost_map, self.start, self.end, weight=2.0)
+        cache.find_path(AStarPathfinder(movement='metric'), self.cost_map, self.start, self.end)
+        changed = self.cost_map.copy()
+        changed[5, 5] += 1.0
+        cache.find_path(pathfinder, changed, self.start, self.end)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+    
+    def test_eviction(self):
+        pathfinder = AStarPathfinder()
+        cache = RouteCache(max_bytes=2000)
+        for end in [(23, col) for col in range(10)]:
+            cache.find_path(pathfinder, self.cost_map, (0, 0), end)
+            self.assertLessEqual(cache.memory_bytes, cache.max_bytes)
+        stats = cache.stats()
+        self.assertLess(stats['entries'], 10)
+        # The oldest entries went first
+        cache.find_path(pathfinder, self.cost_map, (0, 0), (23, 9))
+        self.assertEqual(cache.hits, 1)
+    
+    def test_budget_stopped_searches_are_not_cached(self):
+        cache = RouteCache()
+        pathfinder = AStarPathfinder()
+        self.assertIsNone(cache.find_path(pathfinder, self.cost_map, self.start, self.end, max_expansions=5))
+        self.assertEqual(cache.stats()['entries'], 0)
+    
+    def test_disk_round_trip(self):
+        blocked = np.ones(SHAPE, dtype=bool)
+        blocked[:, 15] = False
+        # A found route, an unreachable end and an excluded start, whose
+        # suboptimality is None
+        queries = [(self.start, self.end, None), ((0, 0), (0, 30), blocked), ((0, 15), (0, 30), blocked)]
+        with tempfile.TemporaryDirectory() as disk_dir:
+            writer = RouteCache(disk_dir=disk_dir)
+            expected = []
+            for start, end, allowed in queries:
+                pathfinder = AStarPathfinder()
+                path = writer.find_path(pathfinder, self.cost_map, start, end, allowed=allowed)
+                expected.append((None if path is None else list(path), pathfinder.cost,
+                                 pathfinder.suboptimality))
+            self.assertEqual(len(os.listdir(disk_dir)), 3)
+            self.assertIsNone(expected[2][2])
+            
+            reader = RouteCache(disk_dir=disk_dir)
+            for (start, end, allowed), result in zip(queries, expected):
+                pathfinder = AStarPathfinder()
+                path = reader.find_path(pathfinder, self.cost_map, start, end, allowed=allowed)
+                self.assertEqual((None if path is None else list(path), pathfinder.cost,
+                                  pathfinder.suboptimality), result)
+            self.assertEqual((reader.disk_hits, reader.misses), (3, 0))
+    
+    def test_disk_budget(self):
+        with tempfile.TemporaryDirectory() as disk_dir:
+            cache = RouteCache(disk_dir=disk_dir, max_disk_bytes=1)
+            pathfinder = AStarPathfinder()
+            for end in [(23, 30), (22, 30), (21, 30)]:
+                cache.find_path(pathfinder, self.cost_map, (0, 0), end)
+            self.assertEqual(len(os.listdir(disk_dir)), 1)
+            cache.clear()
+            self.assertEqual(os.listdir(disk_dir), [])
+            self.assertEqual(cache.stats()['entries'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Tests of the sweeping and tiled cost-distance engines in sweep.py
+"""
+
+import unittest
+
+import numpy as np
+
+from support import SEEDS, SHAPE, is_connected, random_cost_map, random_points, route_cost
+from pathfinding import cost_distance, trace_path
+from sweep import sweep_cost_distance, tiled_cost_distance
+
+
+def maze(size: int = 41) -> np.ndarray:
+    """Winding corridors that need many sweep rounds"""
+    cost_map = np.ones((size, size))
+    cost_map[::4, 1:] = np.inf
+    cost_map[2::4, :-1] = np.inf
+    return cost_map
+
+
+class SweepTest(unittest.TestCase):
+    """Sweeps converge to the cost_distance field"""
+    
+    def check_field(self, cost_map: np.ndarray, source):
+        expected, _ = cost_distance(cost_map, source)
+        distance, backlink, report = sweep_cost_distance(cost_map, source)
+        self.assertTrue(report['converged'])
+        np.testing.assert_allclose(distance, expected, rtol=1e-12)
+        return distance, backlink
+    
+    def test_matches_cost_distance(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            cost_map[np.random.default_rng(seed).random(SHAPE) < 0.2] = np.inf
+            start, end = random_points(seed)
+            cost_map[start] = cost_map[end] = 1.0
+            distance, backlink = self.check_field(cost_map, start)
+            path = trace_path(backlink, end)
+            if np.isfinite(distance[end]):
+                self.assertEqual((tuple(path[0]), tuple(path[-1])), (start, end))
+                self.assertTrue(is_connected(path))
+                self.assertAlmostEqual(route_cost(cost_map, path), distance[end], places=6)
+            else:
+                self.assertIsNone(path)
+    
+    def test_multiple_sources(self):
+        self.check_field(random_cost_map(1), [(0, 0), (23, 30), (12, 15)])
+    
+    def test_maze(self):
+        self.check_field(maze(), (0, 0))
+    
+    def test_thin_maps(self):
+        for shape in ((1, 1), (1, 9), (9, 1)):
+            self.check_field(random_cost_map(2, shape=shape), (0, 0))
+    
+    def test_engine_option(self):
+        cost_map = random_cost_map(3)
+        distance, backlink = cost_distance(cost_map, (4, 4), engine='sweep')
+        np.testing.assert_allclose(distance, cost_distance(cost_map, (4, 4))[0], rtol=1e-12)
+        self.assertEqual(backlink.dtype, np.uint8)
+    
+    def test_iteration_limit(self):
+        _, _, report = sweep_cost_distance(maze(), (0, 0), max_iterations=1)
+        self.assertFalse(report['converged'])
+        self.assertEqual(report['iterations'], 1)
+    
+    def test_rejects_bad_input(self):
+        with self.assertRaises(ValueError):
+            sweep_cost_distance(np.zeros(SHAPE), (0, 0))
+        with self.assertRaises(ValueError):
+            sweep_cost_distance(np.ones(SHAPE), (24, 0))
+        with self.assertRaises(ValueError):
+            cost_distance(np.ones(SHAPE), (0, 0), engine='fmm')
+
+
+
+class TiledTest(unittest.TestCase):
+    """Tile rounds reproduce the cost_distance field exactly"""
+    
+    def check_field(self, cost_map: np.ndarray, source, tile_size: int, processes: int = 1):
+        expected, _ = cost_distance(cost_map, source)
+        distance, backlink, report = tiled_cost_distance(cost_map, source, tile_size=tile_size,
+                                                         processes=processes)
+        self.assertTrue(report['converged'])
+        np.testing.assert_array_equal(distance, expected)
+        self.assertEqual(backlink.shape, cost_map.shape)
+        return report
+    
+    def test_matches_cost_distance(self):
+        for seed in SEEDS:
+            cost_map = random_cost_map(seed)
+            cost_map[np.random.default_rng(seed).random(SHAPE) < 0.2] = np.inf
+            start, _ = random_points(seed)
+            cost_map[start] = 1.0
+            for tile_size in (4, 7, 64):
+                self.check_field(cost_map, start, tile_size)
+    
+    def test_multiple_sources(self):
+        self.check_field(random_cost_map(1), [(0, 0), (23, 30)], 8)
+    
+    def test_maze_crosses_tiles(self):
+        report = self.check_field(maze(), (0, 0), 8)
+        self.assertGreater(report['rounds'], 1)
+    
+    def test_worker_processes(self):
+        self.check_field(maze(), (0, 0), 16, processes=2)
+        self.check_field(random_cost_map(4), (5, 5), 8, processes=2)
+    
+    def test_bad_tile_size(self):
+        with self.assertRaises(ValueError):
+            tiled_cost_distance(np.ones(SHAPE), (0, 0), tile_size=0)
+
+
+if __name__ == '__main__':
+    unittest.main()